@@ -193,6 +193,17 @@ class BVAnalyzer(object):
                              if not specie in forbidden_species} \
             if len(forbidden_species) > 0 else ICSD_BV_DATA
 
+    def _get_neighbors(self, structure, site):
+        """
+        Returns the neighbors of a site as [(site, dist), ...]. Only the
+        species of the neighbors are needed for bond valence sums, so the
+        unit cell sites are returned instead of constructing a periodic
+        image for each neighbor.
+        """
+        c_inds, inds, images, dists = structure.get_neighbor_list(
+            self.max_radius, sites=[site])
+        return [(structure[j], d) for j, d in zip(inds, dists)]
+
     def _calc_site_probabilities(self, site, nn):
         el = site.specie.symbol
         bv_sum = calculate_bv_sum(site, nn,
@@ -284,7 +295,7 @@ class BVAnalyzer(object):
         if structure.is_ordered:
             for sites in equi_sites:
                 test_site = sites[0]
-                nn = structure.get_neighbors(test_site, self.max_radius)
+                nn = self._get_neighbors(structure, test_site)
                 prob = self._calc_site_probabilities(test_site, nn)
                 all_prob.append(prob)
                 val = list(prob.keys())
@@ -298,7 +309,7 @@ class BVAnalyzer(object):
             full_all_prob = []
             for sites in equi_sites:
                 test_site = sites[0]
-                nn = structure.get_neighbors(test_site, self.max_radius)
+                nn = self._get_neighbors(structure, test_site)
                 prob = self._calc_site_probabilities_unordered(test_site, nn)
                 all_prob.append(prob)
                 full_all_prob.extend(prob.values())
@@ -1405,7 +1405,7 @@ def symmetry_reduced_voronoi_nodes(
             vor_node_struct = \
                     get_high_accuracy_voronoi_nodes(structure, rad_dict)
             # Before getting the symmetry, remove the duplicates
-            vor_node_struct.sites.sort(key = lambda site: site.voronoi_radius)
+            vor_node_struct.sort(key = lambda site: site.voronoi_radius)
             #print type(vor_node_struct.sites[0])
             dist_sites = filter(check_not_duplicates, vor_node_struct.sites)
             return dist_sites, None, None
@@ -1450,7 +1450,7 @@ def symmetry_reduced_voronoi_nodes(
                 get_high_accuracy_voronoi_nodes(structure, rad_dict)
 
         # Before getting the symmetry, remove the duplicates
-        vor_node_struct.sites.sort(key = lambda site: site.voronoi_radius)
+        vor_node_struct.sort(key = lambda site: site.voronoi_radius)
         #print type(vor_node_struct.sites[0])
         dist_sites = list(filter(check_not_duplicates, vor_node_struct.sites))
 
@@ -16,14 +16,17 @@ __email__ = "shyuep@gmail.com"
 __status__ = "Production"
 __date__ = "Aug 1 2012"
 
-from math import pi, sqrt, log, exp, erfc, factorial
+from math import pi, sqrt, log, factorial
 from datetime import datetime
 from copy import deepcopy, copy
+from collections import defaultdict
 import bisect
 
 import numpy as np
+from scipy.special import erfc
 
 from pymatgen.core.physical_constants import ELECTRON_CHARGE, EPSILON_0
+from pymatgen.util.coord_utils import LOOP_THRESHOLD
 
 
 class EwaldSummation(object):
@@ -104,11 +107,19 @@ class EwaldSummation(object):
         Gives total ewald energy for certain sites being removed, i.e. zeroed
         out.
         """
-        total_energy_matrix = self.total_energy_matrix.copy()
-        for i in removed_indices:
-            total_energy_matrix[i, :] = 0
-            total_energy_matrix[:, i] = 0
-        return sum(sum(total_energy_matrix))
+        removed = np.unique(np.array(removed_indices, dtype=int))
+        total_energy_matrix = self.total_energy_matrix
+        return self.total_energy - \
+            np.sum(total_energy_matrix[removed, :]) - \
+            np.sum(total_energy_matrix[:, removed]) + \
+            np.sum(total_energy_matrix[removed[:, None], removed])
+
+    def get_incremental_state(self):
+        """
+        Returns an EwaldState for incremental energy evaluation of
+        substitutions, removals and swaps of the sites of the structure.
+        """
+        return EwaldState(self.total_energy_matrix)
 
     def compute_sub_structure(self, sub_structure, tol=1e-3):
         """
@@ -123,39 +134,70 @@ class EwaldSummation(object):
         Returns:
             Ewald sum of substructure.
         """
-        total_energy_matrix = self.total_energy_matrix.copy()
-
-        def find_match(site):
-            for test_site in sub_structure:
-                frac_diff = abs(np.array(site.frac_coords)
-                                - np.array(test_site.frac_coords)) % 1
-                frac_diff = [abs(a) < tol or abs(a) > 1 - tol
-                             for a in frac_diff]
-                if all(frac_diff):
-                    return test_site
-            return None
-
-        matches = []
-        for i, site in enumerate(self._s):
-            matching_site = find_match(site)
-            if matching_site:
-                new_charge = compute_average_oxidation_state(matching_site)
-                old_charge = self._oxi_states[i]
-                scaling_factor = new_charge / old_charge
-                matches.append(matching_site)
-            else:
-                scaling_factor = 0
-            total_energy_matrix[i, :] *= scaling_factor
-            total_energy_matrix[:, i] *= scaling_factor
-
-        if len(matches) != len(sub_structure):
-            output = ["Missing sites."]
-            for site in sub_structure:
-                if site not in matches:
-                    output.append("unmatched = {}".format(site))
-            raise ValueError("\n".join(output))
-
-        return sum(sum(total_energy_matrix))
+        return self.compute_sub_structures([sub_structure], tol=tol)[0]
+
+    def compute_sub_structures(self, sub_structures, tol=1e-3):
+        """
+        Gives total ewald energies for many sub structures in the same
+        lattice at once, e.g., all orderings enumerated in one supercell.
+        Each sub_structure must be a subset of the original structure, with
+        possible different charges. The sites of all sub structures with the
+        same number of sites are matched to the sites of the original
+        structure in batches of vectorized periodic coordinate comparisons.
+
+        Args:
+            sub_structures ([Structure]): Substructures to compute Ewald
+                sums for.
+            tol (float): Tolerance for site matching in fractional coordinates.
+
+        Returns:
+            numpy array of the Ewald sums of the substructures.
+        """
+        numsites = self._s.num_sites
+        fcoords = self._s.frac_coords
+        oxistates = np.array(self._oxi_states)
+        # scaling[k, i] is the factor by which the charge of site i is
+        # scaled in sub structure k. Unmatched sites are removed, i.e. 0.
+        scaling = np.zeros((len(sub_structures), numsites))
+
+        by_size = defaultdict(list)
+        for k, sub_structure in enumerate(sub_structures):
+            by_size[len(sub_structure)].append(k)
+
+        for size, inds in by_size.items():
+            batch_size = max(int(LOOP_THRESHOLD // (3 * numsites *
+                                                    max(size, 1))), 1)
+            for start in range(0, len(inds), batch_size):
+                batch = inds[start:start + batch_size]
+                sub_fcoords = np.array([sub_structures[k].frac_coords
+                                        for k in batch]).reshape(
+                    (len(batch), size, 3))
+                charges = np.array([[compute_average_oxidation_state(site)
+                                     for site in sub_structures[k]]
+                                    for k in batch]).reshape(
+                    (len(batch), size))
+
+                frac_diff = np.abs(sub_fcoords[:, :, None, :] -
+                                   fcoords[None, None, :, :]) % 1
+                match = np.all((frac_diff < tol) | (frac_diff > 1 - tol),
+                               axis=-1)
+                # The first matching site of a sub structure is used for
+                # each site of the original structure.
+                matched = np.any(match, axis=1)
+                first = np.argmax(match, axis=1)
+                new_charges = charges[np.arange(len(batch))[:, None], first]
+                scaling[batch] = np.where(matched, new_charges / oxistates, 0)
+
+                for b in np.where(np.sum(matched, axis=1) != size)[0]:
+                    output = ["Missing sites."]
+                    used = set(first[b][matched[b]])
+                    for i, site in enumerate(sub_structures[batch[b]]):
+                        if i not in used:
+                            output.append("unmatched = {}".format(site))
+                    raise ValueError("\n".join(output))
+
+        return np.einsum("ki,ij,kj->k", scaling, self.total_energy_matrix,
+                         scaling)
 
     @property
     def reciprocal_space_energy(self):
@@ -238,7 +280,13 @@ class EwaldSummation(object):
         S(G)S(-G) = |S(G)|**2
 
         This method is heavily vectorized to utilize numpy's C backend for
-        speed.
+        speed. The G vectors are processed in blocks, and the energy matrix
+        of each block is obtained with matrix products of the cos(G.r) and
+        sin(G.r) arrays, using
+        sqrt(2) sin(G.(r_j - r_i) + pi/4) = cos(G.r_i) cos(G.r_j) +
+        sin(G.r_i) sin(G.r_j) + cos(G.r_i) sin(G.r_j) - sin(G.r_i) cos(G.r_j)
+        The block size is chosen such that the arrays have at most
+        LOOP_THRESHOLD elements.
         """
         numsites = self._s.num_sites
         prefactor = 2 * pi / self._vol
@@ -246,91 +294,80 @@ class EwaldSummation(object):
         forces = np.zeros((numsites, 3))
         coords = self._coords
         rcp_latt = self._s.lattice.reciprocal_lattice
-        recip_nn = rcp_latt.get_points_in_sphere([[0, 0, 0]], [0, 0, 0],
-                                                 self._gmax)
-
-        frac_to_cart = rcp_latt.get_cartesian_coords
+        fcoords, dists, inds, images = rcp_latt.get_points_in_sphere(
+            [[0, 0, 0]], [0, 0, 0], self._gmax, zip_results=False)
+        gvects = rcp_latt.get_cartesian_coords(fcoords[dists != 0])
 
         oxistates = np.array(self._oxi_states)
         #create array where q_2[i,j] is qi * qj
         qiqj = oxistates[None, :] * oxistates[:, None]
 
-        for (fcoords, dist, i) in recip_nn:
-            if dist == 0:
-                continue
-            gvect = frac_to_cart(fcoords)
-            gsquare = np.linalg.norm(gvect) ** 2
-
-            expval = exp(-1.0 * gsquare / (4.0 * self._eta))
+        block_size = max(int(LOOP_THRESHOLD // max(numsites, 1)), 1)
+        for start in range(0, len(gvects), block_size):
+            gvect = gvects[start:start + block_size]
+            gsquare = np.sum(gvect ** 2, axis=1)
+            expval = np.exp(-1.0 * gsquare / (4.0 * self._eta))
+            weights = expval / gsquare
 
-            gvectdot = np.sum(gvect[None, :] * coords, 1)
+            gvectdot = np.dot(gvect, coords.T)
+            cosdot = np.cos(gvectdot)
+            sindot = np.sin(gvectdot)
 
             #calculate the structure factor
-            sreal = np.sum(oxistates * np.cos(gvectdot))
-            simag = np.sum(oxistates * np.sin(gvectdot))
+            sreal = np.dot(cosdot, oxistates)
+            simag = np.dot(sindot, oxistates)
 
-            #create array where exparg[i,j] is gvectdot[i] - gvectdot[j]
-            exparg = gvectdot[None, :] - gvectdot[:, None]
+            wcos = weights[:, None] * cosdot
+            wsin = weights[:, None] * sindot
+            erecip += np.dot(wcos.T, cosdot + sindot) + \
+                np.dot(wsin.T, sindot - cosdot)
 
-            #uses the identity sin(x)+cos(x) = 2**0.5 sin(x + pi/4)
-            sfactor = qiqj * np.sin(exparg + pi / 4) * 2 ** 0.5
+            factor = wsin * sreal[:, None] - wcos * simag[:, None]
+            forces += np.dot(factor.T, gvect)
 
-            erecip += expval / gsquare * sfactor
-            pref = 2 * expval / gsquare * oxistates
-            factor = prefactor * pref * \
-                (sreal * np.sin(gvectdot)
-                 - simag * np.cos(gvectdot)) * EwaldSummation.CONV_FACT
-
-            forces += factor[:, None] * gvect[None, :]
-
-        return erecip * prefactor * EwaldSummation.CONV_FACT, forces
+        forces *= 2 * prefactor * EwaldSummation.CONV_FACT * \
+            oxistates[:, None]
+        return erecip * qiqj * prefactor * EwaldSummation.CONV_FACT, forces
 
     def _calc_real_and_point(self):
         """
         Determines the self energy -(eta/pi)**(1/2) * sum_{i=1}^{N} q_i**2
 
         If cell is charged a compensating background is added (i.e. a G=0 term)
+
+        The real space sum is evaluated on the flat neighbor arrays of the
+        structure, in chunks of pairs to bound the memory used by
+        temporary arrays.
         """
-        all_nn = self._s.get_all_neighbors(self._rmax, True)
+        c_inds, nn_inds, images, dists, vectors = \
+            self._s.get_neighbor_list(self._rmax, return_vectors=True)
 
         forcepf = 2.0 * self._sqrt_eta / sqrt(pi)
-        coords = self._coords
         numsites = self._s.num_sites
+        oxistates = np.array(self._oxi_states, dtype=float)
         ereal = np.zeros((numsites, numsites))
-        epoint = np.zeros(numsites)
         forces = np.zeros((numsites, 3))
-        for i in range(numsites):
-            nn = all_nn[i]  # self._s.get_neighbors(site, self._rmax)
-            num_neighbors = len(nn)
-            qi = self._oxi_states[i]
-            epoint[i] = qi * qi
-            epoint[i] *= -1.0 * sqrt(self._eta / pi)
-            # add jellium term
-            epoint[i] += qi * pi / (2.0 * self._vol * self._eta)
-
-            rij = np.zeros(num_neighbors)
-            qj = np.zeros(num_neighbors)
-            js = np.zeros(num_neighbors)
-            ncoords = np.zeros((num_neighbors, 3))
-
-            for k, (site, dist, j) in enumerate(nn):
-                rij[k] = dist
-                qj[k] = self._oxi_states[j]
-                js[k] = j
-                ncoords[k] = site.coords
-
-            erfcval = np.array([erfc(k) for k in self._sqrt_eta * rij])
-            new_ereals = erfcval * qi * qj / rij
-
-            #insert new_ereals
-            for k, new_e in enumerate(new_ereals):
-                ereal[js[k], i] += new_e
+
+        epoint = -oxistates ** 2 * sqrt(self._eta / pi)
+        # add jellium term
+        epoint += oxistates * pi / (2.0 * self._vol * self._eta)
+
+        chunk_size = int(LOOP_THRESHOLD)
+        for start in range(0, len(dists), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            i = c_inds[chunk]
+            j = nn_inds[chunk]
+            rij = dists[chunk]
+            qi = oxistates[i]
+            qj = oxistates[j]
+
+            erfcval = erfc(self._sqrt_eta * rij)
+            np.add.at(ereal, (j, i), erfcval * qi * qj / rij)
 
             fijpf = qj / rij ** 3 * (erfcval + forcepf * rij *
                                      np.exp(-self._eta * rij ** 2))
-            forces[i] += np.sum(np.expand_dims(fijpf, 1) *
-                                (np.array([coords[i]]) - ncoords) *
-                                qi * EwaldSummation.CONV_FACT, axis=0)
+            np.add.at(forces, i, -(fijpf * qi * EwaldSummation.CONV_FACT)
+                      [:, None] * vectors[chunk])
 
         ereal *= 0.5 * EwaldSummation.CONV_FACT
         epoint *= EwaldSummation.CONV_FACT
@@ -349,6 +386,135 @@ class EwaldSummation(object):
         return "\n".join(output)
 
 
+class EwaldState(object):
+    """
+    Incremental Ewald energy of a structure whose sites are modified by
+    scaling their charges, i.e., substitutions by species with other
+    oxidation states, removals (scaling of 0) and swaps. The energy is
+    E = sum_ij M_ij s_i s_j, where M is the Ewald interaction matrix of the
+    original structure and s_i is the scaling of the charge of site i.
+
+    The matrix is held once and the potential v = M.s is kept up to date,
+    so that the energy change of modifying k sites is evaluated in O(k^2)
+    and applied in O(N k), without copying the N x N matrix. This makes it
+    suitable for Monte Carlo or simulated annealing searches of orderings
+    in supercells which are too large for the EwaldMinimizer.
+    """
+
+    def __init__(self, matrix, scaling=None):
+        """
+        Args:
+            matrix: Ewald interaction matrix, e.g., the total_energy_matrix
+                of an EwaldSummation. It is stored symmetrized, which does
+                not change any energy.
+            scaling: Initial charge scalings of the sites. Defaults to None,
+                which means the original structure, i.e. all ones.
+        """
+        matrix = np.array(matrix, dtype=float)
+        self._matrix = 0.5 * (matrix + matrix.T)
+        self._scaling = np.ones(len(matrix)) if scaling is None \
+            else np.array(scaling, dtype=float)
+        self._potential = np.dot(self._matrix, self._scaling)
+        self._energy = np.dot(self._scaling, self._potential)
+
+    @property
+    def energy(self):
+        """
+        The Ewald energy of the current state.
+        """
+        return self._energy
+
+    @property
+    def scaling(self):
+        """
+        The current charge scalings of the sites.
+        """
+        return self._scaling.copy()
+
+    def _get_deltas(self, indices, new_scaling):
+        indices = np.array(indices, dtype=int).reshape(-1)
+        new_scaling = np.broadcast_to(np.array(new_scaling, dtype=float),
+                                      indices.shape)
+        if len(np.unique(indices)) != len(indices):
+            raise ValueError("Indices must be unique.")
+        return indices, new_scaling, new_scaling - self._scaling[indices]
+
+    def get_delta(self, indices, new_scaling):
+        """
+        Energy change from setting the charge scalings of some sites,
+        without modifying the state.
+
+        Args:
+            indices: Indices of the sites to modify.
+            new_scaling: New charge scalings for these sites, as a sequence
+                or a single number for all sites.
+
+        Returns:
+            Energy change.
+        """
+        indices, new_scaling, deltas = self._get_deltas(indices, new_scaling)
+        return 2 * np.dot(deltas, self._potential[indices]) + \
+            np.dot(deltas, np.dot(self._matrix[indices[:, None], indices],
+                                  deltas))
+
+    def get_remove_delta(self, indices):
+        """
+        Energy change from removing sites, without modifying the state.
+
+        Args:
+            indices: Indices of the sites to remove.
+        """
+        return self.get_delta(indices, 0)
+
+    def get_swap_delta(self, i, j):
+        """
+        Energy change from swapping the charge scalings of sites i and j,
+        without modifying the state.
+        """
+        if i == j:
+            return 0
+        return self.get_delta([i, j], self._scaling[[j, i]])
+
+    def update(self, indices, new_scaling):
+        """
+        Sets the charge scalings of some sites.
+
+        Args:
+            indices: Indices of the sites to modify.
+            new_scaling: New charge scalings for these sites, as a sequence
+                or a single number for all sites.
+
+        Returns:
+            Energy change.
+        """
+        delta_e = self.get_delta(indices, new_scaling)
+        indices, new_scaling, deltas = self._get_deltas(indices, new_scaling)
+        self._potential += np.dot(self._matrix[:, indices], deltas)
+        self._scaling[indices] = new_scaling
+        self._energy += delta_e
+        return delta_e
+
+    def remove(self, indices):
+        """
+        Removes sites, i.e. sets their charge scalings to 0.
+
+        Returns:
+            Energy change.
+        """
+        return self.update(indices, 0)
+
+    def swap(self, i, j):
+        """
+        Swaps the charge scalings of sites i and j.
+
+        Returns:
+            Energy change.
+        """
+        if i == j:
+            return 0
+        return self.update([i, j], self._scaling[[j, i]])
+
+
 class EwaldMinimizer:
     """
     This class determines the manipulations that will minimize an ewald matrix,
@@ -380,6 +546,14 @@ class EwaldMinimizer:
             structures so it may be necessary to overestimate and then
             remove the duplicates later. (duplicate checking in this
             process is extremely expensive)
+        algo: Algorithm to use, one of the ALGO_* constants.
+        ncpus: Number of processes to use for the search. The top levels of
+            the search tree are split into subtrees that are searched by
+            the workers, which share the current num_to_return-th lowest
+            energy as a pruning bound. The output_lists are the same as for
+            a serial search. ALGO_BEST_FIRST is always run serially, since
+            its result depends on the order of the search. Defaults to
+            None, which means a serial search.
     """
 
     ALGO_FAST = 0
@@ -393,15 +567,16 @@ class EwaldMinimizer:
     """
     ALGO_TIME_LIMIT = 3
 
-    def __init__(self, matrix, m_list, num_to_return=1, algo=ALGO_FAST):
+    # Minimum number of subtrees per process in a parallel search, so that
+    # the work is balanced even though subtrees are pruned very unevenly.
+    SUBTREES_PER_CPU = 8
+
+    def __init__(self, matrix, m_list, num_to_return=1, algo=ALGO_FAST,
+                 ncpus=None):
         # Setup and checking of inputs
-        self._matrix = copy(matrix)
+        matrix = np.array(matrix, dtype=float)
         # Make the matrix diagonally symmetric (so matrix[i,:] == matrix[:,j])
-        for i in range(len(self._matrix)):
-            for j in range(i, len(self._matrix)):
-                value = (self._matrix[i, j] + self._matrix[j, i]) / 2
-                self._matrix[i, j] = value
-                self._matrix[j, i] = value
+        self._matrix = (matrix + matrix.T) / 2
 
         def comb(n, k):
             return factorial(n) / factorial(k) / factorial(n - k)
@@ -416,6 +591,9 @@ class EwaldMinimizer:
         self._current_minimum = float('inf')
         self._num_to_return = num_to_return
         self._algo = algo
+        self._ncpus = ncpus
+        # Pruning bound shared between the processes of a parallel search.
+        self._shared_bound = None
         if algo == EwaldMinimizer.ALGO_COMPLETE:
             raise NotImplementedError('Complete algo not yet implemented for '
                                       'EwaldMinimizer')
@@ -439,9 +617,48 @@ class EwaldMinimizer:
         """
         if self._algo == EwaldMinimizer.ALGO_FAST or \
                 self._algo == EwaldMinimizer.ALGO_BEST_FIRST:
+            if self._ncpus and self._algo != EwaldMinimizer.ALGO_BEST_FIRST:
+                return self._parallel_recurse()
             return self._recurse(self._matrix, self._m_list,
                                  set(range(len(self._matrix))))
 
+    def _parallel_recurse(self):
+        """
+        Splits the top levels of the search tree into subtrees and searches
+        them with a pool of processes.
+        """
+        import multiprocessing as mp
+
+        subtrees = [(self._matrix, self._m_list,
+                     set(range(len(self._matrix))), [])]
+        # Expand breadth first, which keeps the subtrees in the order in
+        # which the serial search would visit them. Leaves found on the way
+        # are added to the output_lists directly.
+        while subtrees and \
+                len(subtrees) < self._ncpus * self.SUBTREES_PER_CPU:
+            expanded = []
+            for subtree in subtrees:
+                expanded.extend(self._branch(*subtree))
+            subtrees = expanded
+
+        bound = mp.Value("d", self._current_minimum)
+        pool = mp.Pool(self._ncpus, initializer=_init_minimizer_worker,
+                       initargs=(self, bound))
+        try:
+            # Results are merged in subtree order, as in a serial search, so
+            # that ties in energy are resolved the same way on every run.
+            for output_lists in pool.imap(_minimize_subtree, subtrees):
+                for matrix_sum, m_list in output_lists:
+                    if matrix_sum < self._current_minimum:
+                        self.add_m_list(matrix_sum, m_list)
+        except:
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+
     def add_m_list(self, matrix_sum, m_list):
         """
         This adds an m_list to the output_lists and updates the current
@@ -458,6 +675,10 @@ class EwaldMinimizer:
             self._output_lists.pop()
         if len(self._output_lists) == self._num_to_return:
             self._current_minimum = self._output_lists[-1][0]
+            if self._shared_bound is not None:
+                with self._shared_bound.get_lock():
+                    if self._current_minimum < self._shared_bound.value:
+                        self._shared_bound.value = self._current_minimum
 
     def best_case(self, matrix, m_list, indices_left):
         """
@@ -545,6 +766,25 @@ class EwaldMinimizer:
         if self._finished:
             return
 
+        #recurse through both the modified and unmodified matrices
+        for branch in self._branch(matrix, m_list, indices, output_m_list):
+            self._recurse(*branch)
+
+    def _branch(self, matrix, m_list, indices, output_m_list):
+        """
+        Performs one step of the tree search. Leaves are added to the
+        output_lists.
+
+        Returns:
+            The list of (matrix, m_list, indices, output_m_list) arguments
+            of the branches to search next, i.e. the modified and unmodified
+            matrices, or an empty list if this node is a leaf or is pruned.
+        """
+        if self._shared_bound is not None:
+            # Stale reads are harmless since the shared bound only decreases
+            self._current_minimum = min(self._current_minimum,
+                                        self._shared_bound.get_obj().value)
+
         #if we're done with the current manipulation, pop it off.
         while m_list[-1][1] == 0:
             m_list = copy(m_list)
@@ -554,15 +794,15 @@ class EwaldMinimizer:
                 matrix_sum = np.sum(matrix)
                 if matrix_sum < self._current_minimum:
                     self.add_m_list(matrix_sum, output_m_list)
-                return
+                return []
 
         #if we wont have enough indices left, return
         if m_list[-1][1] > len(indices.intersection(m_list[-1][2])):
-            return
+            return []
 
         if len(m_list) == 1 or m_list[-1][1] > 1:
             if self.best_case(matrix, m_list, indices) > self._current_minimum:
-                return
+                return []
 
         index = self.get_next_index(matrix, m_list[-1], indices)
 
@@ -581,10 +821,8 @@ class EwaldMinimizer:
         indices2.remove(index)
         m_list2[-1][1] -= 1
 
-        #recurse through both the modified and unmodified matrices
-
-        self._recurse(matrix2, m_list2, indices2, output_m_list2)
-        self._recurse(matrix, m_list, indices, output_m_list)
+        return [(matrix2, m_list2, indices2, output_m_list2),
+                (matrix, m_list, indices, output_m_list)]
 
     @property
     def best_m_list(self):
@@ -599,6 +837,24 @@ class EwaldMinimizer:
         return self._output_lists
 
 
+#Module level state and functions for the parallel search of the
+#EwaldMinimizer. Each worker process holds its own copy of the minimizer.
+_minimizer_worker = {"minimizer": None}
+
+
+def _init_minimizer_worker(minimizer, bound):
+    minimizer._shared_bound = bound
+    _minimizer_worker["minimizer"] = minimizer
+
+
+def _minimize_subtree(subtree):
+    minimizer = _minimizer_worker["minimizer"]
+    minimizer._output_lists = []
+    minimizer._current_minimum = float('inf')
+    minimizer._recurse(*subtree)
+    return minimizer._output_lists
+
+
 def compute_average_oxidation_state(site):
     """
     Calculates the average oxidation state of a site
@@ -63,11 +63,15 @@ class VoronoiCoordFinder(object):
             n and their solid angle weights
         """
         localtarget = self._target
-        center = self._structure[n]
-        neighbors = self._structure.get_sites_in_sphere(
-            center.coords, VoronoiCoordFinder.default_cutoff)
-        neighbors = [i[0] for i in sorted(neighbors, key=lambda s: s[1])]
-        qvoronoi_input = [s.coords for s in neighbors]
+        structure = self._structure
+        center = structure[n]
+        c_inds, inds, images, dists = structure.get_neighbor_list(
+            VoronoiCoordFinder.default_cutoff, sites=[center],
+            exclude_self=False)
+        order = np.argsort(dists, kind="mergesort")
+        inds = inds[order]
+        fcoords = structure.frac_coords[inds] + images[order]
+        qvoronoi_input = structure.lattice.get_cartesian_coords(fcoords)
         voro = VoronoiTess(qvoronoi_input)
         all_vertices = voro.vertices
 
@@ -80,14 +84,18 @@ class VoronoiCoordFinder(object):
                                        "construction")
 
                 facets = [all_vertices[i] for i in vind]
-                results[neighbors[nn[1]]] = solid_angle(center.coords, facets)
+                results[nn[1]] = solid_angle(center.coords, facets)
 
         maxangle = max(results.values())
 
         resultweighted = {}
-        for nn, angle in results.items():
-            if nn.specie in localtarget:
-                resultweighted[nn] = angle / maxangle
+        for k, angle in results.items():
+            nn_site = structure[inds[k]]
+            if nn_site.specie in localtarget:
+                site = PeriodicSite(nn_site.species_and_occu, fcoords[k],
+                                    structure.lattice,
+                                    properties=nn_site.properties)
+                resultweighted[site] = angle / maxangle
 
         return resultweighted
 
@@ -7,7 +7,6 @@ This module provides classes to perform fitting of structures.
 """
 
 import six
-from six.moves import filter
 from six.moves import zip
 
 __author__ = "William Davidson Richards, Stephen Dacek, Shyue Ping Ong"
@@ -21,6 +20,7 @@ __date__ = "Dec 3, 2012"
 import numpy as np
 import itertools
 import abc
+import collections
 
 from pymatgen.serializers.json_coders import PMGSONable
 from pymatgen.core.structure import Structure
@@ -28,7 +28,7 @@ from pymatgen.core.lattice import Lattice
 from pymatgen.core.composition import Composition
 from pymatgen.optimization.linear_assignment import LinearAssignment
 from pymatgen.util.coord_utils import pbc_shortest_vectors, \
-    lattice_points_in_supercell
+    lattice_points_in_supercell, LOOP_THRESHOLD
 
 
 class AbstractComparator(six.with_metaclass(abc.ABCMeta, PMGSONable)):
@@ -334,11 +334,19 @@ class StructureMatcher(PMGSONable):
         supercell_size: Method to use for determining the size of a
             supercell (if applicable). Possible values are num_sites,
             num_atoms or volume.
+        cache_size (int): Maximum number of reduced (niggli and primitive)
+            structures kept in the preprocessing cache. Each structure is
+            reduced only once per matcher as long as it remains in the
+            cache, which greatly speeds up repeated fits of the same
+            structure, e.g., in group_structures. Least recently used
+            structures are evicted first. Set to 0 to disable caching.
+            Defaults to 1000.
     """
 
     def __init__(self, ltol=0.2, stol=0.3, angle_tol=5, primitive_cell=True,
                  scale=True, attempt_supercell=False, allow_subset=False,
-                 comparator=SpeciesComparator(), supercell_size='num_sites'):
+                 comparator=SpeciesComparator(), supercell_size='num_sites',
+                 cache_size=1000):
 
         self.ltol = ltol
         self.stol = stol
@@ -349,6 +357,8 @@ class StructureMatcher(PMGSONable):
         self._supercell = attempt_supercell
         self._supercell_size = supercell_size
         self._subset = allow_subset
+        self._cache_size = cache_size
+        self._reduced_cache = collections.OrderedDict()
 
     def _get_supercell_size(self, s1, s2):
         """
@@ -429,26 +439,56 @@ class StructureMatcher(PMGSONable):
         Returns true if a matching exists between s2 and s2
         under frac_tol. s2 should be a subset of s1
         """
+        costs, valid = self._get_translation_costs(s1, s2, np.zeros((1, 3)),
+                                                   frac_tol, mask)
+        if not valid[0]:
+            return False
+
+        return LinearAssignment(costs[0]).min_cost < 3 * len(s1)
+
+    def _get_translation_costs(self, s1, s2, translations, frac_tol, mask):
+        """
+        Computes the cost matrices used by _cmp_fstruct for a batch of
+        translations of s2 at once, together with the maximin lower bound
+        on the linear assignment for each translation.
+
+        Args:
+            s1, s2: numpy arrays of fractional coordinates.
+                len(s1) >= len(s2)
+            translations: Tx3 array of fractional translations to apply
+                to s2.
+            frac_tol: Fractional tolerance in each direction.
+            mask: numpy array of booleans. mask[i, j] = True indicates
+                that s2[i] cannot be matched to s1[j]
+
+        Returns:
+            (costs, valid), where costs is a (T, len(s2), len(s1)) array of
+            cost matrices and valid is a boolean array indicating which
+            translations pass the lower bound, i.e., only these can
+            possibly yield a matching.
+        """
         if len(s2) > len(s1):
             raise ValueError("s1 must be larger than s2")
         if mask.shape != (len(s2), len(s1)):
             raise ValueError("mask has incorrect shape")
 
         mask_val = 3 * len(s1)
-        #distance from subset to superset
-        dist = s1[None, :] - s2[:, None]
-        dist = abs(dist - np.round(dist))
-
-        dist[dist > frac_tol[None, None, :]] = mask_val
-        cost = np.sum(dist, axis=-1)
-        cost[mask] = mask_val
+        #distance from subset to superset for each translation, accumulated
+        #one axis at a time to limit the size of temporary arrays
+        costs = np.zeros((len(translations), len(s2), len(s1)))
+        for i in range(3):
+            dist = s1[:, i] - (s2[:, i][:, None] +
+                               translations[:, i][:, None, None])
+            dist -= np.round(dist)
+            np.abs(dist, out=dist)
+            dist[dist > frac_tol[i]] = mask_val
+            costs += dist
+        costs[:, mask] = mask_val
 
         #maximin is a lower bound on linear assignment
         #(and faster to compute)
-        if np.max(np.min(cost, axis=1)) >= mask_val:
-            return False
-
-        return LinearAssignment(cost).min_cost < mask_val
+        valid = np.max(np.min(costs, axis=2), axis=1) < mask_val
+        return costs, valid
 
     def _cart_dists(self, s1, s2, avg_lattice, mask):
         """
@@ -569,17 +609,8 @@ class StructureMatcher(PMGSONable):
         and finds fu, the supercell size to make struct1 comparable to
         s2
         """
-        struct1 = Structure.from_sites(struct1)
-        struct2 = Structure.from_sites(struct2)
-
-        if niggli:
-            struct1 = struct1.get_reduced_structure(reduction_algo="niggli")
-            struct2 = struct2.get_reduced_structure(reduction_algo="niggli")
-
-        #primitive cell transformation
-        if self._primitive_cell:
-            struct1 = struct1.get_primitive_structure()
-            struct2 = struct2.get_primitive_structure()
+        struct1 = self._get_reduced_structure(struct1, niggli)
+        struct2 = self._get_reduced_structure(struct2, niggli)
 
         if self._supercell:
             fu, s1_supercell = self._get_supercell_size(struct1, struct2)
@@ -597,6 +628,61 @@ class StructureMatcher(PMGSONable):
 
         return struct1, struct2, fu, s1_supercell
 
+    def _get_reduced_structure(self, struct, niggli=True):
+        """
+        Returns a copy of struct reduced to its niggli and/or primitive cell
+        according to the matcher settings. Reduced structures are cached
+        (keyed by lattice, species, coordinates and site properties) so that
+        each structure is only reduced once.
+        """
+        if not (niggli or self._primitive_cell):
+            return Structure.from_sites(struct)
+        #the reduced structure carries the site properties, so they are
+        #part of the key
+        key = (niggli, struct.lattice.matrix.tobytes(),
+               struct.frac_coords.tobytes(),
+               tuple(site.species_and_occu for site in struct),
+               repr(sorted(struct.site_properties.items())))
+        reduced = self._reduced_cache.pop(key, None)
+        if reduced is None:
+            reduced = Structure.from_sites(struct)
+            if niggli:
+                reduced = reduced.get_reduced_structure(
+                    reduction_algo="niggli")
+            #primitive cell transformation
+            if self._primitive_cell:
+                reduced = reduced.get_primitive_structure()
+        if self._cache_size > 0:
+            #Reinserting moves the key to the most recently used end.
+            self._reduced_cache[key] = reduced
+            while len(self._reduced_cache) > self._cache_size:
+                self._reduced_cache.popitem(last=False)
+        return reduced.copy()
+
+    def reduce_structures(self, s_list, niggli=True):
+        """
+        Reduces a list of structures in bulk to their niggli and/or primitive
+        cells (according to the matcher settings) and stores them in the
+        preprocessing cache. Subsequent fits involving these structures
+        will not repeat the reduction, provided that the cache_size is at
+        least the number of structures.
+
+        Args:
+            s_list ([Structure]): List of structures to reduce.
+            niggli (bool): Whether to perform a niggli reduction. Defaults
+                to True, which is what is used by fit.
+
+        Returns:
+            List of reduced structures.
+        """
+        return [self._get_reduced_structure(s, niggli) for s in s_list]
+
+    def clear_cache(self):
+        """
+        Clears the cache of reduced structures.
+        """
+        self._reduced_cache.clear()
+
     def _match(self, struct1, struct2, fu, s1_supercell=True, use_rms=False,
                break_on_match=False):
         """
@@ -652,11 +738,19 @@ class StructureMatcher(PMGSONable):
             normalization = (len(s1fc) / avg_l.volume) ** (1/3)
             inv_abc = np.array(avg_l.reciprocal_lattice.abc)
             frac_tol = inv_abc * self.stol / (np.pi * normalization)
-            #loop over all translations
-            for s1i in s1_t_inds:
-                t = s1fc[s1i] - s2fc[s2_t_ind]
-                t_s2fc = s2fc + t
-                if self._cmp_fstruct(s1fc, t_s2fc, frac_tol, mask):
+            #loop over all translations. The cost matrices of a batch of
+            #translations are evaluated at once, and the linear assignment
+            #is only solved for translations passing the maximin bound.
+            translations = s1fc[s1_t_inds] - s2fc[s2_t_ind]
+            batch_size = max(int(LOOP_THRESHOLD // (3 * mask.size)), 1)
+            for start in range(0, len(translations), batch_size):
+                batch = translations[start:start + batch_size]
+                costs, valid = self._get_translation_costs(
+                    s1fc, s2fc, batch, frac_tol, mask)
+                for t, cost in zip(batch[valid], costs[valid]):
+                    if LinearAssignment(cost).min_cost >= 3 * len(s1fc):
+                        continue
+                    t_s2fc = s2fc + t
                     dist, t_adj, mapping = self._cart_dists(s1fc, t_s2fc,
                                                             avg_l, mask)
                     if use_rms:
@@ -673,13 +767,44 @@ class StructureMatcher(PMGSONable):
         if best_match and best_match[0] < self.stol:
             return best_match
 
-    def group_structures(self, s_list, anonymous=False):
+    def group_structures(self, s_list, anonymous=False, prefilters=None,
+                         ncpus=None):
         """
         Given a list of structures, use fit to group
         them by structural equality.
 
+        Optionally, structures are first split by cheap invariants of their
+        reduced cells (see prefilters) and fits are only attempted between
+        structures with compatible invariants. The fits can be distributed
+        over multiple processes.
+
         Args:
             s_list ([Structure]): List of structures to be grouped
+            anonymous (bool): Whether to use anonymous fitting.
+            prefilters ([str]): Invariants used to rule out matches without
+                a fit. Supported values are:
+
+                i.  "nsites": Number of sites in the reduced cell. Ignored if
+                    attempt_supercell is True.
+                ii. "lattice": Sorted lengths of the niggli reduced lattice
+                    vectors (normalized by the volume if scale is True),
+                    which must agree within ltol. Ignored if
+                    attempt_supercell is True.
+                iii. "volume": Volume per site, which must agree within
+                    about 3 * ltol. Ignored if scale is True.
+                iv. "spacegroup": Space group number with a symprec of 0.1.
+                v.  "rdf": Radial distribution fingerprint up to 3 times the
+                    free length per site, compared by cosine similarity.
+
+                "nsites" is a necessary condition for a match. The others are
+                heuristics that may separate structures which would match,
+                e.g., "lattice" since fit also allows the angles to differ
+                by angle_tol, which changes the reduced lengths. Note that
+                any prefilter reduces all structures upfront. Defaults to
+                None, which means no prefilters, i.e., every pair in a
+                composition bucket is fitted.
+            ncpus (int): Number of processes to use for fitting. Defaults
+                to None, which means serial processing.
 
         Returns:
             A list of lists of matched structures
@@ -690,6 +815,11 @@ class StructureMatcher(PMGSONable):
             raise ValueError("allow_subset cannot be used with"
                              " group_structures")
 
+        prefilters = tuple(prefilters or ())
+        for f in prefilters:
+            if f not in ("nsites", "lattice", "volume", "spacegroup", "rdf"):
+                raise ValueError("Unknown prefilter %s" % f)
+
         #Use structure hash to pre-group structures
         if anonymous:
             c_hash = lambda c: c.anonymized_formula
@@ -697,26 +827,121 @@ class StructureMatcher(PMGSONable):
             c_hash = self._comparator.get_hash
         s_hash = lambda s: c_hash(s.composition)
         sorted_s_list = sorted(s_list, key=s_hash)
-        all_groups = []
-
-        #For each pre-grouped list of structures, perform actual matching.
-        for k, g in itertools.groupby(sorted_s_list, key=s_hash):
-            unmatched = list(g)
-            while len(unmatched) > 0:
-                ref = unmatched.pop(0)
-                matches = [ref]
-                if anonymous:
-                    inds = filter(lambda i: self.fit_anonymous(ref,
-                            unmatched[i]), list(range(len(unmatched))))
-                else:
-                    inds = filter(lambda i: self.fit(ref, unmatched[i]),
-                                  list(range(len(unmatched))))
-                inds = list(inds)
-                matches.extend([unmatched[i] for i in inds])
-                unmatched = [unmatched[i] for i in range(len(unmatched))
-                             if i not in inds]
-                all_groups.append(matches)
-        return all_groups
+        hashes = [s_hash(s) for s in sorted_s_list]
+
+        fit = self.fit_anonymous if anonymous else self.fit
+        pool = None
+        if ncpus:
+            import multiprocessing as mp
+            pool = mp.Pool(ncpus, initializer=_init_group_worker,
+                           initargs=(self, sorted_s_list, anonymous))
+
+        def fit_pairs(pairs):
+            if pool and len(pairs) > 1:
+                return pool.map(_fit_pair, pairs)
+            return [fit(sorted_s_list[i], sorted_s_list[j])
+                    for i, j in pairs]
+
+        try:
+            if not prefilters:
+                fingerprints = [{} for s in sorted_s_list]
+            elif pool:
+                args = [(i, prefilters) for i in range(len(sorted_s_list))]
+                fingerprints = pool.map(_get_fingerprint, args)
+            else:
+                fingerprints = [self._get_fingerprint(s, prefilters)
+                                for s in sorted_s_list]
+
+            #Further split the composition buckets on the prefilter
+            #invariants. Structures in different components can never match.
+            components = [list(g) for k, g in itertools.groupby(
+                range(len(sorted_s_list)), key=lambda i: hashes[i])]
+            components = _split_by_fingerprints(components, fingerprints,
+                                                self._get_prefilter_tols())
+
+            all_groups = []
+            for comp in components:
+                all_groups.extend(self._group_component(comp, fingerprints,
+                                                        fit_pairs))
+        except:
+            if pool:
+                pool.terminate()
+            raise
+        else:
+            if pool:
+                pool.close()
+        finally:
+            if pool:
+                pool.join()
+
+        #Restore the order of the serial algorithm, in which groups are
+        #created in order of their first member.
+        all_groups = sorted(all_groups, key=lambda g: g[0])
+        return [[sorted_s_list[i] for i in g] for g in all_groups]
+
+    def _group_component(self, comp, fingerprints, fit_pairs):
+        """
+        Greedily groups the structures with indices comp by structural
+        equality, performing fits only between compatible fingerprints.
+        fit_pairs is a function returning the fits of a list of pairs of
+        indices.
+        """
+        tols = self._get_prefilter_tols()
+        groups = []
+        unmatched = list(comp)
+        while len(unmatched) > 0:
+            ref = unmatched.pop(0)
+            cands = [i for i in unmatched
+                     if _fingerprints_compatible(fingerprints[ref],
+                                                 fingerprints[i], tols)]
+            results = fit_pairs([(ref, i) for i in cands])
+            matches = [i for i, m in zip(cands, results) if m]
+            groups.append([ref] + matches)
+            matches = set(matches)
+            unmatched = [i for i in unmatched if i not in matches]
+        return groups
+
+    def _get_prefilter_tols(self):
+        """
+        Returns tolerances (in log space) for the lattice and volume
+        prefilters, and the similarity threshold for the rdf prefilter.
+        """
+        #find_all_mappings accepts lengths l1 with |l1 - l2| <= ltol * l2,
+        #so lengths agree within a factor of 1 / (1 - ltol) in either
+        #direction. A small margin is added for numerical noise.
+        ltol = -np.log(1 - min(self.ltol, 0.99)) + 1e-3
+        return {"lattice": ltol, "volume": 3 * ltol, "rdf": 0.9}
+
+    def _get_fingerprint(self, struct, prefilters):
+        """
+        Computes the prefilter invariants of a structure. See
+        group_structures.
+        """
+        s = self._get_reduced_structure(struct)
+        fp = {}
+        if "nsites" in prefilters and not self._supercell:
+            fp["nsites"] = len(s)
+        if "lattice" in prefilters and not self._supercell:
+            abc = np.sort(s.lattice.get_niggli_reduced_lattice().abc)
+            if self._scale:
+                abc = abc / s.volume ** (1 / 3)
+            fp["lattice"] = np.log(abc)
+        if "volume" in prefilters and not self._scale:
+            fp["volume"] = np.log(s.volume / len(s))
+        if "spacegroup" in prefilters:
+            from pymatgen.symmetry.analyzer import SpacegroupAnalyzer
+            fp["spacegroup"] = SpacegroupAnalyzer(
+                s, symprec=0.1).get_spacegroup_number()
+        if "rdf" in prefilters:
+            free_length = (s.volume / len(s)) ** (1 / 3)
+            dists = s.get_neighbor_list(3 * free_length)[3] / free_length
+            #Gaussian smearing makes the fingerprint robust to small
+            #displacements of the sites.
+            grid = np.linspace(0, 3, 61)
+            rdf = np.sum(np.exp(-(grid[:, None] - dists[None, :]) ** 2 /
+                                (2 * 0.1 ** 2)), axis=1)
+            fp["rdf"] = rdf / max(np.linalg.norm(rdf), 1e-8)
+        return fp
 
     def as_dict(self):
         return {"version": __version__, "@module": self.__class__.__module__,
@@ -1016,3 +1241,83 @@ class StructureMatcher(PMGSONable):
             return None
 
         return match[4]
+
+
+#Module level state and functions for group_structures, so that they can be
+#used with multiprocessing. Each worker process holds its own matcher (and
+#hence its own cache of reduced structures) and list of structures, which
+#are set by the Pool initializer. The parent process never uses this state.
+_group_worker = {"matcher": None, "structures": None, "anonymous": False}
+
+
+def _init_group_worker(matcher, structures, anonymous):
+    _group_worker["matcher"] = matcher
+    _group_worker["structures"] = structures
+    _group_worker["anonymous"] = anonymous
+
+
+def _get_fingerprint(args):
+    i, prefilters = args
+    return _group_worker["matcher"]._get_fingerprint(
+        _group_worker["structures"][i], prefilters)
+
+
+def _fit_pair(args):
+    i, j = args
+    matcher = _group_worker["matcher"]
+    s_list = _group_worker["structures"]
+    if _group_worker["anonymous"]:
+        return matcher.fit_anonymous(s_list[i], s_list[j])
+    return matcher.fit(s_list[i], s_list[j])
+
+
+def _fingerprints_compatible(fp1, fp2, tols):
+    for k, v in fp1.items():
+        if k in ("lattice", "volume"):
+            if np.any(np.abs(v - fp2[k]) > tols[k]):
+                return False
+        elif k == "rdf":
+            if np.dot(v, fp2[k]) < tols[k]:
+                return False
+        elif v != fp2[k]:
+            return False
+    return True
+
+
+def _split_by_fingerprints(components, fingerprints, tols):
+    """
+    Splits lists of structure indices into smaller lists such that
+    structures in different lists have incompatible fingerprints. Discrete
+    invariants are split on exact values, and continuous ones by single
+    linkage clustering, i.e., on gaps larger than the tolerance.
+    """
+    if not fingerprints or not fingerprints[0]:
+        return components
+    keys = fingerprints[0].keys()
+    for k in keys:
+        new_components = []
+        for comp in components:
+            if k in ("nsites", "spacegroup"):
+                groups = collections.OrderedDict()
+                for i in comp:
+                    groups.setdefault(fingerprints[i][k], []).append(i)
+                new_components.extend(groups.values())
+            elif k in ("lattice", "volume"):
+                splits = [comp]
+                for dim in range(np.size(fingerprints[comp[0]][k])):
+                    new_splits = []
+                    for c in splits:
+                        vals = np.array([np.ravel(fingerprints[i][k])[dim]
+                                         for i in c])
+                        order = np.argsort(vals, kind="mergesort")
+                        breaks = np.where(np.diff(vals[order]) >
+                                          tols[k])[0] + 1
+                        for sub in np.split(order, breaks):
+                            #Keep original ordering within each split.
+                            new_splits.append([c[j] for j in sorted(sub)])
+                    splits = new_splits
+                new_components.extend(splits)
+            else:
+                new_components.append(comp)
+        components = new_components
+    return components
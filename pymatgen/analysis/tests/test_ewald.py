@@ -4,6 +4,7 @@ from __future__ import unicode_literals
 
 import unittest
 import os
+from copy import deepcopy
 
 from pymatgen.analysis.ewald import EwaldSummation, EwaldMinimizer
 from pymatgen.io.vaspio.vasp_input import Poscar
@@ -64,6 +65,94 @@ class EwaldSummationTest(unittest.TestCase):
         self.assertAlmostEqual(ham2.real_space_energy, -354.91294268, 4,
                                "Real space energy incorrect!")
 
+    def test_supercell(self):
+        filepath = os.path.join(test_dir, 'POSCAR')
+        s = Poscar.from_file(filepath).structure
+        s.add_oxidation_state_by_element({"Li": 1, "Fe": 2,
+                                          "P": 5, "O": -2})
+        ham = EwaldSummation(s, eta=0.5)
+        s.make_supercell([1, 2, 1])
+        ham2 = EwaldSummation(s, eta=0.5)
+        self.assertAlmostEqual(ham2.real_space_energy,
+                               2 * ham.real_space_energy, 6)
+        #make_supercell puts the images of each site next to each other.
+        self.assertTrue(np.allclose(ham2.forces[::2], ham.forces))
+        self.assertTrue(np.allclose(ham2.real_space_energy_matrix,
+                                    ham2.real_space_energy_matrix.T))
+
+    def test_compute_sub_structures(self):
+        filepath = os.path.join(test_dir, 'POSCAR')
+        s = Poscar.from_file(filepath).structure
+        s.add_oxidation_state_by_element({"Li": 1, "Fe": 2,
+                                          "P": 5, "O": -2})
+        ham = EwaldSummation(s)
+        subs = []
+        for i in range(4):
+            sub = s.copy()
+            sub.remove_sites([i])
+            sub.replace(0, {"Li+": 0.5}, coords=sub[0].frac_coords + 1)
+            subs.append(sub)
+        energies = ham.compute_sub_structures(subs)
+        self.assertEqual(energies.shape, (4,))
+        matrix = ham.total_energy_matrix
+        for i, energy in enumerate(energies):
+            #Fe2+ site i is removed and the charge of the first remaining
+            #site is replaced by 0.5.
+            scale = np.ones(len(s))
+            scale[i] = 0
+            scale[1 if i == 0 else 0] = 0.25
+            self.assertAlmostEqual(energy, scale.dot(matrix).dot(scale))
+            self.assertAlmostEqual(ham.compute_sub_structure(subs[i]),
+                                   energy)
+        self.assertAlmostEqual(ham.compute_sub_structure(s), ham.total_energy)
+        sub = s.copy()
+        sub.translate_sites([0], [0.1, 0, 0])
+        self.assertRaises(ValueError, ham.compute_sub_structure, sub)
+
+
+class EwaldStateTest(unittest.TestCase):
+
+    def setUp(self):
+        filepath = os.path.join(test_dir, 'POSCAR')
+        s = Poscar.from_file(filepath).structure
+        s.add_oxidation_state_by_element({"Li": 1, "Fe": 2,
+                                          "P": 5, "O": -2})
+        self.ewald = EwaldSummation(s)
+        self.matrix = self.ewald.total_energy_matrix
+
+    def get_energy(self, scaling):
+        return np.dot(scaling, np.dot(self.matrix, scaling))
+
+    def test_energy(self):
+        state = self.ewald.get_incremental_state()
+        self.assertAlmostEqual(state.energy, self.ewald.total_energy)
+        self.assertAlmostEqual(state.energy + state.get_remove_delta([0, 5]),
+                               self.ewald.compute_partial_energy([0, 5]))
+
+        scaling = np.ones(len(self.matrix))
+        moves = [("remove", [3]), ("update", [1, 7], [0.5, 0]),
+                 ("swap", 3, 4), ("swap", 1, 1), ("update", [8], 1.5)]
+        for move in moves:
+            new_scaling = scaling.copy()
+            if move[0] == "remove":
+                new_scaling[move[1]] = 0
+                delta = state.get_remove_delta(move[1])
+            elif move[0] == "update":
+                new_scaling[move[1]] = move[2]
+                delta = state.get_delta(move[1], move[2])
+            else:
+                i, j = move[1:]
+                new_scaling[[i, j]] = scaling[[j, i]]
+                delta = state.get_swap_delta(i, j)
+            expected = self.get_energy(new_scaling) - self.get_energy(scaling)
+            self.assertAlmostEqual(delta, expected)
+            self.assertAlmostEqual(getattr(state, move[0])(*move[1:]),
+                                   expected)
+            scaling = new_scaling
+            self.assertTrue(np.allclose(state.scaling, scaling))
+            self.assertAlmostEqual(state.energy, self.get_energy(scaling))
+        self.assertRaises(ValueError, state.get_delta, [1, 1], 0)
+
 
 class EwaldMinimizerTest(unittest.TestCase):
 
@@ -81,7 +170,10 @@ class EwaldMinimizerTest(unittest.TestCase):
 
         m_list = [[.9, 4, [1, 2, 3, 4, 8], 'a'], [-1, 2, [5, 6, 7], 'b']]
 
+        e_min_parallel = EwaldMinimizer(matrix, deepcopy(m_list), 50,
+                                        ncpus=2)
         e_min = EwaldMinimizer(matrix, m_list, 50)
+        self.assertEqual(e_min_parallel.output_lists, e_min.output_lists)
 
         self.assertEqual(len(e_min.output_lists), 15,
                          "Wrong number of permutations returned")
@@ -7,8 +7,10 @@ import os
 import json
 import numpy as np
 
+from pymatgen.analysis import structure_matcher
 from pymatgen.analysis.structure_matcher import StructureMatcher, \
-    ElementComparator, FrameworkComparator, OrderDisorderElementComparator
+    ElementComparator, FrameworkComparator, OrderDisorderElementComparator, \
+    _group_worker
 from monty.json import MontyDecoder
 from pymatgen.core.operations import SymmOp
 from pymatgen.core import Structure, Element, Lattice
@@ -269,6 +271,64 @@ class StructureMatcherTest(PymatgenTest):
         out = sm.group_structures(self.struct_list, anonymous=True)
         self.assertEqual(list(map(len, out)), [4, 1, 1, 1, 1, 1, 1, 1, 2, 2, 1])
 
+    def test_group_structures_prefilters(self):
+        sm = StructureMatcher()
+        s_list = self.struct_list + [s.copy() for s in self.struct_list]
+        for s in s_list[len(self.struct_list):]:
+            s.perturb(0.02)
+        get_inds = lambda groups: [[[x is s for x in s_list].index(True)
+                                    for s in g] for g in groups]
+        serial = get_inds(sm.group_structures(s_list, prefilters=[]))
+        self.assertEqual(get_inds(sm.group_structures(s_list)), serial)
+        self.assertEqual(
+            get_inds(sm.group_structures(s_list, prefilters=["nsites"])),
+            serial)
+        self.assertEqual(
+            get_inds(sm.group_structures(s_list, prefilters=["rdf"])),
+            serial)
+        self.assertEqual(get_inds(sm.group_structures(s_list, ncpus=2)),
+                         serial)
+        self.assertEqual(
+            get_inds(sm.group_structures(s_list, prefilters=["nsites"],
+                                         ncpus=2)),
+            serial)
+        #the worker state is only set in the worker processes
+        self.assertIsNone(_group_worker["matcher"])
+        self.assertRaises(ValueError, sm.group_structures, s_list,
+                          prefilters=["foo"])
+
+    def test_reduce_structures(self):
+        sm = StructureMatcher(cache_size=5)
+        reduced = sm.reduce_structures(self.struct_list[:8])
+        self.assertEqual(len(reduced), 8)
+        self.assertEqual(len(sm._reduced_cache), 5)
+        for s, r in zip(self.struct_list[:8], reduced):
+            self.assertAlmostEqual(s.volume / len(s), r.volume / len(r))
+        #Cached structures must not be modified by the rescaling in fit.
+        s = self.struct_list[7]
+        r1 = sm._get_reduced_structure(s)
+        self.assertTrue(sm.fit(s, self.struct_list[7]))
+        r2 = sm._get_reduced_structure(s)
+        self.assertArrayAlmostEqual(r1.lattice.matrix, r2.lattice.matrix)
+        self.assertIsNot(r1, r2)
+        #Modifying a structure in place invalidates its cache entry.
+        s2 = s.copy()
+        s2.replace_species({"Ti": "Zr"})
+        self.assertEqual(
+            sm._get_reduced_structure(s2).composition.reduced_formula, "ZrO2")
+        #Structures differing only in site properties are cached apart.
+        sm2 = StructureMatcher()
+        sm2._get_reduced_structure(s)
+        sm2._get_reduced_structure(
+            s.copy(site_properties={"charge": [1] * len(s)}))
+        self.assertEqual(len(sm2._reduced_cache), 2)
+        sm.clear_cache()
+        self.assertEqual(len(sm._reduced_cache), 0)
+        sm = StructureMatcher(cache_size=0)
+        self.assertEqual(len(sm.reduce_structures(self.struct_list)),
+                         len(self.struct_list))
+        self.assertEqual(len(sm._reduced_cache), 0)
+
     def test_mix(self):
         structures = [self.get_structure("Li2O"),
                       self.get_structure("Li2O2"),
@@ -496,6 +556,25 @@ class StructureMatcherTest(PymatgenTest):
         del s2[1]
         self.assertRaises(ValueError, sm.get_mapping, s2, s1)
 
+    def test_batched_translations(self):
+        sm = StructureMatcher(primitive_cell=False)
+        s1 = self.get_structure("Li2O")
+        s1.make_supercell(2)
+        s2 = s1.copy()
+        s2.perturb(0.1)
+        #8 candidate translations (the O sites), evaluated in one batch by
+        #default, one at a time and in batches of 3
+        rms = sm.get_rms_dist(s1, s2)
+        mapping = sm.get_mapping(s1, s2)
+        prev_threshold = structure_matcher.LOOP_THRESHOLD
+        try:
+            for threshold in [0, 3 * len(s1) ** 2 * 3]:
+                structure_matcher.LOOP_THRESHOLD = threshold
+                self.assertArrayAlmostEqual(sm.get_rms_dist(s1, s2), rms)
+                self.assertArrayEqual(sm.get_mapping(s1, s2), mapping)
+        finally:
+            structure_matcher.LOOP_THRESHOLD = prev_threshold
+
     def test_get_supercell_matrix(self):
         sm = StructureMatcher(ltol=0.1, stol=0.3, angle_tol=2,
                               primitive_cell=False, scale=True,
@@ -17,13 +17,15 @@ __date__ = "Mar 18, 2012"
 
 
 import os
+import io
 import json
+import time
 import logging
 
 from monty.io import zopen
 from monty.json import MontyEncoder, MontyDecoder
 
-from multiprocessing import Manager, Pool
+from multiprocessing import Pool
 
 logger = logging.getLogger("BorgQueen")
 
@@ -69,17 +71,113 @@ class BorgQueen(object):
         for (parent, subdirs, files) in os.walk(rootpath):
             valid_paths.extend(self._drone.get_valid_paths((parent, subdirs,
                                                             files)))
-        manager = Manager()
-        data = manager.list()
-        status = manager.dict()
-        status['count'] = 0
-        status['total'] = len(valid_paths)
-        logger.info('{} valid paths found.'.format(len(valid_paths)))
-        p = Pool(self._num_drones)
-        p.map(order_assimilation, ((path, self._drone, data, status)
-                                   for path in valid_paths))
-        for d in data:
-            self._data.append(json.loads(d, cls=MontyDecoder))
+        total = len(valid_paths)
+        logger.info('{} valid paths found.'.format(total))
+        p = Pool(self._num_drones, initializer=_init_drone,
+                 initargs=(self._drone,))
+        try:
+            count = 0
+            for path, d, error in p.imap_unordered(_assimilate_path,
+                                                   valid_paths):
+                if error:
+                    raise RuntimeError("Assimilation of {} failed: {}"
+                                       .format(path, error))
+                if d:
+                    self._data.append(json.loads(d, cls=MontyDecoder))
+                count += 1
+                logger.info('{}/{} ({:.2f}%) done'.format(
+                    count, total, count / total * 100))
+        except:
+            # Discards the paths still queued instead of assimilating them.
+            p.terminate()
+            raise
+        else:
+            p.close()
+        finally:
+            p.join()
+
+    def stream_assimilate(self, rootpath, filename, chunksize=1):
+        """
+        Assimilate the entire subdirectory structure in rootpath, writing
+        each result to a file as soon as it is available, instead of keeping
+        the data in memory until save_data. Uses number_of_drones processes.
+
+        The directory tree is walked while the drones work, and results are
+        appended to filename as line-delimited JSON, one
+        {"path": ..., "data": ...} document per assimilated path (data is
+        None for paths that the drone did not return anything for). Paths
+        already recorded in filename are skipped, so an interrupted run is
+        resumed by calling this method again with the same filename. Paths
+        for which the drone raised an exception are logged and not
+        recorded, so that they are retried on the next run.
+
+        Use load_data to load the assimilated data from the file.
+
+        Args:
+            rootpath (str): The root directory to start assimilation.
+            filename (str): File to write the results to.
+            chunksize (int): Number of paths sent to a drone at a time.
+                Larger values reduce the communication overhead for fast
+                drones. Defaults to 1.
+
+        Returns:
+            Number of paths newly assimilated.
+        """
+        done = set(r["path"] for r in _read_stream(filename))
+        if done:
+            logger.info('Skipping {} paths already assimilated.'
+                        .format(len(done)))
+
+        def get_valid_paths():
+            for (parent, subdirs, files) in os.walk(rootpath):
+                for path in self._drone.get_valid_paths((parent, subdirs,
+                                                         files)):
+                    if path not in done:
+                        yield path
+
+        p = None
+        if self._num_drones > 1:
+            p = Pool(self._num_drones, initializer=_init_drone,
+                     initargs=(self._drone,))
+            results = p.imap_unordered(_assimilate_path, get_valid_paths(),
+                                       chunksize)
+        else:
+            results = (_assimilate(self._drone, path)
+                       for path in get_valid_paths())
+
+        start = time.time()
+        count = 0
+        errors = 0
+        try:
+            with io.open(filename, "at") as f:
+                # Separates the records from a partially written last line of
+                # an interrupted run, which is skipped when reading.
+                if f.tell() > 0:
+                    f.write("\n")
+                for path, d, error in results:
+                    if error:
+                        errors += 1
+                        logger.error('Assimilation of {} failed: {}'
+                                     .format(path, error))
+                        continue
+                    f.write('{{"path": {}, "data": {}}}\n'.format(
+                        json.dumps(path), d if d else "null"))
+                    f.flush()
+                    count += 1
+                    elapsed = time.time() - start
+                    logger.info('{} done, {} failed ({:.2f} paths/s)'.format(
+                        count, errors, count / elapsed if elapsed else 0))
+        except:
+            if p:
+                p.terminate()
+            raise
+        else:
+            if p:
+                p.close()
+        finally:
+            if p:
+                p.join()
+        return count
 
     def serial_assimilate(self, rootpath):
         """
@@ -123,15 +221,73 @@ class BorgQueen(object):
 
     def load_data(self, filename):
         """
-        Load assimilated data from a file
+        Load assimilated data from a file, either saved with save_data or
+        written by stream_assimilate.
         """
         with zopen(filename, "r") as f:
-            self._data = json.load(f, cls=MontyDecoder)
+            first = f.read(1)
+        if first in ("[", b"["):
+            with zopen(filename, "r") as f:
+                self._data = json.load(f, cls=MontyDecoder)
+        else:
+            self._data = [r["data"] for r in _read_stream(filename,
+                                                          MontyDecoder)
+                          if r["data"] is not None]
+
+
+def _read_stream(filename, cls=None):
+    """
+    Yields the records of a line-delimited JSON file written by
+    BorgQueen.stream_assimilate, decoded with the JSONDecoder cls. Lines
+    which cannot be decoded, e.g. the partially written last line of an
+    interrupted run, are skipped.
+    """
+    if not os.path.exists(filename):
+        return
+    with io.open(filename, "rt") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line, cls=cls)
+            except ValueError:
+                logger.warning('Skipping undecodable line in {}'
+                               .format(filename))
+
+
+#Drone of a worker process, set once per process by the Pool initializer
+#instead of being sent with every path. It is never set in the parent
+#process.
+_worker_drone = {"drone": None}
+
+
+def _init_drone(drone):
+    _worker_drone["drone"] = drone
+
+
+def _assimilate_path(path):
+    return _assimilate(_worker_drone["drone"], path)
+
+
+def _assimilate(drone, path):
+    """
+    Internal helper method for BorgQueen to process assimilation. Returns
+    (path, JSON string of the data or None, error message or None).
+    """
+    try:
+        newdata = drone.assimilate(path)
+    except Exception as ex:
+        return path, None, "{}: {}".format(type(ex).__name__, ex)
+    if newdata:
+        return path, json.dumps(newdata, cls=MontyEncoder), None
+    return path, None, None
 
 
 def order_assimilation(args):
     """
-    Internal helper method for BorgQueen to process assimilation
+    Internal helper method for BorgQueen to process assimilation. No longer
+    used by BorgQueen, and kept for backwards compatibility.
     """
     (path, drone, data, status) = args
     newdata = drone.assimilate(path)
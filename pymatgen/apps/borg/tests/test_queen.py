@@ -16,9 +16,11 @@ __date__ = "Mar 18, 2012"
 
 import unittest
 import os
+import tempfile
+import shutil
 
 from pymatgen.apps.borg.hive import VaspToComputedEntryDrone
-from pymatgen.apps.borg.queen import BorgQueen
+from pymatgen.apps.borg.queen import BorgQueen, _worker_drone
 
 test_dir = os.path.join(os.path.dirname(__file__), "..", "..", "..", "..",
                         'test_files')
@@ -40,6 +42,27 @@ class BorgQueenTest(unittest.TestCase):
         queen.load_data(os.path.join(test_dir, "assimilated.json"))
         self.assertEqual(len(queen.get_data()), 1)
 
+    def test_stream_assimilate(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmp_dir, "assimilated.jsonl")
+            queen = BorgQueen(VaspToComputedEntryDrone())
+            self.assertEqual(queen.stream_assimilate(test_dir, filename), 2)
+            #resuming skips the paths already assimilated
+            self.assertEqual(queen.stream_assimilate(test_dir, filename), 0)
+            queen.load_data(filename)
+            self.assertEqual(len(queen.get_data()), 2)
+            #the same with a pool of drones
+            filename = os.path.join(tmp_dir, "assimilated2.jsonl")
+            queen = BorgQueen(VaspToComputedEntryDrone(), number_of_drones=2)
+            self.assertEqual(queen.stream_assimilate(test_dir, filename), 2)
+            self.assertEqual(queen.stream_assimilate(test_dir, filename), 0)
+            queen.load_data(filename)
+            self.assertEqual(len(queen.get_data()), 2)
+            self.assertIsNone(_worker_drone["drone"])
+        finally:
+            shutil.rmtree(tmp_dir)
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
@@ -20,12 +20,17 @@ import numbers
 import re
 import string
 
+from array import array
+
 import six
 from six.moves import filter, map, zip
 
 from fractions import gcd
 from functools import total_ordering
 from itertools import chain
+
+import numpy as np
+
 from pymatgen.core.periodic_table import get_el_sp, Element
 from pymatgen.util.string_utils import formula_double_format
 from pymatgen.serializers.json_coders import PMGSONable
@@ -48,6 +53,12 @@ class Composition(collections.Mapping, collections.Hashable, PMGSONable):
     __getitem__ is overridden to return 0 when an element is not found.
     (somewhat like a defaultdict, except it is immutable).
 
+    Internally, the species are stored as a tuple, with parallel compact
+    arrays of their atomic numbers and amounts. Arithmetic and comparisons
+    between compositions with the same species are done on the amount arrays
+    without any lookups, and the hash is computed once from the atomic
+    numbers.
+
     Also adds more convenience methods relevant to compositions, e.g.,
     get_fraction.
 
@@ -113,6 +124,10 @@ class Composition(collections.Mapping, collections.Hashable, PMGSONable):
                 ambiguity.
         """
         self.allow_negative = kwargs.pop('allow_negative', False)
+        if len(args) == 1 and not kwargs and \
+                isinstance(args[0], Composition):
+            self._init_arrays(args[0]._species, args[0]._amounts)
+            return
         if len(args) == 1 and isinstance(args[0], six.string_types):
             elmap = self._parse_formula(args[0])
         else:
@@ -123,16 +138,83 @@ class Composition(collections.Mapping, collections.Hashable, PMGSONable):
                                        "negative!")
             elif abs(v) < Composition.amount_tolerance:
                 del elmap[k]
-        self._elmap = {get_el_sp(k): v for k, v in elmap.items()}
-        self._natoms = sum(map(abs, self._elmap.values()))
+        elmap = {get_el_sp(k): v for k, v in elmap.items()}
+        self._init_arrays(list(elmap.keys()), list(elmap.values()))
+
+    def _init_arrays(self, species, amounts):
+        """
+        Sets up the composition from a sequence of distinct species and the
+        sequence of their amounts. Amounts within amount_tolerance of zero
+        are removed.
+        """
+        tol = Composition.amount_tolerance
+        amounts = array("d", amounts)
+        if not self.allow_negative and any(x < -tol for x in amounts):
+            raise CompositionError("Amounts in Composition cannot be "
+                                   "negative!")
+        if any(abs(x) < tol for x in amounts):
+            keep = [abs(x) >= tol for x in amounts]
+            species = [sp for sp, k in zip(species, keep) if k]
+            amounts = array("d", [x for x, k in zip(amounts, keep) if k])
+        self._species = tuple(species)
+        self._amounts = amounts
+        self._zs = array("i", [sp.Z for sp in self._species])
+        self._natoms = sum(map(abs, amounts))
+        #Since Composition is immutable, the hash is computed once, and the
+        #derived forms are cached on first use.
+        self._hash = sum(self._zs)
+        self._fractional = None
+        self._reduced_formula_and_factor = None
+
+    @staticmethod
+    def _from_arrays(species, amounts, allow_negative=False):
+        """
+        Creates a Composition from a sequence of distinct Element/Specie
+        objects and the sequence of their amounts, without parsing.
+        """
+        comp = Composition.__new__(Composition)
+        comp.allow_negative = allow_negative
+        comp._init_arrays(species, amounts)
+        return comp
+
+    def _get_amounts_of(self, other):
+        """
+        Returns the amounts of another Composition in the order of the
+        species of self, or None if they do not have the same species.
+        """
+        if self._species == other._species:
+            return other._amounts
+        if len(self._species) != len(other._species) or \
+                self._hash != other._hash:
+            return None
+        try:
+            return [other._amounts[other._species.index(sp)]
+                    for sp in self._species]
+        except ValueError:
+            return None
 
     def __getitem__(self, el):
         """
         Get the amount for element.
         """
-        return self._elmap.get(get_el_sp(el), 0)
+        sp = get_el_sp(el)
+        try:
+            i = self._zs.index(sp.Z)
+            #Different species of the same element (e.g., Fe2+ and Fe3+)
+            #share an atomic number.
+            if self._species[i] is not sp and self._species[i] != sp:
+                i = self._species.index(sp)
+        except ValueError:
+            return 0
+        return self._amounts[i]
 
     def __eq__(self, other):
+        if isinstance(other, Composition):
+            amounts = self._get_amounts_of(other)
+            if amounts is not None:
+                tol = Composition.amount_tolerance
+                return all(abs(x - y) <= tol
+                           for x, y in zip(self._amounts, amounts))
         for el in chain(self.elements, other.elements):
             if abs(self[el] - other[el]) > Composition.amount_tolerance:
                 return False
@@ -153,16 +235,34 @@ class Composition(collections.Mapping, collections.Hashable, PMGSONable):
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def _combine(self, other, sign):
+        """
+        Returns self + sign * other.
+        """
+        if isinstance(other, Composition):
+            amounts = self._get_amounts_of(other)
+            if amounts is not None:
+                return Composition._from_arrays(
+                    self._species,
+                    [x + sign * y for x, y in zip(self._amounts, amounts)],
+                    self.allow_negative)
+        species = list(self._species)
+        amounts = self._amounts.tolist()
+        for k, v in other.items():
+            k = get_el_sp(k)
+            try:
+                amounts[species.index(k)] += sign * v
+            except ValueError:
+                species.append(k)
+                amounts.append(sign * v)
+        return Composition._from_arrays(species, amounts, self.allow_negative)
+
     def __add__(self, other):
         """
         Adds two compositions. For example, an Fe2O3 composition + an FeO
         composition gives a Fe3O4 composition.
         """
-        new_el_map = collections.defaultdict(float)
-        new_el_map.update(self)
-        for k, v in other.items():
-            new_el_map[get_el_sp(k)] += v
-        return Composition(new_el_map, allow_negative=self.allow_negative)
+        return self._combine(other, 1)
 
     def __sub__(self, other):
         """
@@ -174,11 +274,7 @@ class Composition(collections.Mapping, collections.Hashable, PMGSONable):
             original composition in any of its elements, unless allow_negative
             is True
         """
-        new_el_map = collections.defaultdict(float)
-        new_el_map.update(self)
-        for k, v in other.items():
-            new_el_map[get_el_sp(k)] -= v
-        return Composition(new_el_map, allow_negative=self.allow_negative)
+        return self._combine(other, -1)
 
     def __mul__(self, other):
         """
@@ -187,39 +283,44 @@ class Composition(collections.Mapping, collections.Hashable, PMGSONable):
         """
         if not isinstance(other, numbers.Number):
             return NotImplemented
-        return Composition({el: self[el] * other for el in self},
-                           allow_negative=self.allow_negative)
+        return Composition._from_arrays(
+            self._species, [x * other for x in self._amounts],
+            self.allow_negative)
 
     __rmul__ = __mul__
 
     def __truediv__(self, other):
         if not isinstance(other, numbers.Number):
             return NotImplemented
-        return Composition({el: self[el] / other for el in self},
-                           allow_negative=self.allow_negative)
+        return Composition._from_arrays(
+            self._species, [x / other for x in self._amounts],
+            self.allow_negative)
 
     def __hash__(self):
         """
         Minimally effective hash function that just distinguishes between
         Compositions with different elements.
         """
-        hashcode = 0
-        for el in self._elmap.keys():
-            hashcode += el.Z
-        return hashcode
+        return self._hash
 
     def __contains__(self, el):
-        return el in self._elmap
+        return el in self._species
 
     def __len__(self):
-        return len(self._elmap)
+        return len(self._species)
 
     def __iter__(self):
-        return self._elmap.__iter__()
+        return iter(self._species)
+
+    def items(self):
+        return list(zip(self._species, self._amounts))
+
+    def values(self):
+        return self._amounts.tolist()
 
     @property
     def average_electroneg(self):
-        return sum((el.X * abs(amt) for el, amt in self._elmap.items())) / \
+        return sum((el.X * abs(amt) for el, amt in self.items())) / \
             self.num_atoms
 
     def almost_equals(self, other, rtol=0.1, atol=1e-8):
@@ -231,8 +332,12 @@ class Composition(collections.Mapping, collections.Hashable, PMGSONable):
             rtol (float): Relative tolerance
             atol (float): Absolute tolerance
         """
-        sps = set(self.elements + other.elements)
-        for sp in sps:
+        amounts = self._get_amounts_of(other) \
+            if isinstance(other, Composition) else None
+        if amounts is not None:
+            return all(abs(b - a) <= atol + rtol * (abs(a) + abs(b)) / 2
+                       for a, b in zip(self._amounts, amounts))
+        for sp in set(chain(self, other)):
             a = self[sp]
             b = other[sp]
             tol = atol + rtol * (abs(a) + abs(b)) / 2
@@ -245,10 +350,11 @@ class Composition(collections.Mapping, collections.Hashable, PMGSONable):
         """
         True if composition is for an element.
         """
-        return len(self._elmap) == 1
+        return len(self._species) == 1
 
     def copy(self):
-        return Composition(self._elmap, allow_negative=self.allow_negative)
+        return Composition._from_arrays(self._species, self._amounts,
+                                        self.allow_negative)
 
     @property
     def formula(self):
@@ -290,7 +396,9 @@ class Composition(collections.Mapping, collections.Hashable, PMGSONable):
         Returns:
             Normalized composition which the number of species sum to 1.
         """
-        return self / self._natoms
+        if self._fractional is None:
+            self._fractional = self / self._natoms
+        return self._fractional
 
     @property
     def reduced_composition(self):
@@ -320,17 +428,21 @@ class Composition(collections.Mapping, collections.Hashable, PMGSONable):
             A pretty normalized formula and a multiplicative factor, i.e.,
             Li4Fe4P4O16 returns (LiFePO4, 4).
         """
-        all_int = all([x == int(x) for x in self._elmap.values()])
-        if not all_int:
-            return self.formula.replace(" ", ""), 1
-        d = self.get_el_amt_dict()
-        (formula, factor) = reduce_formula(d)
+        if self._reduced_formula_and_factor is None:
+            all_int = all([x == int(x) for x in self._amounts])
+            if not all_int:
+                self._reduced_formula_and_factor = \
+                    self.formula.replace(" ", ""), 1
+            else:
+                d = self.get_el_amt_dict()
+                (formula, factor) = reduce_formula(d)
 
-        if formula in Composition.special_formulas:
-            formula = Composition.special_formulas[formula]
-            factor /= 2
+                if formula in Composition.special_formulas:
+                    formula = Composition.special_formulas[formula]
+                    factor /= 2
+                self._reduced_formula_and_factor = formula, factor
 
-        return formula, factor
+        return self._reduced_formula_and_factor
 
     @property
     def reduced_formula(self):
@@ -345,7 +457,7 @@ class Composition(collections.Mapping, collections.Hashable, PMGSONable):
         """
         Returns view of elements in Composition.
         """
-        return list(self._elmap.keys())
+        return list(self._species)
 
     def __str__(self):
         return " ".join([
@@ -367,7 +479,7 @@ class Composition(collections.Mapping, collections.Hashable, PMGSONable):
         Total molecular weight of Composition
         """
         return sum([amount * el.atomic_mass
-                    for el, amount in self._elmap.items()])
+                    for el, amount in self.items()])
 
     def get_atomic_fraction(self, el):
         """
@@ -753,6 +865,82 @@ def reduce_formula(sym_amt):
     return reduced_form, factor
 
 
+class CompositionMatrix(object):
+    """
+    Dense matrix representation of a list of compositions, with one row per
+    composition and one column per element (or specie). Useful for doing
+    arithmetic on many compositions at once, e.g., getting the atomic
+    fractions of all entries of a phase diagram.
+
+    .. attribute:: elements
+
+        List of elements/species corresponding to the columns.
+
+    .. attribute:: amounts
+
+        NxM array of the amounts of each element in each composition.
+
+    .. attribute:: num_atoms
+
+        Array of the total number of atoms of each composition. This
+        includes the elements which are not in the columns.
+    """
+
+    def __init__(self, compositions, elements=None):
+        """
+        Args:
+            compositions ([Composition]): List of compositions.
+            elements ([Element/Specie]): Elements/species of the columns,
+                which are looked up in the compositions as by
+                Composition.__getitem__. Defaults to None, which means all
+                elements/species in the compositions, sorted.
+        """
+        compositions = list(compositions)
+        if elements is None:
+            elements = sorted(set(chain.from_iterable(
+                c.keys() for c in compositions)))
+        self.elements = [get_el_sp(el) for el in elements]
+        columns = {el: j for j, el in enumerate(self.elements)}
+
+        rows, cols, amts = [], [], []
+        for i, comp in enumerate(compositions):
+            for el, amt in comp.items():
+                j = columns.get(el)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+                    amts.append(amt)
+        self.amounts = np.zeros((len(compositions), len(self.elements)))
+        self.amounts[rows, cols] = amts
+        self.num_atoms = np.array([c.num_atoms for c in compositions],
+                                  dtype=float)
+
+    def __len__(self):
+        return len(self.amounts)
+
+    @property
+    def atomic_fractions(self):
+        """
+        NxM array of the atomic fractions of each element in each
+        composition, as given by Composition.get_atomic_fraction.
+        """
+        return np.abs(self.amounts) / self.num_atoms[:, None]
+
+    @property
+    def fractional_amounts(self):
+        """
+        NxM array of the amounts of the fractional compositions, as given by
+        Composition.fractional_composition.
+        """
+        return self.amounts / self.num_atoms[:, None]
+
+    def get_column(self, el):
+        """
+        Index of the column of an element/specie.
+        """
+        return self.elements.index(get_el_sp(el))
+
+
 class CompositionError(Exception):
     """Exception class for composition errors"""
     pass
@@ -28,6 +28,7 @@ from pyhull.voronoi import VoronoiTess
 
 from pymatgen.serializers.json_coders import PMGSONable
 from pymatgen.util.num_utils import abs_cap
+from pymatgen.core.neighbors import find_neighbors, iter_neighbors
 from pymatgen.core.units import ArrayWithUnit
 
 
@@ -847,67 +848,72 @@ class Lattice(PMGSONable):
         """
         return np.sqrt(self.dot(coords, coords, frac_coords=frac_coords))
 
-    def get_points_in_sphere(self, frac_points, center, r):
+    def get_points_in_sphere(self, frac_points, center, r, zip_results=True,
+                             engine=None, max_memory=None):
         """
         Find all points within a sphere from the point taking into account
         periodic boundary conditions. This includes sites in other periodic
-        images.
-
-        Algorithm:
-
-        1. place sphere of radius r in crystal and determine minimum supercell
-           (parallelpiped) which would contain a sphere of radius r. for this
-           we need the projection of a_1 on a unit vector perpendicular
-           to a_2 & a_3 (i.e. the unit vector in the direction b_1) to
-           determine how many a_1"s it will take to contain the sphere.
-
-           Nxmax = r * length_of_b_1 / (2 Pi)
-
-        2. keep points falling within r.
+        images. The search is performed with a neighbor list engine (see
+        pymatgen.core.neighbors).
 
         Args:
             frac_points: All points in the lattice in fractional coordinates.
             center: Cartesian coordinates of center of sphere.
             r: radius of sphere.
+            zip_results (bool): Whether to zip the results together to group
+                by point, or return the raw fcoords, dists, indices and
+                images as separate numpy arrays. Defaults to True. Use
+                False to avoid creating a tuple per point.
+            engine: Neighbor list engine name or instance. Defaults to None,
+                which uses the default engine.
+            max_memory (int): Approximate memory budget in bytes for the
+                temporary arrays used to generate periodic images. Points are
+                processed in blocks to stay within this budget. Defaults to
+                None, which uses pymatgen.core.neighbors.DEFAULT_MAX_MEMORY.
 
         Returns:
-            [(fcoord, dist) ...] since most of the time, subsequent processing
-            requires the distance.
-        """
-        recp_len = np.array(self.reciprocal_lattice.abc)
-        sr = r + 0.15
-        nmax = sr * recp_len / (2 * math.pi)
-        pcoords = self.get_fractional_coords(center)
-        floor = math.floor
-
-        n = len(frac_points)
-        fcoords = np.array(frac_points)
-        pts = np.tile(center, (n, 1))
-        indices = np.array(list(range(n)))
-
-        arange = np.arange(start=int(floor(pcoords[0] - nmax[0])),
-                           stop=int(floor(pcoords[0] + nmax[0])) + 1)
-        brange = np.arange(start=int(floor(pcoords[1] - nmax[1])),
-                           stop=int(floor(pcoords[1] + nmax[1])) + 1)
-        crange = np.arange(start=int(floor(pcoords[2] - nmax[2])),
-                           stop=int(floor(pcoords[2] + nmax[2])) + 1)
-
-        arange = arange[:, None] * np.array([1, 0, 0])[None, :]
-        brange = brange[:, None] * np.array([0, 1, 0])[None, :]
-        crange = crange[:, None] * np.array([0, 0, 1])[None, :]
-
-        images = arange[:, None, None] + brange[None, :, None] +\
-            crange[None, None, :]
+            if zip_results:
+                [(fcoord, dist, index) ...] since most of the time, subsequent
+                processing requires the distance.
+            else:
+                fcoords, dists, inds, images. fcoords are given by
+                frac_points[inds] + images.
+        """
+        fcoords = np.reshape(np.array(frac_points, dtype=np.float64), (-1, 3))
+        c_inds, inds, images, dists = find_neighbors(
+            self, fcoords, [center], r, engine=engine, max_memory=max_memory)
+        shifted_coords = fcoords[inds] + images
+        if zip_results:
+            return list(zip(shifted_coords, dists, inds))
+        return shifted_coords, dists, inds, images
+
+    def iter_points_in_sphere(self, frac_points, center, r, engine=None,
+                              max_memory=None):
+        """
+        Streaming version of get_points_in_sphere(zip_results=False). The
+        frac_points are processed in blocks such that peak memory usage is
+        bounded by max_memory instead of growing with the number of points
+        times the number of periodic images, which makes it suitable for
+        very large point sets such as all grid points of a CHGCAR.
 
-        shifted_coords = fcoords[:, None, None, None, :] + \
-            images[None, :, :, :, :]
-        coords = self.get_cartesian_coords(shifted_coords)
-        dists = np.sqrt(np.sum((coords - pts[:, None, None, None, :]) ** 2,
-                               axis=4))
-        within_r = np.where(dists <= r)
+        Args:
+            frac_points: All points in the lattice in fractional coordinates.
+            center: Cartesian coordinates of center of sphere.
+            r: radius of sphere.
+            engine: Neighbor list engine name or instance. Defaults to None,
+                which uses the default engine.
+            max_memory (int): Approximate memory budget in bytes. Defaults
+                to None, which uses pymatgen.core.neighbors.DEFAULT_MAX_MEMORY.
 
-        return list(zip(shifted_coords[within_r], dists[within_r],
-                        indices[within_r[0]]))
+        Yields:
+            fcoords, dists, inds, images for each block of points, in order
+            of increasing point index.
+        """
+        fcoords = np.reshape(np.array(frac_points, dtype=np.float64), (-1, 3))
+        for c_inds, inds, images, dists in iter_neighbors(
+                self, fcoords, [center], r, engine=engine,
+                max_memory=max_memory):
+            yield fcoords[inds] + images, dists, inds, images
 
     def get_all_distances(self, fcoords1, fcoords2):
         """
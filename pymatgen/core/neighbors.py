@@ -0,0 +1,336 @@
+# coding: utf-8
+
+from __future__ import division, unicode_literals
+
+"""
+This module implements neighbor list engines for periodic systems. Given a
+lattice, a set of points in fractional coordinates and a set of sphere
+centers, an engine finds all periodic images of the points lying within a
+sphere of radius r around each center. Results are returned as compact numpy
+arrays (center index, point index, image, distance) instead of site objects,
+and the search scales linearly with the number of points.
+"""
+
+
+__author__ = "Shyue Ping Ong"
+__copyright__ = "Copyright 2015, The Materials Project"
+__version__ = "1.0"
+__maintainer__ = "Shyue Ping Ong"
+__email__ = "shyuep@gmail.com"
+__date__ = "Apr 30, 2015"
+
+
+import itertools
+from abc import ABCMeta, abstractmethod
+
+import six
+
+import numpy as np
+
+
+#Numerical padding (in Angstrom) added to the search radius when generating
+#periodic images, to guard against round-off at the cell boundaries.
+_PADDING = 1e-5
+
+#Default approximate memory budget (in bytes) for the temporary arrays used
+#to generate periodic images of points.
+DEFAULT_MAX_MEMORY = 2 ** 27
+
+
+class NeighborListEngine(six.with_metaclass(ABCMeta, object)):
+    """
+    Abstract base class for a periodic neighbor list engine. Subclasses only
+    need to implement _find_pairs, which operates on cartesian coordinates
+    of the periodic images generated by find_neighbors.
+    """
+
+    def find_neighbors(self, lattice, frac_points, center_coords, r,
+                       max_memory=None):
+        """
+        Finds all periodic images of frac_points within a distance r of each
+        of the center_coords.
+
+        Args:
+            lattice (Lattice): Lattice defining the periodicity.
+            frac_points: Nx3 array of points in fractional coordinates.
+            center_coords: Mx3 array of sphere centers in cartesian
+                coordinates.
+            r (float): Radius of sphere.
+            max_memory (int): Approximate upper bound in bytes on the
+                temporary arrays used to generate periodic images. Defaults
+                to None, which uses DEFAULT_MAX_MEMORY. See iter_neighbors.
+
+        Returns:
+            (center_indices, point_indices, images, distances), where
+            images is an integer array of lattice translations such that
+            the fractional coordinates of each neighbor are given by
+            frac_points[point_indices] + images. The returned pairs are
+            sorted by center index, then point index, then image.
+        """
+        blocks = list(self.iter_neighbors(lattice, frac_points, center_coords,
+                                          r, max_memory=max_memory))
+        if not blocks:
+            return _empty_neighbor_list()
+        if len(blocks) == 1:
+            return blocks[0]
+        c_inds, p_inds, images, dists = [np.concatenate(a)
+                                         for a in zip(*blocks)]
+        order = np.lexsort((images[:, 2], images[:, 1], images[:, 0],
+                            p_inds, c_inds))
+        return c_inds[order], p_inds[order], images[order], dists[order]
+
+    def iter_neighbors(self, lattice, frac_points, center_coords, r,
+                       max_memory=None):
+        """
+        Generator version of find_neighbors, which processes frac_points in
+        blocks so that peak memory usage is bounded by max_memory rather
+        than scaling with the total number of points times the number of
+        periodic images. Useful for very large sets of points, e.g., all
+        grid points of a CHGCAR.
+
+        Only the slabs of periodic images that can intersect a sphere are
+        generated, i.e., for a single center, images are restricted to
+        those within r of that center rather than of the whole unit cell.
+
+        Args:
+            lattice (Lattice): Lattice defining the periodicity.
+            frac_points: Nx3 array of points in fractional coordinates.
+            center_coords: Mx3 array of sphere centers in cartesian
+                coordinates.
+            r (float): Radius of sphere.
+            max_memory (int): Approximate upper bound in bytes on the
+                temporary arrays used to generate periodic images. Defaults
+                to None, which uses DEFAULT_MAX_MEMORY.
+
+        Yields:
+            (center_indices, point_indices, images, distances) for each
+            block of points, in the same format as find_neighbors. Pairs
+            are sorted within each block, and blocks are yielded in order
+            of increasing point index.
+        """
+        fcoords = np.reshape(np.array(frac_points, dtype=np.float64), (-1, 3))
+        centers = np.reshape(np.array(center_coords, dtype=np.float64),
+                             (-1, 3))
+        if len(fcoords) == 0 or len(centers) == 0 or r < 0:
+            return
+
+        # Work with all points and centers translated into the unit cell and
+        # keep track of the integer offsets so that images can be reported
+        # relative to the original coordinates.
+        center_fcoords = lattice.get_fractional_coords(centers)
+        center_shifts = np.floor(center_fcoords)
+        center_fcoords -= center_shifts
+        wrapped_centers = lattice.get_cartesian_coords(center_fcoords)
+
+        # Only points within r of a center are needed. The padding in
+        # fractional units is r divided by the interplanar spacing in each
+        # direction. Image slabs that do not intersect the padded bounding
+        # box of the centers are pruned.
+        recp_len = np.array(lattice.reciprocal_lattice_crystallographic.abc)
+        pad = (r + _PADDING) * recp_len
+        lower = np.min(center_fcoords, axis=0) - pad
+        upper = np.max(center_fcoords, axis=0) + pad
+        images = np.array(list(itertools.product(
+            *[range(int(np.floor(l)), int(np.floor(u)) + 1)
+              for l, u in zip(lower, upper)])), dtype=np.float64)
+
+        max_memory = max_memory or DEFAULT_MAX_MEMORY
+        #Each point requires 3 float64 coordinates and one boolean per image
+        #for the image generation and filtering.
+        chunk_size = max(int(max_memory // (len(images) * 25)), 1)
+
+        for start in range(0, len(fcoords), chunk_size):
+            chunk = fcoords[start:start + chunk_size]
+            point_shifts = np.floor(chunk)
+            image_fcoords = (chunk - point_shifts)[:, None, :] + images
+            within = np.all((image_fcoords >= lower) &
+                            (image_fcoords <= upper), axis=-1)
+            p_inds, i_inds = np.nonzero(within)
+            if len(p_inds) == 0:
+                continue
+            image_coords = lattice.get_cartesian_coords(image_fcoords[within])
+            del image_fcoords, within
+
+            c_inds, j = self._find_pairs(image_coords, wrapped_centers, r)
+            dists = np.sqrt(np.sum((image_coords[j] -
+                                    wrapped_centers[c_inds]) ** 2, axis=-1))
+            keep = dists <= r
+            c_inds, j, dists = c_inds[keep], j[keep], dists[keep]
+            if len(dists) == 0:
+                continue
+            p_inds, i_inds = p_inds[j], i_inds[j]
+            out_images = images[i_inds] + center_shifts[c_inds] - \
+                point_shifts[p_inds]
+            out_images = out_images.astype(int)
+            order = np.lexsort((out_images[:, 2], out_images[:, 1],
+                                out_images[:, 0], p_inds, c_inds))
+            yield c_inds[order], p_inds[order] + start, out_images[order], \
+                dists[order]
+
+    @abstractmethod
+    def _find_pairs(self, points, centers, r):
+        """
+        Finds candidate (center, point) pairs within r in cartesian space.
+        Candidates may include pairs beyond r, which are filtered out
+        afterwards, but must not miss any pair within r.
+
+        Args:
+            points: Nx3 array of cartesian coordinates.
+            centers: Mx3 array of cartesian coordinates.
+            r (float): Radius of sphere.
+
+        Returns:
+            (center_indices, point_indices) as integer arrays.
+        """
+        return
+
+
+class CellListEngine(NeighborListEngine):
+    """
+    Neighbor list engine based on binning points into a grid of cubic cells
+    with edge length >= r. Only points in the 27 cells surrounding each
+    center are considered. Fully vectorized in numpy; no external
+    dependencies.
+    """
+
+    def _find_pairs(self, points, centers, r):
+        allc = np.concatenate([points, centers])
+        cmin = np.min(allc, axis=0)
+        extent = np.max(allc, axis=0) - cmin
+        binsize = max(r, _PADDING)
+        nbins = np.maximum(np.floor(extent / binsize), 1).astype(np.int64)
+        binsize = np.maximum(extent / nbins, binsize)
+
+        def get_bins(coords):
+            b = np.floor((coords - cmin) / binsize).astype(np.int64)
+            return np.minimum(np.maximum(b, 0), nbins - 1)
+
+        def linear_index(b):
+            return b[:, 0] + nbins[0] * (b[:, 1] + nbins[1] * b[:, 2])
+
+        pbins = linear_index(get_bins(points))
+        sort_inds = np.argsort(pbins, kind="mergesort")
+        sorted_bins = pbins[sort_inds]
+        cbins = get_bins(centers)
+
+        all_c = []
+        all_p = []
+        for offset in itertools.product((-1, 0, 1), repeat=3):
+            nb = cbins + offset
+            valid = np.all((nb >= 0) & (nb < nbins), axis=1)
+            c_inds = np.nonzero(valid)[0]
+            lin = linear_index(nb[valid])
+            start = np.searchsorted(sorted_bins, lin, side="left")
+            end = np.searchsorted(sorted_bins, lin, side="right")
+            counts = end - start
+            total = np.sum(counts)
+            if total == 0:
+                continue
+            all_c.append(np.repeat(c_inds, counts))
+            offsets = np.cumsum(counts) - counts
+            pos = np.arange(total) - np.repeat(offsets - start, counts)
+            all_p.append(sort_inds[pos])
+        if not all_c:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        return np.concatenate(all_c), np.concatenate(all_p)
+
+
+class KDTreeEngine(NeighborListEngine):
+    """
+    Neighbor list engine based on scipy's cKDTree built over the periodic
+    images of the points.
+    """
+
+    def _find_pairs(self, points, centers, r):
+        from scipy.spatial import cKDTree
+        tree = cKDTree(points)
+        found = tree.query_ball_point(centers, r + _PADDING)
+        counts = np.array([len(f) for f in found], dtype=int)
+        if np.sum(counts) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        c_inds = np.repeat(np.arange(len(centers)), counts)
+        p_inds = np.concatenate([f for f in found if f]).astype(int)
+        return c_inds, p_inds
+
+
+#Registry of available engines. Additional engines can be registered by
+#adding a NeighborListEngine subclass to this dict.
+NEIGHBOR_LIST_ENGINES = {
+    "cell_list": CellListEngine,
+    "kdtree": KDTreeEngine
+}
+
+DEFAULT_ENGINE = "cell_list"
+
+
+def get_neighbor_list_engine(engine=None):
+    """
+    Returns a neighbor list engine.
+
+    Args:
+        engine: Either a NeighborListEngine instance, or the name of a
+            registered engine (see NEIGHBOR_LIST_ENGINES). Defaults to None,
+            which uses DEFAULT_ENGINE.
+
+    Returns:
+        NeighborListEngine
+    """
+    if isinstance(engine, NeighborListEngine):
+        return engine
+    name = engine or DEFAULT_ENGINE
+    if name not in NEIGHBOR_LIST_ENGINES:
+        raise ValueError("Unknown neighbor list engine %s. Available engines "
+                         "are %s" % (name, list(NEIGHBOR_LIST_ENGINES.keys())))
+    return NEIGHBOR_LIST_ENGINES[name]()
+
+
+def find_neighbors(lattice, frac_points, center_coords, r, engine=None,
+                   max_memory=None):
+    """
+    Convenience function to find all periodic images of frac_points within a
+    distance r of center_coords. See NeighborListEngine.find_neighbors.
+
+    Args:
+        lattice (Lattice): Lattice defining the periodicity.
+        frac_points: Nx3 array of points in fractional coordinates.
+        center_coords: Mx3 array of sphere centers in cartesian coordinates.
+        r (float): Radius of sphere.
+        engine: Neighbor list engine name or instance. Defaults to None,
+            which uses DEFAULT_ENGINE.
+        max_memory (int): Approximate memory budget in bytes for temporary
+            arrays. Defaults to None, which uses DEFAULT_MAX_MEMORY.
+
+    Returns:
+        (center_indices, point_indices, images, distances)
+    """
+    return get_neighbor_list_engine(engine).find_neighbors(
+        lattice, frac_points, center_coords, r, max_memory=max_memory)
+
+
+def iter_neighbors(lattice, frac_points, center_coords, r, engine=None,
+                   max_memory=None):
+    """
+    Convenience function to iterate over blocks of periodic images of
+    frac_points within a distance r of center_coords, with bounded memory
+    usage. See NeighborListEngine.iter_neighbors.
+
+    Args:
+        lattice (Lattice): Lattice defining the periodicity.
+        frac_points: Nx3 array of points in fractional coordinates.
+        center_coords: Mx3 array of sphere centers in cartesian coordinates.
+        r (float): Radius of sphere.
+        engine: Neighbor list engine name or instance. Defaults to None,
+            which uses DEFAULT_ENGINE.
+        max_memory (int): Approximate memory budget in bytes for temporary
+            arrays. Defaults to None, which uses DEFAULT_MAX_MEMORY.
+
+    Yields:
+        (center_indices, point_indices, images, distances) for each block.
+    """
+    return get_neighbor_list_engine(engine).iter_neighbors(
+        lattice, frac_points, center_coords, r, max_memory=max_memory)
+
+
+def _empty_neighbor_list():
+    return np.zeros(0, dtype=int), np.zeros(0, dtype=int), \
+        np.zeros((0, 3), dtype=int), np.zeros(0)
@@ -21,6 +21,8 @@ import re
 import json
 from io import open
 
+import numpy as np
+
 from pymatgen.core.units import Mass, Length, unitized
 from monty.design_patterns import singleton, cached_class
 from pymatgen.util.string_utils import formula_double_format
@@ -86,6 +88,114 @@ def char2l(char):
 ALL_ELEMENT_SYMBOLS = set(_pt_data.keys())
 
 
+def _row_from_Z(Z):
+    """
+    Returns the periodic table row of the element with atomic number Z.
+    """
+    total = 0
+    if 57 <= Z <= 70:
+        return 8
+    elif 89 <= Z <= 102:
+        return 9
+
+    for i in range(len(_pt_row_sizes)):
+        total += _pt_row_sizes[i]
+        if total >= Z:
+            return i + 1
+    return 8
+
+
+def _group_from_Z(Z):
+    """
+    Returns the periodic table group of the element with atomic number Z.
+    """
+    if Z == 1:
+        return 1
+    if Z == 2:
+        return 18
+    if 3 <= Z <= 18:
+        if (Z - 2) % 8 == 0:
+            return 18
+        elif (Z - 2) % 8 <= 2:
+            return (Z - 2) % 8
+        else:
+            return 10 + (Z - 2) % 8
+
+    if 19 <= Z <= 54:
+        if (Z - 18) % 18 == 0:
+            return 18
+        else:
+            return (Z - 18) % 18
+
+    if (Z - 54) % 32 == 0:
+        return 18
+    elif (Z - 54) % 32 >= 17:
+        return (Z - 54) % 32 - 14
+    else:
+        return (Z - 54) % 32
+
+
+def _make_property_table():
+    """
+    Builds arrays of element properties indexed by atomic number. Missing
+    values are represented as for the Element properties, except for the
+    atomic radius, which is nan if missing.
+    """
+    table = {k: np.zeros(_MAXZ) for k in
+             ("X", "atomic_mass", "atomic_radius", "average_ionic_radius",
+              "min_oxidation_state", "max_oxidation_state")}
+    table["row"] = np.zeros(_MAXZ, dtype=int)
+    table["group"] = np.zeros(_MAXZ, dtype=int)
+    table["atomic_radius"][:] = np.nan
+    for data in _pt_data.values():
+        z = data["Atomic no"]
+        table["X"][z] = data.get("X", 0)
+        table["atomic_mass"][z] = data["Atomic mass"]
+        if not str(data.get("Atomic radius",
+                            "no data")).startswith("no data"):
+            table["atomic_radius"][z] = data["Atomic radius"]
+        radii = data.get("Ionic radii", {})
+        if radii:
+            table["average_ionic_radius"][z] = sum(radii.values()) / \
+                len(radii)
+        oxi_states = data.get("Oxidation states", [])
+        if oxi_states:
+            table["min_oxidation_state"][z] = min(oxi_states)
+            table["max_oxidation_state"][z] = max(oxi_states)
+        table["row"][z] = _row_from_Z(z)
+        table["group"][z] = _group_from_Z(z)
+    for v in table.values():
+        v.flags.writeable = False
+    return table
+
+_pt_table = _make_property_table()
+
+
+def get_element_properties(z, name):
+    """
+    Vectorized lookup of an element property by atomic number, e.g. for
+    getting the electronegativities of many sites or compositions at once.
+
+    Args:
+        z (int/array): Atomic number or array of atomic numbers.
+        name (str): Name of the property. One of "X", "atomic_mass",
+            "atomic_radius", "average_ionic_radius", "min_oxidation_state",
+            "max_oxidation_state", "row" and "group". Values are in the
+            units of the Element properties (amu, ang), without the units
+            attached.
+
+    Returns:
+        Numpy array of values of the same shape as z. Missing values are 0,
+        as for the Element properties, except for the atomic radius, which
+        is nan if missing.
+    """
+    try:
+        table = _pt_table[name]
+    except KeyError:
+        raise ValueError("Unsupported element property %s" % name)
+    return table[np.asarray(z, dtype=int)]
+
+
 @cached_class
 @total_ordering
 class Element(object):
@@ -321,6 +431,11 @@ class Element(object):
         #Store key variables for quick access
         self._z = self._data["Atomic no"]
         self._x = self._data.get("X", 0)
+        self._row = int(_pt_table["row"][self._z])
+        self._group = int(_pt_table["group"][self._z])
+        self._ionic_radii = {int(k): v for k, v in
+                             self._data.get("Ionic radii", {}).items()}
+        self._full_electronic_structure = None
         for a in ["name", "mendeleev_no", "electrical_resistivity",
                   "velocity_of_sound", "reflectivity",
                   "refractive_index", "poissons_ratio", "molar_volume",
@@ -367,11 +482,7 @@ class Element(object):
         Average ionic radius for element (with units). The average is taken
         over all oxidation states of the element for which data is present.
         """
-        if "Ionic radii" in self._data:
-            radii = self._data["Ionic radii"]
-            return sum(radii.values()) / len(radii)
-        else:
-            return 0
+        return float(_pt_table["average_ionic_radius"][self._z])
 
     @property
     @unitized("ang")
@@ -380,10 +491,7 @@ class Element(object):
         All ionic radii of the element as a dict of
         {oxidation state: ionic radii}. Radii are given in ang.
         """
-        if "Ionic radii" in self._data:
-            return {int(k): v for k, v in self._data["Ionic radii"].items()}
-        else:
-            return {}
+        return self._ionic_radii.copy()
 
     @property
     def Z(self):
@@ -437,19 +545,21 @@ class Element(object):
         [(1, "s", 2), (2, "s", 2), (2, "p", 6), (3, "s", 2), (3, "p", 6),
         (3, "d", 6), (4, "s", 2)]
         """
-        estr = self._data["Electronic structure"]
+        if self._full_electronic_structure is None:
+            estr = self._data["Electronic structure"]
 
-        def parse_orbital(orbstr):
-            m = re.match("(\d+)([spdfg]+)<sup>(\d+)</sup>", orbstr)
-            if m:
-                return int(m.group(1)), m.group(2), int(m.group(3))
-            return orbstr
+            def parse_orbital(orbstr):
+                m = re.match("(\d+)([spdfg]+)<sup>(\d+)</sup>", orbstr)
+                if m:
+                    return int(m.group(1)), m.group(2), int(m.group(3))
+                return orbstr
 
-        data = [parse_orbital(s) for s in estr.split(".")]
-        if data[0][0] == "[":
-            sym = data[0].replace("[", "").replace("]", "")
-            data = Element(sym).full_electronic_structure + data[1:]
-        return data
+            data = [parse_orbital(s) for s in estr.split(".")]
+            if data[0][0] == "[":
+                sym = data[0].replace("[", "").replace("]", "")
+                data = Element(sym).full_electronic_structure + data[1:]
+            self._full_electronic_structure = data
+        return list(self._full_electronic_structure)
 
     def __eq__(self, other):
         if not isinstance(other, Element):
@@ -530,49 +640,14 @@ class Element(object):
         """
         Returns the periodic table row of the element.
         """
-        Z = self._z
-        total = 0
-        if 57 <= Z <= 70:
-            return 8
-        elif 89 <= Z <= 102:
-            return 9
-
-        for i in range(len(_pt_row_sizes)):
-            total += _pt_row_sizes[i]
-            if total >= Z:
-                return i + 1
-        return 8
+        return self._row
 
     @property
     def group(self):
         """
         Returns the periodic table group of the element.
         """
-        Z = self._z
-        if Z == 1:
-            return 1
-        if Z == 2:
-            return 18
-        if 3 <= Z <= 18:
-            if (Z - 2) % 8 == 0:
-                return 18
-            elif (Z - 2) % 8 <= 2:
-                return (Z - 2) % 8
-            else:
-                return 10 + (Z - 2) % 8
-
-        if 19 <= Z <= 54:
-            if (Z - 18) % 18 == 0:
-                return 18
-            else:
-                return (Z - 18) % 18
-
-        if (Z - 54) % 32 == 0:
-            return 18
-        elif (Z - 54) % 32 >= 17:
-            return (Z - 54) % 32 - 14
-        else:
-            return (Z - 54) % 32
+        return self._group
 
     @property
     def block(self):
@@ -793,6 +868,29 @@ class Specie(PMGSONable):
         """
         return self._el
 
+    # The most frequently used Element attributes are defined explicitly,
+    # to avoid the overhead of forwarding them through __getattr__.
+    @property
+    def Z(self):
+        """
+        Atomic number of the underlying element.
+        """
+        return self._el._z
+
+    @property
+    def symbol(self):
+        """
+        Symbol of the underlying element.
+        """
+        return self._el._symbol
+
+    @property
+    def X(self):
+        """
+        Electronegativity of the underlying element.
+        """
+        return self._el._x
+
     @property
     def ionic_radius(self):
         """
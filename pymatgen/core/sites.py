@@ -53,16 +53,16 @@ class Site(collections.Mapping, collections.Hashable, PMGSONable):
             properties: Properties associated with the site as a dict, e.g.
                 {"magmom": 5}. Defaults to None.
         """
-        if isinstance(atoms_n_occu, collections.Mapping):
-            self._species = Composition(atoms_n_occu)
-            totaloccu = self._species.num_atoms
-            if totaloccu > 1 + Composition.amount_tolerance:
-                raise ValueError("Species occupancies sum to more than 1!")
-            self._is_ordered = totaloccu == 1 and len(self._species) == 1
-        else:
-            self._species = Composition({get_el_sp(atoms_n_occu): 1})
-            self._is_ordered = True
+        species, is_ordered = _parse_species(atoms_n_occu)
+        self._init_parsed(species, is_ordered, coords, properties)
 
+    def _init_parsed(self, species, is_ordered, coords, properties):
+        """
+        Sets up the site from a Composition of species, as returned by
+        _parse_species.
+        """
+        self._species = species
+        self._is_ordered = is_ordered
         self._coords = coords
         self._properties = properties if properties else {}
 
@@ -307,18 +307,41 @@ class PeriodicSite(Site, PMGSONable):
             properties (dict): Properties associated with the PeriodicSite,
                 e.g., {"magmom":5}. Defaults to None.
         """
-        self._lattice = lattice
         if coords_are_cartesian:
-            self._fcoords = self._lattice.get_fractional_coords(coords)
+            fcoords = lattice.get_fractional_coords(coords)
             c_coords = coords
         else:
-            self._fcoords = coords
+            fcoords = coords
             c_coords = lattice.get_cartesian_coords(coords)
 
         if to_unit_cell:
-            self._fcoords = np.mod(self._fcoords, 1)
-            c_coords = lattice.get_cartesian_coords(self._fcoords)
-        Site.__init__(self, atoms_n_occu, c_coords, properties)
+            fcoords = np.mod(fcoords, 1)
+            c_coords = lattice.get_cartesian_coords(fcoords)
+        species, is_ordered = _parse_species(atoms_n_occu)
+        self._init_parsed(species, is_ordered, fcoords, c_coords, lattice,
+                          properties)
+
+    def _init_parsed(self, species, is_ordered, fcoords, coords, lattice,
+                     properties):
+        """
+        Sets up the site from a Composition of species, as returned by
+        _parse_species, and both fractional and cartesian coordinates.
+        """
+        self._lattice = lattice
+        self._fcoords = fcoords
+        Site._init_parsed(self, species, is_ordered, coords, properties)
+
+    @classmethod
+    def _from_parsed(cls, species, is_ordered, fcoords, coords, lattice,
+                     properties):
+        """
+        Creates a site without parsing the species or converting the
+        coordinates. Used for creating many sites in bulk.
+        """
+        site = cls.__new__(cls)
+        site._init_parsed(species, is_ordered, fcoords, coords, lattice,
+                          properties)
+        return site
 
     def __hash__(self):
         """
@@ -516,3 +539,84 @@ class PeriodicSite(Site, PMGSONable):
         props = d.get("properties", None)
         lattice = lattice if lattice else Lattice.from_dict(d["lattice"])
         return cls(atoms_n_occu, d["abc"], lattice, properties=props)
+
+
+def _parse_species(atoms_n_occu):
+    """
+    Returns the Composition of a site and whether the site is ordered from
+    the species-like input of a Site.
+    """
+    if isinstance(atoms_n_occu, collections.Mapping):
+        species = Composition(atoms_n_occu)
+        totaloccu = species.num_atoms
+        if totaloccu > 1 + Composition.amount_tolerance:
+            raise ValueError("Species occupancies sum to more than 1!")
+        return species, totaloccu == 1 and len(species) == 1
+    return Composition({get_el_sp(atoms_n_occu): 1}), True
+
+
+def get_species_table(species):
+    """
+    Parses species in bulk. Each distinct species-like input is parsed only
+    once, and equal inputs share the resulting Composition.
+
+    Args:
+        species: Sequence of species on each site, in any form accepted by
+            Site.
+
+    Returns:
+        ([(Composition, is_ordered)], [int]): The distinct parsed species,
+        and the index into them of each input.
+    """
+    table = []
+    parsed = {}
+    index = []
+    for sp in species:
+        try:
+            # Keyed by type, since e.g. 26 and Element("Fe") hash the same
+            key = (type(sp), sp)
+            index.append(parsed[key])
+        except KeyError:
+            index.append(parsed.setdefault(key, len(table)))
+            table.append(_parse_species(sp))
+        except TypeError:
+            index.append(len(table))
+            table.append(_parse_species(sp))
+    return table, index
+
+
+def get_periodic_sites(species, frac_coords, lattice, cart_coords=None,
+                       properties=None):
+    """
+    Creates PeriodicSites in bulk. Each distinct species-like input is parsed
+    only once, and the resulting Compositions are shared between the sites.
+    No translation into the unit cell is performed.
+
+    Args:
+        species: Sequence of species on each site, in any form accepted by
+            PeriodicSite.
+        frac_coords (Nx3 array): Fractional coordinates of the sites.
+        lattice (Lattice): Lattice associated with the sites.
+        cart_coords (Nx3 array): Cartesian coordinates of the sites. Defaults
+            to None, which means they are computed from frac_coords.
+        properties ([dict]): Properties of each site. The dicts are copied.
+            Defaults to None for no properties.
+
+    Returns:
+        [PeriodicSite]
+    """
+    frac_coords = np.array(frac_coords, dtype=float).reshape((-1, 3))
+    if cart_coords is None:
+        cart_coords = lattice.get_cartesian_coords(frac_coords)
+    else:
+        cart_coords = np.array(cart_coords, dtype=float).reshape((-1, 3))
+    table, index = get_species_table(species)
+    sites = []
+    for i, k in enumerate(index):
+        comp, is_ordered = table[k]
+        # Each site gets its own dict, even if the inputs are shared
+        props = dict(properties[i]) if properties and properties[i] else None
+        sites.append(PeriodicSite._from_parsed(
+            comp, is_ordered, frac_coords[i], cart_coords[i], lattice,
+            props))
+    return sites
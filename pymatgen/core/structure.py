@@ -42,13 +42,14 @@ except ImportError:
 
 from pymatgen.core.operations import SymmOp
 from pymatgen.core.lattice import Lattice
+from pymatgen.core.neighbors import find_neighbors
 from pymatgen.core.periodic_table import Element, Specie, get_el_sp
 from pymatgen.serializers.json_coders import PMGSONable
-from pymatgen.core.sites import Site, PeriodicSite
+from pymatgen.core.sites import Site, PeriodicSite, get_species_table
 from pymatgen.core.bonds import CovalentBond, get_bond_length
 from pymatgen.core.composition import Composition
 from pymatgen.util.coord_utils import get_angle, all_distances, \
-    lattice_points_in_supercell
+    lattice_points_in_supercell, pbc_coord_matches, LOOP_THRESHOLD
 from monty.design_patterns import singleton
 from pymatgen.core.units import Mass, Length, ArrayWithUnit
 from pymatgen.symmetry.groups import SpaceGroup
@@ -327,6 +328,42 @@ class SiteCollection(six.with_metaclass(ABCMeta, collections.Sequence)):
         pass
 
 
+class _MissingProperty(object):
+    """
+    Marks the sites of a structure that do not have a property that other
+    sites have. The class itself is the marker, so that it keeps its
+    identity when a structure is pickled or copied.
+    """
+    pass
+
+
+def _compact_species(species_table, species_index):
+    """
+    Drops unused and duplicate entries of a species table and orders it by
+    first occurrence.
+
+    Args:
+        species_table ([(Composition, is_ordered)]): Species table.
+        species_index ([int]): Index into species_table of each site.
+
+    Returns:
+        (table, index): The compacted table and the new index array.
+    """
+    species_index = np.array(species_index, dtype=int).reshape(-1)
+    used, first, inverse = np.unique(species_index, return_index=True,
+                                     return_inverse=True)
+    table = []
+    lookup = {}
+    remap = np.zeros(len(used), dtype=int)
+    for k in np.argsort(first, kind="mergesort").tolist():
+        entry = species_table[used[k]]
+        if entry[0] not in lookup:
+            lookup[entry[0]] = len(table)
+            table.append(entry)
+        remap[k] = lookup[entry[0]]
+    return table, remap[inverse]
+
+
 class IStructure(SiteCollection, PMGSONable):
     """
     Basic immutable Structure object with periodicity. Essentially a sequence
@@ -336,6 +373,13 @@ class IStructure(SiteCollection, PMGSONable):
     extends Sequence and Hashable, which means that in many cases,
     it can be used like any Python sequence. Iterating through a
     structure is equivalent to going through the sites in sequence.
+
+    Internally, the sites are stored as columns: Nx3 arrays of fractional
+    and cartesian coordinates, a table of the distinct species with the
+    index into it of each site, and a list of values per site property.
+    PeriodicSite objects are only created when sites are accessed, so
+    coordinate arrays are available without any per-site work and large
+    structures take far less memory.
     """
 
     def __init__(self, lattice, species, coords, validate_proximity=False,
@@ -381,23 +425,103 @@ class IStructure(SiteCollection, PMGSONable):
         else:
             self._lattice = Lattice(lattice)
 
-        sites = []
-        for i in range(len(species)):
-            prop = None
-            if site_properties:
-                prop = {k: v[i]
-                        for k, v in site_properties.items()}
-
-            sites.append(
-                PeriodicSite(species[i], coords[i], self._lattice,
-                             to_unit_cell,
-                             coords_are_cartesian=coords_are_cartesian,
-                             properties=prop))
-        self._sites = tuple(sites)
+        coords = np.array(coords, dtype=float).reshape((-1, 3))
+        if coords_are_cartesian:
+            frac_coords = self._lattice.get_fractional_coords(coords)
+        else:
+            frac_coords = coords
+        if to_unit_cell:
+            frac_coords = np.mod(frac_coords, 1)
+        if coords_are_cartesian and not to_unit_cell:
+            cart_coords = coords
+        else:
+            cart_coords = self._lattice.get_cartesian_coords(frac_coords)
+
+        props = {}
+        if site_properties:
+            props = {k: [v[i] for i in range(len(species))]
+                     for k, v in site_properties.items()}
+
+        table, index = get_species_table(species)
+        self._set_columns(table, index, frac_coords, cart_coords, props)
         if validate_proximity and not self.is_valid():
             raise StructureError(("Structure contains sites that are ",
                                   "less than 0.01 Angstrom apart!"))
 
+    def _set_columns(self, species_table, species_index, frac_coords,
+                     cart_coords, site_properties):
+        """
+        Sets the columnar site data. The species table is compacted to the
+        distinct species in order of first occurrence, and properties that
+        no site has are dropped.
+
+        Args:
+            species_table ([(Composition, is_ordered)]): Species of the sites,
+                as returned by get_species_table.
+            species_index ([int]): Index into species_table of each site.
+            frac_coords (Nx3 array): Fractional coordinates. Not copied.
+            cart_coords (Nx3 array): Cartesian coordinates. Not copied.
+            site_properties (dict): Properties as a dict of lists, with
+                _MissingProperty marking sites without the property.
+        """
+        self._species_table, self._species_index = _compact_species(
+            species_table, species_index)
+        self._frac_coords = np.reshape(frac_coords, (-1, 3))
+        self._cart_coords = np.reshape(cart_coords, (-1, 3))
+        self._site_properties = {
+            k: v for k, v in site_properties.items()
+            if any(x is not _MissingProperty for x in v)}
+
+    def _set_sites(self, sites):
+        """
+        Replaces all sites with the given PeriodicSites, which are assumed to
+        have the lattice of the structure.
+        """
+        n = len(sites)
+        props = collections.defaultdict(lambda: [_MissingProperty] * n)
+        for i, site in enumerate(sites):
+            for k, v in site.properties.items():
+                props[k][i] = v
+        self._set_columns(
+            [(site.species_and_occu, site.is_ordered) for site in sites],
+            range(n), np.array([site.frac_coords for site in sites]),
+            np.array([site.coords for site in sites]), props)
+
+    def _get_sites(self, indices, frac_coords=None):
+        """
+        Materializes the sites at the given indices as PeriodicSites. The
+        sites get their own copies of the coordinates.
+
+        Args:
+            indices ([int]): Indices of the sites.
+            frac_coords (Nx3 array): Fractional coordinates to place the
+                sites at instead of their own, e.g. those of periodic
+                images. Defaults to None.
+
+        Returns:
+            [PeriodicSite]
+        """
+        indices = np.array(indices, dtype=int).reshape(-1)
+        if frac_coords is None:
+            fcoords = self._frac_coords[indices]
+            ccoords = self._cart_coords[indices]
+        else:
+            fcoords = np.array(frac_coords, dtype=float).reshape((-1, 3))
+            ccoords = self._lattice.get_cartesian_coords(fcoords)
+        table = self._species_table
+        columns = list(self._site_properties.items())
+        sites = []
+        for i, k, fc, cc in zip(indices.tolist(),
+                                self._species_index[indices].tolist(),
+                                list(fcoords), list(ccoords)):
+            props = None
+            if columns:
+                props = {name: v[i] for name, v in columns
+                         if v[i] is not _MissingProperty}
+            sites.append(PeriodicSite._from_parsed(
+                table[k][0], table[k][1], fc, cc, self._lattice, props))
+        return sites
+
     @classmethod
     def from_sites(cls, sites, validate_proximity=False,
                    to_unit_cell=False):
@@ -571,7 +695,67 @@ class IStructure(SiteCollection, PMGSONable):
         """
         Returns an iterator for the sites in the Structure.
         """
-        return self._sites
+        return tuple(self._get_sites(range(len(self))))
+
+    def __getitem__(self, ind):
+        if isinstance(ind, slice):
+            return tuple(self._get_sites(range(len(self))[ind]))
+        return self._get_sites([ind])[0]
+
+    def __iter__(self):
+        return iter(self.sites)
+
+    def __len__(self):
+        return len(self._species_index)
+
+    def __contains__(self, site):
+        try:
+            coords = np.array(site.coords, dtype=float)
+        except AttributeError:
+            return False
+        # Only sites with (nearly) the same coordinates can be equal.
+        tol = Site.position_atol + 1e-5 * np.maximum(
+            np.abs(self._cart_coords), np.abs(coords))
+        close = np.all(np.abs(self._cart_coords - coords) <= tol, axis=1)
+        return any(s == site for s in self._get_sites(np.where(close)[0]))
+
+    @property
+    def species_and_occu(self):
+        """
+        List of species and occupancies at each site of the structure.
+        """
+        return [self._species_table[k][0]
+                for k in self._species_index.tolist()]
+
+    @property
+    def site_properties(self):
+        """
+        Returns the site properties as a dict of sequences. E.g.,
+        {"magmom": (5,-5), "charge": (-4,4)}.
+        """
+        return {k: [None if x is _MissingProperty else x for x in v]
+                for k, v in self._site_properties.items()}
+
+    @property
+    def composition(self):
+        """
+        (Composition) Returns the composition
+        """
+        elmap = collections.defaultdict(float)
+        used, counts = np.unique(self._species_index, return_counts=True)
+        for k, n in zip(used.tolist(), counts.tolist()):
+            for species, occu in self._species_table[k][0].items():
+                elmap[species] += occu * n
+        return Composition(elmap)
+
+    @property
+    def is_ordered(self):
+        """
+        Checks if structure is ordered, meaning no partial occupancies in any
+        of the sites.
+        """
+        return all(self._species_table[k][1]
+                   for k in np.unique(self._species_index).tolist())
 
     @property
     def lattice(self):
@@ -633,7 +817,14 @@ class IStructure(SiteCollection, PMGSONable):
         """
         Fractional coordinates as a Nx3 numpy array.
         """
-        return np.array([site.frac_coords for site in self._sites])
+        return self._frac_coords.copy()
+
+    @property
+    def cart_coords(self):
+        """
+        Cartesian coordinates as a Nx3 numpy array.
+        """
+        return self._cart_coords.copy()
 
     @property
     def volume(self):
@@ -662,45 +853,37 @@ class IStructure(SiteCollection, PMGSONable):
         """
         return self[i].distance(self[j], jimage)
 
-    def get_sites_in_sphere(self, pt, r, include_index=False):
+    def get_sites_in_sphere(self, pt, r, include_index=False, engine=None):
         """
         Find all sites within a sphere from the point. This includes sites
-        in other periodic images.
-
-        Algorithm:
-
-        1. place sphere of radius r in crystal and determine minimum supercell
-           (parallelpiped) which would contain a sphere of radius r. for this
-           we need the projection of a_1 on a unit vector perpendicular
-           to a_2 & a_3 (i.e. the unit vector in the direction b_1) to
-           determine how many a_1"s it will take to contain the sphere.
-
-           Nxmax = r * length_of_b_1 / (2 Pi)
-
-        2. keep points falling within r.
+        in other periodic images. The search is performed by a neighbor list
+        engine (see pymatgen.core.neighbors), which bins the periodic images
+        of all sites so that the cost scales linearly with the number of
+        sites.
 
         Args:
             pt (3x1 array): cartesian coordinates of center of sphere.
             r (float): Radius of sphere.
             include_index (bool): Whether the non-supercell site index
                 is included in the returned data
+            engine: Neighbor list engine name or instance. Defaults to None,
+                which uses the default engine.
 
         Returns:
             [(site, dist) ...] since most of the time, subsequent processing
             requires the distance.
         """
         site_fcoords = np.mod(self.frac_coords, 1)
+        c_inds, p_inds, images, dists = find_neighbors(
+            self._lattice, site_fcoords, [pt], r, engine=engine)
+        nnsites = self._get_sites(p_inds, site_fcoords[p_inds] + images)
         neighbors = []
-        for fcoord, dist, i in self._lattice.get_points_in_sphere(
-                site_fcoords, pt, r):
-            nnsite = PeriodicSite(self[i].species_and_occu,
-                                  fcoord, self._lattice,
-                                  properties=self[i].properties)
+        for i, nnsite, dist in zip(p_inds, nnsites, dists):
             neighbors.append((nnsite, dist) if not include_index
                              else (nnsite, dist, i))
         return neighbors
 
-    def get_neighbors(self, site, r, include_index=False):
+    def get_neighbors(self, site, r, include_index=False, engine=None):
         """
         Get all neighbors to a site within a sphere of radius r.  Excludes the
         site itself.
@@ -713,25 +896,28 @@ class IStructure(SiteCollection, PMGSONable):
             include_index:
                 boolean that determines whether the non-supercell site index
                 is included in the returned data
+            engine:
+                Neighbor list engine name or instance. Defaults to None,
+                which uses the default engine.
 
         Returns:
             [(site, dist) ...] since most of the time, subsequent processing
             requires the distance.
         """
         nn = self.get_sites_in_sphere(site.coords, r,
-                                      include_index=include_index)
+                                      include_index=include_index,
+                                      engine=engine)
         return [d for d in nn if site != d[0]]
 
-    def get_all_neighbors(self, r, include_index=False):
+    def get_all_neighbors(self, r, include_index=False, engine=None):
         """
         Get neighbors for each atom in the unit cell, out to a distance r
         Returns a list of list of neighbors for each site in structure.
         Use this method if you are planning on looping over all sites in the
         crystal. If you only want neighbors for a particular site, use the
-        method get_neighbors as it may not have to build such a large supercell
-        However if you are looping over all sites in the crystal, this method
-        is more efficient since it only performs one pass over a large enough
-        supercell to contain all possible atoms out to a distance r.
+        method get_neighbors. All neighbors are found in a single pass of a
+        neighbor list engine (see pymatgen.core.neighbors), which scales
+        linearly with the number of sites.
         The return type is a [(site, dist) ...] since most of the time,
         subsequent processing requires the distance.
 
@@ -739,6 +925,8 @@ class IStructure(SiteCollection, PMGSONable):
             r (float): Radius of sphere.
             include_index (bool): Whether to include the non-supercell site
                 in the returned data
+            engine: Neighbor list engine name or instance. Defaults to None,
+                which uses the default engine.
 
         Returns:
             A list of a list of nearest neighbors for each site, i.e.,
@@ -748,37 +936,64 @@ class IStructure(SiteCollection, PMGSONable):
             structure. This is needed for ewaldmatrix by keeping track of which
             sites contribute to the ewald sum.
         """
-        # Use same algorithm as get_sites_in_sphere to determine supercell but
-        # loop over all atoms in crystal
-        recp_len = np.array(self.lattice.reciprocal_lattice.abc)
-        maxr = np.ceil((r + 0.15) * recp_len / (2 * math.pi))
-        nmin = np.floor(np.min(self.frac_coords, axis=0)) - maxr
-        nmax = np.ceil(np.max(self.frac_coords, axis=0)) + maxr
-
-        all_ranges = [np.arange(x, y) for x, y in zip(nmin, nmax)]
-
-        latt = self._lattice
-        neighbors = [list() for i in range(len(self._sites))]
-        all_fcoords = np.mod(self.frac_coords, 1)
-        coords_in_cell = latt.get_cartesian_coords(all_fcoords)
-        site_coords = self.cart_coords
-
-        indices = np.arange(len(self))
-        for image in itertools.product(*all_ranges):
-            coords = latt.get_cartesian_coords(image) + coords_in_cell
-            all_dists = all_distances(coords, site_coords)
-            all_within_r = np.bitwise_and(all_dists <= r, all_dists > 1e-8)
-
-            for (j, d, within_r) in zip(indices, all_dists, all_within_r):
-                nnsite = PeriodicSite(self[j].species_and_occu, coords[j],
-                                      latt, properties=self[j].properties,
-                                      coords_are_cartesian=True)
-                for i in indices[within_r]:
-                    item = (nnsite, d[i], j) if include_index else (
-                        nnsite, d[i])
-                    neighbors[i].append(item)
+        fcoords = self.frac_coords
+        c_inds, p_inds, images, dists = self.get_neighbor_list(r,
+                                                               engine=engine)
+        nnsites = self._get_sites(p_inds, fcoords[p_inds] + images)
+        neighbors = [list() for i in range(len(self))]
+        for i, j, nnsite, d in zip(c_inds, p_inds, nnsites, dists):
+            neighbors[i].append((nnsite, d, j) if include_index
+                                else (nnsite, d))
         return neighbors
 
+    def get_neighbor_list(self, r, sites=None, exclude_self=True,
+                          return_vectors=False, engine=None):
+        """
+        Get neighbors for each site (or a list of sites) out to a distance r
+        as flat numpy arrays. Unlike get_all_neighbors, no PeriodicSite
+        objects are created, which makes this the method of choice for
+        performance sensitive code with large cutoffs. Properties of the
+        neighbors can be looked up from the returned indices, e.g.,
+        structure[neighbor_indices[k]].species_and_occu.
+
+        Args:
+            r (float): Radius of sphere.
+            sites (list): Sites to use as centers. Defaults to None, which
+                means all sites in the structure.
+            exclude_self (bool): Whether to exclude neighbors that
+                coincide with the center (distance < 1e-8), i.e., the site
+                itself. Defaults to True.
+            return_vectors (bool): Whether to also return the cartesian
+                vectors from each center to its neighbor.
+            engine: Neighbor list engine name or instance. Defaults to None,
+                which uses the default engine.
+
+        Returns:
+            (center_indices, neighbor_indices, images, distances), or
+            (center_indices, neighbor_indices, images, distances, vectors)
+            if return_vectors is True. center_indices index into sites (or
+            the structure if sites is None), neighbor_indices index into
+            the structure and images are the lattice translations of the
+            neighbors, i.e., the fractional coordinates of a neighbor are
+            structure.frac_coords[neighbor_indices] + images.
+        """
+        if sites is None:
+            centers = self.cart_coords
+        else:
+            centers = np.array([site.coords for site in sites])
+        fcoords = self.frac_coords
+        c_inds, p_inds, images, dists = find_neighbors(
+            self._lattice, fcoords, centers, r, engine=engine)
+        if exclude_self:
+            keep = dists > 1e-8
+            c_inds, p_inds, images, dists = c_inds[keep], p_inds[keep], \
+                images[keep], dists[keep]
+        if return_vectors:
+            vectors = self._lattice.get_cartesian_coords(
+                fcoords[p_inds] + images) - np.reshape(centers, (-1, 3))[c_inds]
+            return c_inds, p_inds, images, dists, vectors
+        return c_inds, p_inds, images, dists
+
     def get_neighbors_in_shell(self, origin, r, dr):
         """
         Returns all sites in a shell centered on origin (coords) between radii
@@ -977,11 +1192,72 @@ class IStructure(SiteCollection, PMGSONable):
                            site_properties=self.site_properties))
         return structs
 
+    def _get_grouped_sites(self):
+        """
+        Returns the sites grouped by species string, and the fractional
+        coordinates of each group as arrays.
+        """
+        k = lambda s: s.species_string
+        sites = sorted(self, key=k)
+        grouped_sites = [list(a[1]) for a in itertools.groupby(sites, key=k)]
+        grouped_fcoords = [np.array([s.frac_coords for s in g])
+                           for g in grouped_sites]
+        return grouped_sites, grouped_fcoords
+
+    @staticmethod
+    def _find_pure_translations(grouped_fcoords, ftol):
+        """
+        Returns the vectors between sites of the smallest group that map
+        every group onto itself within the fractional tolerance ftol.
+        """
+        min_fcoords = min(grouped_fcoords, key=lambda x: len(x))
+        trans = np.mod(min_fcoords - min_fcoords[0], 1)
+        # Starting with the smallest groups, which rule out most candidates
+        # for the least work. Candidates are processed in chunks to bound the
+        # size of the shifted coordinate arrays.
+        for g in sorted(grouped_fcoords, key=lambda x: len(x)):
+            chunk = max(int(LOOP_THRESHOLD // len(g)), 1)
+            valid = []
+            for i in range(0, len(trans), chunk):
+                t = trans[i:i + chunk]
+                shifted = g[None, :, :] + t[:, None, :]
+                matches = pbc_coord_matches(shifted.reshape((-1, 3)), g, ftol)
+                valid.append(np.all(matches.reshape((len(t), len(g))),
+                                    axis=1))
+            trans = trans[np.concatenate(valid)]
+        return trans
+
+    def get_pure_translations(self, tolerance=0.25):
+        """
+        Returns the translation vectors within the unit cell which map the
+        structure onto itself, i.e. the lattice points of the primitive
+        lattice in the cell. The zero vector is always included.
+
+        Candidates are the vectors between the sites of the least frequent
+        species. Each candidate is checked against all sites with a spatial
+        hash of the fractional coordinates, i.e. in O(N) per candidate.
+
+        Args:
+            tolerance (float): Tolerance for each coordinate of a particular
+                site in Angstrom. Since both ends of a candidate vector are
+                approximate, sites are matched within twice this tolerance.
+                Defaults to 0.25.
+
+        Returns:
+            Nx3 array of fractional translation vectors.
+        """
+        grouped_fcoords = self._get_grouped_sites()[1]
+        super_ftol = np.divide(tolerance, self.lattice.abc)
+        return self._find_pure_translations(grouped_fcoords, super_ftol * 2)
+
     def get_primitive_structure(self, tolerance=0.25):
         """
-        This finds a smaller unit cell than the input. Sometimes it doesn"t
-        find the smallest possible one, so this method is recursively called
-        until it is unable to find a smaller cell.
+        This finds the smallest unit cell of the input, in a single pass.
+        The pure translations of the structure are found first (see
+        get_pure_translations). Supercell matrices whose lattice vectors are
+        all pure translations are then checked, from the largest possible
+        number of formula units down, and the first valid one gives the
+        primitive cell.
 
         NOTE: if the tolerance is greater than 1/2 the minimum inter-site
         distance in the primitive cell, the algorithm will reject this lattice.
@@ -995,67 +1271,33 @@ class IStructure(SiteCollection, PMGSONable):
         Returns:
             The most primitive structure found.
         """
-        # group sites by species string
-        k = lambda s: s.species_string
-        sites = sorted(self._sites, key=k)
-        grouped_sites = [list(a[1]) for a in itertools.groupby(sites, key=k)]
-        grouped_fcoords = [np.array([s.frac_coords for s in g])
-                           for g in grouped_sites]
-
-        # min_vecs are approximate periodicities of the cell. The exact
-        # periodicities from the supercell matrices are checked against these
-        # first
-        min_fcoords = min(grouped_fcoords, key=lambda x: len(x))
-        min_vecs = min_fcoords - min_fcoords[0]
+        grouped_sites, grouped_fcoords = self._get_grouped_sites()
 
         # fractional tolerance in the supercell
         super_ftol = np.divide(tolerance, self.lattice.abc)
-        super_ftol_2 = super_ftol * 2
 
-        def pbc_coord_intersection(fc1, fc2, tol):
-            """
-            Returns the fractional coords in fc1 that have coordinates
-            within tolerance to some coordinate in fc2
-            """
-            d = fc1[:, None, :] - fc2[None, :, :]
-            d -= np.round(d)
-            np.abs(d, d)
-            return fc1[np.any(np.all(d < tol, axis=-1), axis=-1)]
-
-        # here we reduce the number of min_vecs by enforcing that every
-        # vector in min_vecs approximately maps each site onto a similar site.
-        # The subsequent processing is O(fu^3 * min_vecs) = O(n^4) if we do no
-        # reduction.
-        # This reduction is O(n^3) so usually is an improvement. Using double
-        # the tolerance because both vectors are approximate
-        for g in sorted(grouped_fcoords, key=lambda x: len(x)):
-            for f in g:
-                min_vecs = pbc_coord_intersection(min_vecs, g - f, super_ftol_2)
+        # Using double the tolerance because both ends of the vectors are
+        # approximate
+        trans = self._find_pure_translations(grouped_fcoords, super_ftol * 2)
+
+        def factors(n):
+            for i in range(1, n+1):
+                if n % i == 0:
+                    yield i
 
-        def get_hnf(fu):
+        def get_hnf(det):
             """
-            Returns all possible distinct supercell matrices given a
-            number of formula units in the supercell. Batches the matrices
-            by the values in the diagonal (for less numpy overhead).
-            Computational complexity is O(n^3), and difficult to improve.
-            Might be able to do something smart with checking combinations of a
-            and b first, though unlikely to reduce to O(n^2).
+            Returns all possible distinct supercell matrices with a given
+            determinant. Batches the matrices by the values in the diagonal
+            (for less numpy overhead).
             """
-            def factors(n):
-                for i in range(1, n+1):
-                    if n % i == 0:
-                        yield i
-
-            for det in factors(fu):
-                if det == 1:
-                    continue
-                for a in factors(det):
-                    for e in factors(det // a):
-                        g = det // a // e
-                        yield det, np.array(
-                            [[[a, b, c], [0, e, f], [0, 0, g]]
-                            for b, c, f in itertools.product(range(a), range(a),
-                                                             range(e))])
+            for a in factors(det):
+                for e in factors(det // a):
+                    g = det // a // e
+                    yield np.array(
+                        [[[a, b, c], [0, e, f], [0, 0, g]]
+                        for b, c, f in itertools.product(range(a), range(a),
+                                                         range(e))])
 
         # we cant let sites match to their neighbors in the supercell
         grouped_non_nbrs = []
@@ -1068,66 +1310,67 @@ class IStructure(SiteCollection, PMGSONable):
             np.fill_diagonal(non_nbrs, True)
             grouped_non_nbrs.append(non_nbrs)
 
+        # The number of formula units in the cell is at most the number of
+        # pure translations. The largest valid size gives the primitive cell.
         num_fu = six.moves.reduce(gcd, map(len, grouped_sites))
-        for size, ms in get_hnf(num_fu):
-            inv_ms = np.linalg.inv(ms)
-
-            # find sets of lattice vectors that are are present in min_vecs
-            dist = inv_ms[:, :, None, :] - min_vecs[None, None, :, :]
-            dist -= np.round(dist)
-            np.abs(dist, dist)
-            is_close = np.all(dist < super_ftol, axis=-1)
-            any_close = np.any(is_close, axis=-1)
-            inds = np.all(any_close, axis=-1)
-
-            for inv_m, m in zip(inv_ms[inds], ms[inds]):
-                new_m = np.dot(inv_m, self.lattice.matrix)
-                ftol = np.divide(tolerance, np.sqrt(np.sum(new_m ** 2, axis=1)))
-
-                valid = True
-                new_coords = []
-                new_sp = []
-                for gsites, gfcoords, non_nbrs in zip(grouped_sites,
-                                                      grouped_fcoords,
-                                                      grouped_non_nbrs):
-                    all_frac = np.dot(gfcoords, m)
-
-                    # calculate grouping of equivalent sites, represented by
-                    # adjacency matrix
-                    fdist = all_frac[None, :, :] - all_frac[:, None, :]
-                    fdist = np.abs(fdist - np.round(fdist))
-                    close_in_prim = np.all(fdist < ftol[None, None, :], axis=-1)
-                    groups = np.logical_and(close_in_prim, non_nbrs)
-
-                    #check that groups are correct
-                    if not np.all(np.sum(groups, axis=0) == size):
-                        valid = False
-                        break
-
-                    #check that groups are all cliques
-                    for g in groups:
-                        if not np.all(groups[g][:, g]):
+        sizes = [d for d in factors(num_fu) if 1 < d <= len(trans)]
+        for size in reversed(sizes):
+            for ms in get_hnf(size):
+                inv_ms = np.linalg.inv(ms)
+
+                # find sets of lattice vectors that are pure translations
+                is_close = pbc_coord_matches(inv_ms.reshape((-1, 3)), trans,
+                                             super_ftol)
+                inds = np.all(is_close.reshape((-1, 3)), axis=-1)
+
+                for inv_m, m in zip(inv_ms[inds], ms[inds]):
+                    new_m = np.dot(inv_m, self.lattice.matrix)
+                    ftol = np.divide(tolerance,
+                                     np.sqrt(np.sum(new_m ** 2, axis=1)))
+
+                    valid = True
+                    new_coords = []
+                    new_sp = []
+                    for gsites, gfcoords, non_nbrs in zip(grouped_sites,
+                                                          grouped_fcoords,
+                                                          grouped_non_nbrs):
+                        all_frac = np.dot(gfcoords, m)
+
+                        # calculate grouping of equivalent sites, represented
+                        # by adjacency matrix
+                        fdist = all_frac[None, :, :] - all_frac[:, None, :]
+                        fdist = np.abs(fdist - np.round(fdist))
+                        close_in_prim = np.all(fdist < ftol[None, None, :],
+                                               axis=-1)
+                        groups = np.logical_and(close_in_prim, non_nbrs)
+
+                        #check that groups are correct
+                        if not np.all(np.sum(groups, axis=0) == size):
                             valid = False
                             break
-                    if not valid:
-                        break
 
-                    #add the new sites
-                    added = np.zeros(len(gsites))
-                    for i, s in enumerate(gsites):
-                        if not added[i]:
-                            added[groups[i]] = True
-                            new_sp.append(s.species_and_occu)
-                            new_coords.append(s.coords)
-
-                if valid:
-                    inv_m = np.linalg.inv(m)
-                    new_l = Lattice(np.dot(inv_m, self.lattice.matrix))
-                    s = Structure(new_l, new_sp, new_coords,
-                                  coords_are_cartesian=True)
+                        #check that groups are all cliques
+                        for g in groups:
+                            if not np.all(groups[g][:, g]):
+                                valid = False
+                                break
+                        if not valid:
+                            break
 
-                    return s.get_primitive_structure(
-                        tolerance).get_reduced_structure()
+                        #add the new sites
+                        added = np.zeros(len(gsites))
+                        for i, s in enumerate(gsites):
+                            if not added[i]:
+                                added[groups[i]] = True
+                                new_sp.append(s.species_and_occu)
+                                new_coords.append(s.coords)
+
+                    if valid:
+                        inv_m = np.linalg.inv(m)
+                        new_l = Lattice(np.dot(inv_m, self.lattice.matrix))
+                        s = Structure(new_l, new_sp, new_coords,
+                                      coords_are_cartesian=True)
+                        return s.get_reduced_structure()
 
         return Structure.from_sites(self)
 
@@ -2020,7 +2263,63 @@ class Structure(IStructure, collections.MutableSequence):
             coords_are_cartesian=coords_are_cartesian,
             site_properties=site_properties)
 
-        self._sites = list(self._sites)
+    def _add_species(self, species, is_ordered):
+        """
+        Returns the index of a species in the species table, adding it to the
+        table if it is not there yet.
+        """
+        for k, (comp, _) in enumerate(self._species_table):
+            if comp == species:
+                return k
+        self._species_table.append((species, is_ordered))
+        return len(self._species_table) - 1
+
+    def _put_site(self, i, site):
+        """
+        Replaces the site at index i by a PeriodicSite, which is assumed to
+        have the lattice of the structure.
+        """
+        i = range(len(self))[i]
+        self._frac_coords[i] = site.frac_coords
+        self._cart_coords[i] = site.coords
+        self._species_index[i] = self._add_species(site.species_and_occu,
+                                                   site.is_ordered)
+        props = site.properties
+        for k in props:
+            if k not in self._site_properties:
+                self._site_properties[k] = [_MissingProperty] * len(self)
+        for k, v in list(self._site_properties.items()):
+            v[i] = props.get(k, _MissingProperty)
+            if v[i] is _MissingProperty and \
+                    all(x is _MissingProperty for x in v):
+                del self._site_properties[k]
+
+    def _take(self, indices):
+        """
+        Keeps only the sites at the given indices, in that order. Indices may
+        be repeated.
+        """
+        indices = np.array(indices, dtype=int).reshape(-1)
+        self._set_columns(
+            self._species_table, self._species_index[indices],
+            self._frac_coords[indices], self._cart_coords[indices],
+            {k: [v[i] for i in indices.tolist()]
+             for k, v in self._site_properties.items()})
+
+    def _map_species(self, func):
+        """
+        Replaces the species of each site by func(species_and_occu). func is
+        called once per distinct species in the structure. Sites that end up
+        with no species are removed.
+        """
+        table, index = _compact_species(self._species_table,
+                                        self._species_index)
+        new_table, new_index = get_species_table(
+            [func(comp) for comp, is_ordered in table])
+        keep = [len(new_table[new_index[k]][0]) > 0 for k in range(len(table))]
+        self._species_table = new_table
+        self._species_index = np.array(new_index, dtype=int)[index]
+        self._take([i for i, k in enumerate(index.tolist()) if keep[k]])
 
     def __setitem__(self, i, site):
         """
@@ -2045,28 +2344,33 @@ class Structure(IStructure, collections.MutableSequence):
             if site.lattice != self._lattice:
                 raise ValueError("PeriodicSite added must have same lattice "
                                  "as Structure!")
-            self._sites[i] = site
+            self._put_site(i, site)
         else:
             if isinstance(site, six.string_types) or (not isinstance(site, \
                     collections.Sequence)):
                 sp = site
-                frac_coords = self._sites[i].frac_coords
-                properties = self._sites[i].properties
+                frac_coords = self[i].frac_coords
+                properties = self[i].properties
             else:
                 sp = site[0]
-                frac_coords = site[1] if len(site) > 1 else self._sites[i]\
+                frac_coords = site[1] if len(site) > 1 else self[i]\
                     .frac_coords
-                properties = site[2] if len(site) > 2 else self._sites[i]\
+                properties = site[2] if len(site) > 2 else self[i]\
                     .properties
 
-            self._sites[i] = PeriodicSite(sp, frac_coords, self._lattice,
-                                          properties=properties)
+            self._put_site(i, PeriodicSite(sp, frac_coords, self._lattice,
+                                           properties=properties))
 
     def __delitem__(self, i):
         """
         Deletes a site from the Structure.
         """
-        self._sites.__delitem__(i)
+        n = len(self)
+        if isinstance(i, slice):
+            remove = set(range(n)[i])
+        else:
+            remove = {range(n)[i]}
+        self._take([j for j in range(n) if j not in remove])
 
     def append(self, species, coords, coords_are_cartesian=False,
                validate_proximity=False, properties=None):
@@ -2120,7 +2424,21 @@ class Structure(IStructure, collections.MutableSequence):
                     raise ValueError("New site is too close to an existing "
                                      "site!")
 
-        self._sites.insert(i, new_site)
+        #Same index semantics as list.insert
+        n = len(self)
+        i = min(max(i + n if i < 0 else i, 0), n)
+        k = self._add_species(new_site.species_and_occu, new_site.is_ordered)
+        self._species_index = np.insert(self._species_index, i, k)
+        self._frac_coords = np.insert(self._frac_coords, i,
+                                      new_site.frac_coords, axis=0)
+        self._cart_coords = np.insert(self._cart_coords, i, new_site.coords,
+                                      axis=0)
+        props = new_site.properties
+        for k in props:
+            if k not in self._site_properties:
+                self._site_properties[k] = [_MissingProperty] * n
+        for k, v in self._site_properties.items():
+            v.insert(i, props.get(k, _MissingProperty))
 
     def add_site_property(self, property_name, values):
         """
@@ -2131,17 +2449,10 @@ class Structure(IStructure, collections.MutableSequence):
             values: A sequence of values. Must be same length as number of
                 sites.
         """
-        if len(values) != len(self._sites):
+        if len(values) != len(self):
             raise ValueError("Values must be same length as sites.")
-        for i in range(len(self._sites)):
-            site = self._sites[i]
-            props = site.properties
-            if not props:
-                props = {}
-            props[property_name] = values[i]
-            self._sites[i] = PeriodicSite(site.species_and_occu,
-                                          site.frac_coords, self._lattice,
-                                          properties=props)
+        self._site_properties[property_name] = [values[i]
+                                                for i in range(len(self))]
 
     def replace_species(self, species_mapping):
         """
@@ -2155,22 +2466,20 @@ class Structure(IStructure, collections.MutableSequence):
                 passed the mapping {Element('Si): {Element('Ge'):0.75,
                 Element('C'):0.25} } will have .375 Ge and .125 C.
         """
-        latt = self._lattice
         species_mapping = {get_el_sp(k): v
                            for k, v in species_mapping.items()}
 
-        def mod_site(site):
+        def mod_species(sp_and_occu):
             c = Composition()
-            for sp, amt in site.species_and_occu.items():
+            for sp, amt in sp_and_occu.items():
                 new_sp = species_mapping.get(sp, sp)
                 if isinstance(new_sp, collections.Mapping):
                     c += Composition(new_sp) * amt
                 else:
                     c += {new_sp: amt}
-            return PeriodicSite(c, site.frac_coords, latt,
-                                properties=site.properties)
+            return c
 
-        self._sites = list(map(mod_site, self._sites))
+        self._map_species(mod_species)
 
     def replace(self, i, species, coords=None, coords_are_cartesian=False,
                 properties=None):
@@ -2179,7 +2488,7 @@ class Structure(IStructure, collections.MutableSequence):
         occupations.
 
         Args:
-            i (int): Index of the site in the _sites list.
+            i (int): Index of the site in the structure.
             species (species-like): Species of replacement site
             coords (3x1 array): Coordinates of replacement site. If None,
                 the current coordinates are assumed.
@@ -2197,7 +2506,7 @@ class Structure(IStructure, collections.MutableSequence):
 
         new_site = PeriodicSite(species, frac_coords, self._lattice,
                                 properties=properties)
-        self._sites[i] = new_site
+        self._put_site(i, new_site)
 
     def remove_species(self, species):
         """
@@ -2206,17 +2515,9 @@ class Structure(IStructure, collections.MutableSequence):
         Args:
             species: Sequence of species to remove, e.g., ["Li", "Na"].
         """
-        new_sites = []
         species = list(map(get_el_sp, species))
-
-        for site in self._sites:
-            new_sp_occu = {sp: amt for sp, amt in site.species_and_occu.items()
-                           if sp not in species}
-            if len(new_sp_occu) > 0:
-                new_sites.append(PeriodicSite(
-                    new_sp_occu, site.frac_coords, self._lattice,
-                    properties=site.properties))
-        self._sites = new_sites
+        self._map_species(lambda sp_and_occu: {
+            sp: amt for sp, amt in sp_and_occu.items() if sp not in species})
 
     def remove_sites(self, indices):
         """
@@ -2225,8 +2526,8 @@ class Structure(IStructure, collections.MutableSequence):
         Args:
             indices: Sequence of indices of sites to delete.
         """
-        self._sites = [s for i, s in enumerate(self._sites)
-                       if i not in indices]
+        indices = set(indices)
+        self._take([i for i in range(len(self)) if i not in indices])
 
     def apply_operation(self, symmop):
         """
@@ -2239,13 +2540,10 @@ class Structure(IStructure, collections.MutableSequence):
         """
         self._lattice = Lattice([symmop.apply_rotation_only(row)
                                  for row in self._lattice.matrix])
-
-        def operate_site(site):
-            new_cart = symmop.operate(site.coords)
-            new_frac = self._lattice.get_fractional_coords(new_cart)
-            return PeriodicSite(site.species_and_occu, new_frac, self._lattice,
-                                properties=site.properties)
-        self._sites = list(map(operate_site, self._sites))
+        new_cart = symmop.operate_multi(self._cart_coords).reshape((-1, 3))
+        self._frac_coords = self._lattice.get_fractional_coords(new_cart)
+        self._cart_coords = self._lattice.get_cartesian_coords(
+            self._frac_coords)
 
     def modify_lattice(self, new_lattice):
         """
@@ -2256,13 +2554,8 @@ class Structure(IStructure, collections.MutableSequence):
             new_lattice (Lattice): New lattice
         """
         self._lattice = new_lattice
-        new_sites = []
-        for site in self._sites:
-            new_sites.append(PeriodicSite(site.species_and_occu,
-                                          site.frac_coords,
-                                          self._lattice,
-                                          properties=site.properties))
-        self._sites = new_sites
+        self._cart_coords = new_lattice.get_cartesian_coords(
+            self._frac_coords).reshape((-1, 3))
 
     def apply_strain(self, strain):
         """
@@ -2294,7 +2587,10 @@ class Structure(IStructure, collections.MutableSequence):
             reverse (bool): If set to True, then the list elements are sorted
                 as if each comparison were reversed.
         """
-        self._sites = sorted(self._sites, key=key, reverse=reverse)
+        sites = self.sites
+        keys = sites if key is None else [key(site) for site in sites]
+        self._take(sorted(range(len(sites)), key=keys.__getitem__,
+                          reverse=reverse))
 
     def translate_sites(self, indices, vector, frac_coords=True,
                         to_unit_cell=True):
@@ -2313,19 +2609,18 @@ class Structure(IStructure, collections.MutableSequence):
         """
         if not isinstance(indices, collections.Iterable):
             indices = [indices]
+        indices = np.array(list(indices), dtype=int)
 
-        for i in indices:
-            site = self._sites[i]
-            if frac_coords:
-                fcoords = site.frac_coords + vector
-            else:
-                fcoords = self._lattice.get_fractional_coords(site.coords
-                                                              + vector)
-            new_site = PeriodicSite(site.species_and_occu, fcoords,
-                                    self._lattice, to_unit_cell=to_unit_cell,
-                                    coords_are_cartesian=False,
-                                    properties=site.properties)
-            self._sites[i] = new_site
+        if frac_coords:
+            fcoords = self._frac_coords[indices] + vector
+        else:
+            fcoords = self._lattice.get_fractional_coords(
+                self._cart_coords[indices] + vector)
+        if to_unit_cell:
+            fcoords = np.mod(fcoords, 1)
+        self._frac_coords[indices] = fcoords
+        self._cart_coords[indices] = self._lattice.get_cartesian_coords(
+            fcoords)
 
     def perturb(self, distance):
         """
@@ -2342,8 +2637,9 @@ class Structure(IStructure, collections.MutableSequence):
             vnorm = np.linalg.norm(vector)
             return vector / vnorm * distance if vnorm != 0 else get_rand_vec()
 
-        for i in range(len(self._sites)):
-            self.translate_sites([i], get_rand_vec(), frac_coords=False)
+        vectors = np.array([get_rand_vec() for i in range(len(self))])
+        self.translate_sites(range(len(self)), vectors.reshape((-1, 3)),
+                             frac_coords=False)
 
     def add_oxidation_state_by_element(self, oxidation_states):
         """
@@ -2353,18 +2649,15 @@ class Structure(IStructure, collections.MutableSequence):
             oxidation_states (dict): Dict of oxidation states.
                 E.g., {"Li":1, "Fe":2, "P":5, "O":-2}
         """
-        try:
-            for i, site in enumerate(self._sites):
-                new_sp = {}
-                for el, occu in site.species_and_occu.items():
-                    sym = el.symbol
-                    new_sp[Specie(sym, oxidation_states[sym])] = occu
-                new_site = PeriodicSite(new_sp, site.frac_coords,
-                                        self._lattice,
-                                        coords_are_cartesian=False,
-                                        properties=site.properties)
-                self._sites[i] = new_site
+        def add_oxi(sp_and_occu):
+            new_sp = {}
+            for el, occu in sp_and_occu.items():
+                sym = el.symbol
+                new_sp[Specie(sym, oxidation_states[sym])] = occu
+            return new_sp
 
+        try:
+            self._map_species(add_oxi)
         except KeyError:
             raise ValueError("Oxidation state of all elements must be "
                              "specified in the dictionary.")
@@ -2378,35 +2671,32 @@ class Structure(IStructure, collections.MutableSequence):
                 E.g., [1, 1, 1, 1, 2, 2, 2, 2, 5, 5, 5, 5, -2, -2, -2, -2]
         """
         try:
-            for i, site in enumerate(self._sites):
+            new_species = []
+            for i, sp_and_occu in enumerate(self.species_and_occu):
                 new_sp = {}
-                for el, occu in site.species_and_occu.items():
+                for el, occu in sp_and_occu.items():
                     sym = el.symbol
                     new_sp[Specie(sym, oxidation_states[i])] = occu
-                new_site = PeriodicSite(new_sp, site.frac_coords,
-                                        self._lattice,
-                                        coords_are_cartesian=False,
-                                        properties=site.properties)
-                self._sites[i] = new_site
-
+                new_species.append(new_sp)
         except IndexError:
             raise ValueError("Oxidation state of all sites must be "
                              "specified in the dictionary.")
+        table, index = get_species_table(new_species)
+        self._set_columns(table, index, self._frac_coords, self._cart_coords,
+                          self._site_properties)
 
     def remove_oxidation_states(self):
         """
         Removes oxidation states from a structure.
         """
-        for i, site in enumerate(self._sites):
+        def remove_oxi(sp_and_occu):
             new_sp = collections.defaultdict(float)
-            for el, occu in site.species_and_occu.items():
+            for el, occu in sp_and_occu.items():
                 sym = el.symbol
                 new_sp[Element(sym)] += occu
-            new_site = PeriodicSite(new_sp, site.frac_coords,
-                                    self._lattice,
-                                    coords_are_cartesian=False,
-                                    properties=site.properties)
-            self._sites[i] = new_site
+            return new_sp
+
+        self._map_species(remove_oxi)
 
     def make_supercell(self, scaling_matrix):
         """
@@ -2435,15 +2725,15 @@ class Structure(IStructure, collections.MutableSequence):
         f_lat = lattice_points_in_supercell(scale_matrix)
         c_lat = new_lattice.get_cartesian_coords(f_lat)
 
-        new_sites = []
-        for site in self:
-            for v in c_lat:
-                s = PeriodicSite(site.species_and_occu, site.coords + v,
-                                 new_lattice, properties=site.properties,
-                                 coords_are_cartesian=True, to_unit_cell=True)
-                new_sites.append(s)
-        self._sites = new_sites
+        # All images of all sites at once, in the order site by site
+        cart_coords = self._cart_coords[:, None, :] + c_lat[None, :, :]
+        frac_coords = np.mod(new_lattice.get_fractional_coords(
+            cart_coords.reshape((-1, 3))), 1)
+
+        self._take(np.repeat(np.arange(len(self)), len(c_lat)))
         self._lattice = new_lattice
+        self._frac_coords = frac_coords
+        self._cart_coords = new_lattice.get_cartesian_coords(frac_coords)
 
     def scale_lattice(self, volume):
         """
@@ -2470,7 +2760,7 @@ class Structure(IStructure, collections.MutableSequence):
 
         sites = []
         for c in np.unique(clusters):
-            inds = np.argwhere(clusters == c)
+            inds = np.where(clusters == c)[0]
             species = Composition()
             coords = self[inds[0]].frac_coords
             n = len(inds)
@@ -2480,7 +2770,7 @@ class Structure(IStructure, collections.MutableSequence):
                 coords += (offset - np.round(offset)) / n
             sites.append(PeriodicSite(species, coords, self.lattice))
 
-        self._sites = sites
+        self._set_sites(sites)
 
 
 class Molecule(IMolecule, collections.MutableSequence):
@@ -19,10 +19,11 @@ __date__ = "Nov 10, 2012"
 
 import unittest
 
+import numpy as np
 
-from pymatgen.core.periodic_table import Element
+from pymatgen.core.periodic_table import Element, Specie
 from pymatgen.core.composition import Composition, CompositionError, \
-    ChemicalPotential
+    ChemicalPotential, CompositionMatrix
 import random
 
 
@@ -274,6 +275,34 @@ class CompositionTest(unittest.TestCase):
         self.assertFalse(self.comp[0].__ne__(self.comp[0]))
         self.assertTrue(self.comp[0].__ne__(self.comp[1]))
 
+    def test_species_order(self):
+        c1 = Composition("Fe2O3")
+        c2 = Composition("O3Fe2")
+        self.assertEqual(c1, c2)
+        self.assertEqual(hash(c1), hash(c2))
+        self.assertTrue(c1.almost_equals(c2))
+        self.assertEqual((c1 + c2).formula, "Fe4 O6")
+        self.assertEqual((c1 - c2).formula, "")
+        self.assertNotEqual(c1, Composition("Fe2O4"))
+        #integer amounts give the same output as floats
+        c3 = Composition({"Fe": 2}) + Composition({"O": 3})
+        self.assertEqual(c3.as_dict(), {"Fe": 2.0, "O": 3.0})
+        self.assertIsInstance(c3["Fe"], float)
+        self.assertEqual(c3.formula, "Fe2 O3")
+        self.assertEqual(c3, c1)
+
+    def test_mixed_species(self):
+        comp = Composition({Specie("Fe", 2): 1, Specie("Fe", 3): 2,
+                            Element("O"): 4})
+        self.assertEqual(comp[Specie("Fe", 3)], 2)
+        self.assertEqual(comp[Specie("Fe", 2)], 1)
+        self.assertEqual(comp["Fe"], 0)
+        self.assertEqual(comp[Specie("O", -2)], 0)
+        self.assertEqual(comp.element_composition, Composition("Fe3O4"))
+        self.assertNotEqual(comp, Composition({Specie("Fe", 3): 1,
+                                               Specie("Fe", 2): 2,
+                                               Element("O"): 4}))
+
     def test_fractional_composition(self):
         for c in self.comp:
             self.assertAlmostEqual(c.fractional_composition.num_atoms, 1)
@@ -325,6 +354,31 @@ class CompositionTest(unittest.TestCase):
             self.assertEqual(Composition(k).reduced_formula, v)
 
 
+class CompositionMatrixTest(unittest.TestCase):
+
+    def test_init(self):
+        comps = [Composition("Li3Fe2(PO4)3"), Composition("LiMn2O4"),
+                 Composition("O2"),
+                 Composition({"Fe": -1, "O": 1}, allow_negative=True)]
+        m = CompositionMatrix(comps)
+        self.assertEqual(len(m), 4)
+        self.assertEqual(set(m.elements), {Element(el) for el in
+                                           ("Li", "Fe", "P", "O", "Mn")})
+        for i, comp in enumerate(comps):
+            for j, el in enumerate(m.elements):
+                self.assertAlmostEqual(m.amounts[i, j], comp[el])
+                self.assertAlmostEqual(m.atomic_fractions[i, j],
+                                       comp.get_atomic_fraction(el))
+                self.assertAlmostEqual(m.fractional_amounts[i, j],
+                                       comp.fractional_composition[el])
+
+        m = CompositionMatrix(comps, ["O", "Li"])
+        self.assertEqual(m.get_column("Li"), 1)
+        self.assertTrue(np.allclose(m.atomic_fractions[:2],
+                                    [[12 / 20, 3 / 20], [4 / 7, 1 / 7]]))
+        self.assertTrue(np.allclose(m.num_atoms, [20, 7, 2, 2]))
+
+
 class ChemicalPotentialTest(unittest.TestCase):
 
     def test_init(self):
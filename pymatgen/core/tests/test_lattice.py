@@ -316,6 +316,22 @@ class LatticeTestCase(PymatgenTest):
         self.assertEqual(len(latt.get_points_in_sphere(
             pts, [0.5, 0.5, 0.5], 0.5)), 515)
 
+        fcoords, dists, inds, images = latt.get_points_in_sphere(
+            pts, [0.5, 0.5, 0.5], 0.5, zip_results=False)
+        self.assertEqual(len(dists), 515)
+        self.assertArrayAlmostEqual(np.array(pts)[inds] + images, fcoords)
+        self.assertTrue(np.all(dists <= 0.5))
+
+        #Streaming in small blocks should give identical results.
+        blocks = list(latt.iter_points_in_sphere(pts, [0.5, 0.5, 0.5], 0.5,
+                                                 max_memory=10000))
+        self.assertTrue(len(blocks) > 1)
+        self.assertArrayAlmostEqual(np.concatenate([b[0] for b in blocks]),
+                                    fcoords)
+        self.assertArrayEqual(np.concatenate([b[2] for b in blocks]), inds)
+        self.assertEqual(len(latt.get_points_in_sphere(
+            pts, [0.5, 0.5, 0.5], 0.5, max_memory=10000)), 515)
+
     def test_get_all_distances(self):
         fcoords = np.array([[0.3, 0.3, 0.5],
                             [0.1, 0.1, 0.3],
@@ -0,0 +1,97 @@
+# coding: utf-8
+
+from __future__ import division, unicode_literals
+
+import itertools
+
+import numpy as np
+
+from pymatgen.core.lattice import Lattice
+from pymatgen.core.neighbors import find_neighbors, iter_neighbors, \
+    get_neighbor_list_engine, CellListEngine, KDTreeEngine
+from pymatgen.util.testing import PymatgenTest
+
+
+def brute_force_neighbors(lattice, fcoords, centers, r):
+    """
+    Reference implementation looping over a generous range of images.
+    """
+    fcoords = np.array(fcoords)
+    pairs = set()
+    rng = range(-6, 7)
+    for image in itertools.product(rng, rng, rng):
+        coords = lattice.get_cartesian_coords(fcoords + image)
+        for i, c in enumerate(centers):
+            dists = np.linalg.norm(coords - c, axis=1)
+            for j in np.where(dists <= r)[0]:
+                pairs.add((i, j) + tuple(image))
+    return pairs
+
+
+class NeighborListEngineTest(PymatgenTest):
+
+    def setUp(self):
+        self.lattice = Lattice([[3.2, 0.3, 0.1], [1.1, 4.1, 0],
+                                [0.5, -0.7, 3.8]])
+        np.random.seed(42)
+        self.fcoords = np.random.uniform(-1.2, 2.1, (7, 3))
+        self.centers = self.lattice.get_cartesian_coords(
+            np.random.uniform(-1, 2, (4, 3)))
+
+    def test_find_neighbors(self):
+        r = 4.3
+        ref = brute_force_neighbors(self.lattice, self.fcoords,
+                                    self.centers, r)
+        for engine in ["cell_list", "kdtree"]:
+            c, p, images, dists = find_neighbors(
+                self.lattice, self.fcoords, self.centers, r, engine=engine)
+            found = set((i, j) + tuple(im)
+                        for i, j, im in zip(c, p, images))
+            self.assertEqual(found, ref)
+            coords = self.lattice.get_cartesian_coords(self.fcoords[p] +
+                                                       images)
+            self.assertArrayAlmostEqual(
+                np.linalg.norm(coords - self.centers[c], axis=1), dists)
+            #Output should be sorted by center index.
+            self.assertTrue(np.all(np.diff(c) >= 0))
+
+    def test_max_memory(self):
+        r = 4.3
+        ref = find_neighbors(self.lattice, self.fcoords, self.centers, r)
+        blocks = list(iter_neighbors(self.lattice, self.fcoords,
+                                     self.centers, r, max_memory=2000))
+        self.assertTrue(len(blocks) > 1)
+        chunked = find_neighbors(self.lattice, self.fcoords, self.centers, r,
+                                 max_memory=2000)
+        for a, b in zip(ref, chunked):
+            self.assertArrayAlmostEqual(a, b)
+
+    def test_large_radius(self):
+        #Radius much larger than the cell.
+        latt = Lattice.cubic(1)
+        c, p, images, dists = find_neighbors(latt, [[0, 0, 0]], [[0, 0, 0]],
+                                             3)
+        self.assertEqual(len(c), 123)
+        self.assertAlmostEqual(np.min(dists), 0)
+
+    def test_empty(self):
+        c, p, images, dists = find_neighbors(self.lattice, [], self.centers,
+                                             3)
+        self.assertEqual(len(c), 0)
+        self.assertEqual(images.shape, (0, 3))
+        c, p, images, dists = find_neighbors(self.lattice, self.fcoords,
+                                             self.centers, 0.01)
+        self.assertEqual(len(dists), 0)
+
+    def test_get_neighbor_list_engine(self):
+        self.assertIsInstance(get_neighbor_list_engine(), CellListEngine)
+        self.assertIsInstance(get_neighbor_list_engine("kdtree"),
+                              KDTreeEngine)
+        engine = KDTreeEngine()
+        self.assertIs(get_neighbor_list_engine(engine), engine)
+        self.assertRaises(ValueError, get_neighbor_list_engine, "foo")
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
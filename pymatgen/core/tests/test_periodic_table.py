@@ -6,8 +6,10 @@ import unittest
 import pickle
 import collections
 
+import numpy as np
+
 from pymatgen.core.periodic_table import Element, Specie, DummySpecie, \
-    PeriodicTable, get_el_sp
+    PeriodicTable, get_el_sp, get_element_properties
 from copy import deepcopy
 
 
@@ -24,6 +26,22 @@ class ElementTestCase(unittest.TestCase):
         #Test caching
         self.assertEqual(id(Element("Fe")), id(Element("Fe")))
 
+    def test_get_element_properties(self):
+        els = [Element(sym) for sym in ("H", "Li", "Fe", "O", "U", "He")]
+        zs = np.array([el.Z for el in els])
+        for prop in ("X", "row", "group", "average_ionic_radius",
+                     "min_oxidation_state", "max_oxidation_state"):
+            self.assertTrue(np.allclose(get_element_properties(zs, prop),
+                                        [getattr(el, prop) for el in els]))
+        self.assertTrue(np.allclose(get_element_properties(zs,
+                                                           "atomic_mass"),
+                                    [float(el.atomic_mass) for el in els]))
+        radii = get_element_properties(zs, "atomic_radius")
+        self.assertAlmostEqual(radii[2], Element("Fe").atomic_radius)
+        self.assertTrue(np.isnan(radii[5]))
+        self.assertEqual(get_element_properties(26, "group"), 8)
+        self.assertRaises(ValueError, get_element_properties, zs, "spam")
+
     def test_dict(self):
         fe = Element("Fe")
         d = fe.as_dict()
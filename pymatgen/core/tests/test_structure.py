@@ -9,9 +9,13 @@ from pymatgen.core.operations import SymmOp
 from pymatgen.core.structure import IStructure, Structure, IMolecule, \
     StructureError, Molecule
 from pymatgen.core.lattice import Lattice
+from pymatgen.core.sites import PeriodicSite
 import random
 import warnings
 import os
+import pickle
+
+import numpy as np
 
 
 class IStructureTest(PymatgenTest):
@@ -60,6 +64,22 @@ class IStructureTest(PymatgenTest):
                                       {Specie('Mg', 2): 0.8}], coords)
         self.assertEqual(s.composition.formula, 'Mg0.8 O1')
 
+    def test_array_init(self):
+        coords = np.array([[0, 0, 0], [0.75, 0.5, 0.75], [1.25, 0, -0.5]])
+        s = IStructure(self.lattice, np.array([14, 14, 8]), coords,
+                       to_unit_cell=True,
+                       site_properties={"magmom": [1, 2, 3]})
+        self.assertEqual(s.composition.formula, "Si2 O1")
+        self.assertArrayAlmostEqual(s.frac_coords[2], [0.25, 0, 0.5])
+        self.assertArrayAlmostEqual(
+            s.cart_coords, self.lattice.get_cartesian_coords(s.frac_coords))
+        self.assertEqual(s.site_properties["magmom"], [1, 2, 3])
+        s2 = IStructure(self.lattice, ["Si", "Si", "O"], s.cart_coords,
+                        coords_are_cartesian=True,
+                        site_properties=s.site_properties)
+        for site1, site2 in zip(s, s2):
+            self.assertEqual(site1, site2)
+
     def test_get_sorted_structure(self):
         coords = list()
         coords.append([0, 0, 0])
@@ -273,6 +293,7 @@ class IStructureTest(PymatgenTest):
         coords = [[0, 0, 0], [0.5, 0.5, 0], [0, 0.5, 0.5], [0.5, 0, 0.5]]
         fcc_ag = Structure(Lattice.cubic(4.09), ["Ag"] * 4, coords)
         fcc_ag.make_supercell([2, 2, 2])
+        self.assertEqual(len(fcc_ag.get_pure_translations()), 32)
         fcc_ag_prim = fcc_ag.get_primitive_structure()
         self.assertEqual(len(fcc_ag_prim), 1)
         self.assertAlmostEqual(fcc_ag_prim.volume, 17.10448225)
@@ -319,6 +340,29 @@ class IStructureTest(PymatgenTest):
         s.make_supercell([2,2,2])
         self.assertEqual(sum(map(len, s.get_all_neighbors(3))), 976)
 
+    def test_get_neighbor_list(self):
+        s = self.struct
+        r = random.uniform(3, 6)
+        all_nn = s.get_all_neighbors(r, True)
+        c_inds, nn_inds, images, dists, vectors = s.get_neighbor_list(
+            r, return_vectors=True)
+        self.assertEqual(len(c_inds), sum(map(len, all_nn)))
+        for i, nns in enumerate(all_nn):
+            self.assertEqual(sorted([nn[2] for nn in nns]),
+                             sorted(nn_inds[c_inds == i]))
+        self.assertArrayAlmostEqual(np.linalg.norm(vectors, axis=1), dists)
+        nn_coords = s.lattice.get_cartesian_coords(
+            s.frac_coords[nn_inds] + images)
+        self.assertArrayAlmostEqual(nn_coords - s.cart_coords[c_inds],
+                                    vectors)
+
+        c_inds, nn_inds, images, dists = s.get_neighbor_list(
+            r, sites=[s[1]], exclude_self=False)
+        self.assertTrue(np.all(c_inds == 0))
+        self.assertEqual(len(dists), len(s.get_sites_in_sphere(s[1].coords,
+                                                               r)))
+        self.assertAlmostEqual(np.min(dists), 0)
+
     def test_get_all_neighbors_outside_cell(self):
         s = Structure(Lattice.cubic(2), ['Li', 'Li', 'Li', 'Si'],
                       [[3.1] * 3, [0.11] * 3, [-1.91] * 3, [0.5] * 3])
@@ -388,6 +432,34 @@ class StructureTest(PymatgenTest):
     def test_non_hash(self):
         self.assertRaises(TypeError, dict, [(self.structure, 1)])
 
+    def test_site_views(self):
+        s = self.structure
+        s.add_site_property("magmom", [1, 2])
+        fcoords = s.frac_coords
+        fcoords[0] = [0.1, 0.1, 0.1]
+        self.assertArrayAlmostEqual(s.frac_coords[0], [0, 0, 0])
+        self.assertEqual(s[0], s[0])
+        s.append("Li", [0.2, 0.2, 0.2], properties={"charge": 1})
+        self.assertEqual(s[0].properties, {"magmom": 1})
+        self.assertEqual(s[2].properties, {"charge": 1})
+        self.assertEqual(s.site_properties["charge"], [None, None, 1])
+        s2 = pickle.loads(pickle.dumps(s))
+        self.assertEqual(s2[1].properties, {"magmom": 2})
+        self.assertIn(s[2], s2)
+        self.assertNotIn(PeriodicSite("Li", [0.2, 0.2, 0.2], s.lattice), s2)
+        del s[2]
+        self.assertNotIn("charge", s.site_properties)
+        s.translate_sites([1], [0.5, 0, 0])
+        s.make_supercell([2, 1, 1])
+        s.apply_operation(SymmOp.from_axis_angle_and_translation(
+            [0, 0, 1], 30))
+        self.assertEqual(len(s), 4)
+        self.assertArrayAlmostEqual(s.cart_coords,
+                                    [site.coords for site in s])
+        self.assertArrayAlmostEqual(
+            s.frac_coords, s.lattice.get_fractional_coords(s.cart_coords))
+        self.assertEqual(s.site_properties["magmom"], [1, 1, 2, 2])
+
     def test_sort(self):
         s = self.structure
         s[0] = "F"
@@ -560,6 +632,19 @@ class StructureTest(PymatgenTest):
         self.assertEqual(self.structure.formula, "Si32")
         self.assertArrayAlmostEqual(self.structure.lattice.abc,
                                     [15.360792, 35.195996, 7.680396], 5)
+        self.assertTrue(np.all(self.structure.frac_coords >= 0))
+        self.assertTrue(np.all(self.structure.frac_coords < 1))
+        self.assertArrayAlmostEqual(
+            self.structure.cart_coords,
+            self.structure.lattice.get_cartesian_coords(
+                self.structure.frac_coords))
+
+    def test_make_supercell_properties(self):
+        s = self.structure.copy(site_properties={"magmom": [5, -5]})
+        s.make_supercell([2, 1, 1])
+        self.assertEqual(s.site_properties["magmom"], [5, 5, -5, -5])
+        #images must not share the properties of the original site
+        self.assertIsNot(s[0]._properties, s[1]._properties)
 
     def test_disordered_supercell_primitive_cell(self):
         l = Lattice.cubic(2)
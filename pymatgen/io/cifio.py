@@ -16,8 +16,8 @@ __status__ = "Production"
 __date__ = "Sep 23, 2011"
 
 
-import math
 import re
+import itertools
 import textwrap
 import warnings
 from collections import OrderedDict, deque
@@ -29,7 +29,6 @@ import numpy as np
 
 from pymatgen.core.periodic_table import Element, Specie
 from monty.io import zopen
-from pymatgen.util.coord_utils import in_coord_list_pbc
 from monty.string import remove_non_ascii
 from pymatgen.core.lattice import Lattice
 from pymatgen.core.structure import Structure
@@ -157,6 +156,9 @@ class CifBlock(object):
             if l.startswith(";"):
                 multiline = True
                 ml.append(l[1:].strip())
+            elif "'" not in l and '"' not in l:
+                #without quotes, the regex gives the same tokens as split
+                q.extend((s, "", "") for s in l.split())
             else:
                 for s in p.findall(l):
                     q.append(s)  # s is tuple. location of the data in the tuple
@@ -193,8 +195,11 @@ class CifBlock(object):
                 n = len(items) // len(columns)
                 assert len(items) % n == 0
                 loops.append(columns)
-                for k, v in zip(columns * n, items):
-                    data[k].append(v.strip())
+                #fill the loop column by column
+                items = items[:n * len(columns)]
+                for i, k in enumerate(columns):
+                    data[k].extend(v.strip()
+                                   for v in items[i::len(columns)])
             elif "".join(s).strip() != "":
                 warnings.warn("Possible error in cif format"
                               " error at {}".format("".join(s).strip()))
@@ -234,6 +239,45 @@ class CifFile(object):
         with zopen(filename, "rt") as f:
             return cls.from_string(f.read())
 
+    @staticmethod
+    def iter_block_strings(stream):
+        """
+        Iterates over the data blocks of a cif, reading one block at a time
+        from a stream. Unlike from_string, the whole file is never held in
+        memory, so this works for concatenated cif exports of any size.
+
+        Args:
+            stream: File-like object, or any iterable of lines.
+
+        Yields:
+            The string of each data block, starting with data_.
+        """
+        lines = None
+        for l in stream:
+            if l.startswith("data_"):
+                if lines:
+                    yield "".join(lines)
+                lines = []
+            if lines is not None:
+                lines.append(l)
+        if lines:
+            yield "".join(lines)
+
+    @classmethod
+    def iter_blocks(cls, stream):
+        """
+        Iterates over the CifBlocks of a cif, reading one block at a time
+        from a stream.
+
+        Args:
+            stream: File-like object, or any iterable of lines.
+
+        Yields:
+            CifBlock
+        """
+        for block_string in cls.iter_block_strings(stream):
+            yield CifBlock.from_string(block_string)
+
 
 class CifParser(object):
     """
@@ -273,13 +317,44 @@ class CifParser(object):
         """
         Generate unique coordinates using coord and symmetry positions.
         """
-        coords = []
-        for op in self.symmetry_operations:
-            coord = op.operate(coord_in)
-            coord = np.array([i - math.floor(i) for i in coord])
-            if not in_coord_list_pbc(coords, coord, atol=1e-3):
-                coords.append(coord)
-        return coords
+        return list(self._unique_coords_many([coord_in])[0])
+
+    def _unique_coords_many(self, coords, atol=1e-3):
+        """
+        Generate the unique coordinates generated by the symmetry positions
+        from many coordinates at once. All symmetry operations are applied to
+        all coordinates in a single broadcast. The images of each coordinate
+        are deduplicated by hashing their rounded coordinates, followed by a
+        periodic distance check of the remaining images, which merges images
+        that were rounded to different sides of a grid boundary.
+
+        Args:
+            coords: Nx3 array of fractional coordinates.
+            atol (float): Tolerance for two images to be the same coordinate.
+
+        Returns:
+            List of arrays of the unique images of each coordinate, in the
+            order of the symmetry operations that first generate them.
+        """
+        affine = np.array([op.affine_matrix for op in
+                           self.symmetry_operations])
+        coords = np.array(coords, dtype=float).reshape((-1, 3))
+        images = np.einsum("oij,sj->soi", affine[:, :3, :3], coords) \
+            + affine[:, :3, 3]
+        images -= np.floor(images)
+
+        ngrid = int(round(1 / atol))
+        all_unique = []
+        for site_images in images:
+            keys = np.round(site_images * ngrid).astype(np.int64) % ngrid
+            keys = keys[:, 0] + ngrid * (keys[:, 1] + ngrid * keys[:, 2])
+            inds = np.sort(np.unique(keys, return_index=True)[1])
+            unique = site_images[inds]
+            d = unique[:, None, :] - unique[None, :, :]
+            d -= np.round(d)
+            close = np.all(np.abs(d) < atol, axis=-1)
+            all_unique.append(unique[~np.any(np.tril(close, -1), axis=1)])
+        return all_unique
 
     def _get_structure(self, data, primitive):
         """
@@ -352,12 +427,10 @@ class CifParser(object):
                     coord_to_species[coord][el] = occu
 
         allspecies = []
-        allcoords = []
-
-        for coord, species in coord_to_species.items():
-            coords = self._unique_coords(coord)
-            allcoords.extend(coords)
+        all_unique = self._unique_coords_many(list(coord_to_species.keys()))
+        for coords, species in zip(all_unique, coord_to_species.values()):
             allspecies.extend(len(coords) * [species])
+        allcoords = np.concatenate(all_unique) if all_unique else []
 
         #rescale occupancies if necessary
         for species in allspecies:
@@ -395,6 +468,63 @@ class CifParser(object):
 
         return structures
 
+    @staticmethod
+    def iter_structures(filename, primitive=True, occupancy_tolerance=1.,
+                        ncpus=None, chunksize=8):
+        """
+        Iterates over the structures in a cif, reading and parsing one data
+        block at a time. Unlike get_structures, the whole file is never held
+        in memory, which makes this suitable for large multi-block exports
+        (e.g., from the ICSD).
+
+        Args:
+            filename (str): Cif filename, or file-like object. bzipped or
+                gzipped cifs are fine too.
+            primitive (bool): Set to False to return conventional unit cells.
+                Defaults to True.
+            occupancy_tolerance (float): If total occupancy of a site is
+                between 1 and occupancy_tolerance, the occupancies will be
+                scaled down to 1.
+            ncpus (int): Number of processes to parse the data blocks with.
+                Defaults to None, which means serial processing.
+            chunksize (int): Number of data blocks sent to a process at a
+                time when ncpus is set.
+
+        Yields:
+            Structures, in the order of the data blocks in the cif.
+        """
+        if isinstance(filename, six.string_types):
+            with zopen(filename, "rt") as f:
+                for s in CifParser.iter_structures(
+                        f, primitive, occupancy_tolerance, ncpus, chunksize):
+                    yield s
+            return
+
+        args = ((b, primitive, occupancy_tolerance)
+                for b in CifFile.iter_block_strings(filename))
+        if not ncpus:
+            for a in args:
+                for s in _get_block_structures(a):
+                    yield s
+            return
+
+        import multiprocessing as mp
+        pool = mp.Pool(ncpus)
+        try:
+            #Pool.imap reads its whole input ahead, so the blocks are handed
+            #over in windows to keep the memory bounded.
+            while True:
+                window = list(itertools.islice(args, 4 * ncpus * chunksize))
+                if not window:
+                    break
+                for structures in pool.imap(_get_block_structures, window,
+                                            chunksize):
+                    for s in structures:
+                        yield s
+        finally:
+            pool.terminate()
+            pool.join()
+
     def as_dict(self):
         d = OrderedDict()
         for k, v in self._cif.data.items():
@@ -555,3 +685,13 @@ def str2float(text):
     except TypeError:
         if isinstance(text, list) and len(text) == 1:
             return float(re.sub("\(.+\)", "", text[0]))
+
+
+def _get_block_structures(args):
+    """
+    Parses the structures of a single data block. Module level so that it can
+    be used with multiprocessing.
+    """
+    block_string, primitive, occupancy_tolerance = args
+    parser = CifParser.from_string(block_string, occupancy_tolerance)
+    return parser.get_structures(primitive)
@@ -489,6 +489,29 @@ loop_
         for l1, l2 in zip(str(writer).split("\n"), ans.split("\n")):
             self.assertEqual(l1.strip(), l2.strip())
 
+    def test_iter_structures(self):
+        filename = os.path.join(test_dir, 'MultiStructure.cif')
+        structures = CifParser(filename).get_structures()
+        self.assertEqual(len(structures), 2)
+        for ncpus in [None, 2]:
+            iterated = list(CifParser.iter_structures(filename, ncpus=ncpus))
+            self.assertEqual(len(iterated), 2)
+            for s1, s2 in zip(structures, iterated):
+                self.assertEqual(s1, s2)
+        with open(filename) as f:
+            iterated = CifParser.iter_structures(f, primitive=False)
+            self.assertEqual(next(iterated).formula,
+                             CifParser(filename).get_structures(False)[0]
+                             .formula)
+
+    def test_unique_coords_many(self):
+        parser = CifParser(os.path.join(test_dir, 'Li2O.cif'))
+        parser.get_structures(False)
+        orbits = parser._unique_coords_many([[0, 0, 0], [0.25, 0.25, 0.25],
+                                             [1e-4, 0.9999, 0]])
+        self.assertEqual([len(o) for o in orbits], [4, 8, 4])
+        self.assertTrue(np.allclose(orbits[0][0], [0, 0, 0]))
+
     def test_primes(self):
         parser = CifParser(os.path.join(test_dir, 'C26H16BeN2O2S2.cif'))
         for s in parser.get_structures(False):
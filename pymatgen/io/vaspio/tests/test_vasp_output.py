@@ -16,7 +16,10 @@ __date__ = "Jul 16, 2012"
 
 import unittest
 import os
+import gzip
 import json
+import shutil
+import tempfile
 import numpy as np
 import warnings
 
@@ -113,10 +116,10 @@ class VasprunTest(unittest.TestCase):
 
         self.assertTrue(vasprun_ggau.is_hubbard)
         self.assertEqual(vasprun_ggau.hubbards["Fe"], 4.3)
-        self.assertAlmostEqual(vasprun_ggau.projected_eigenvalues[(Spin.up, 0,
-                                                                   0, 96,
-                                                                   Orbital.s)],
-                               0.0032)
+        self.assertAlmostEqual(vasprun_ggau.projected_eigenvalues[Spin.up][
+                                   0, 0, 96, 0], 0.0032)
+        self.assertAlmostEqual(vasprun_ggau.projected_eigenvalues_dict[
+                                   (Spin.up, 0, 0, 96, Orbital.s)], 0.0032)
         d = vasprun_ggau.as_dict()
         self.assertEqual(d["elements"], ["Fe", "Li", "O", "P"])
         self.assertEqual(d["nelements"], 4)
@@ -205,6 +208,54 @@ class VasprunTest(unittest.TestCase):
         self.assertEqual(vbm['kpoint'].label, "\Gamma", "wrong vbm label")
         self.assertEqual(cbm['kpoint'].label, None, "wrong cbm label")
 
+    def test_lazy(self):
+        filepath = os.path.join(test_dir, 'vasprun.xml.unconverged')
+        vasprun = Vasprun(filepath, parse_projected_eigen=True)
+        vasprun_lazy = Vasprun(filepath, lazy=True)
+        self.assertNotIn("ionic_steps", vasprun_lazy.__dict__)
+        self.assertNotIn("eigenvalues", vasprun_lazy.__dict__)
+        self.assertEqual(vasprun_lazy.nionic_steps, vasprun.nionic_steps)
+        self.assertEqual(vasprun_lazy.final_energy, vasprun.final_energy)
+        self.assertFalse(vasprun_lazy.converged)
+        self.assertNotIn("ionic_steps", vasprun_lazy.__dict__)
+        self.assertEqual(vasprun_lazy.structures, vasprun.structures)
+        self.assertEqual(vasprun_lazy.eigenvalues, vasprun.eigenvalues)
+        self.assertEqual(vasprun.projected_eigenvalues[Spin.down].shape,
+                         (12, 75, 14, 9))
+        self.assertEqual(vasprun.projected_eigenvalues_dict[
+                             (Spin.down, 11, 74, 13, Orbital.dx2)],
+                         vasprun.projected_eigenvalues[Spin.down][
+                             11, 74, 13, 8])
+        self.assertTrue(np.array_equal(
+            vasprun_lazy.projected_eigenvalues[Spin.up],
+            vasprun.projected_eigenvalues[Spin.up]))
+        self.assertEqual(vasprun_lazy.as_dict(), vasprun.as_dict())
+        self.assertRaises(AttributeError, getattr, vasprun_lazy, "dielectric")
+
+        vasprun_skip = Vasprun(filepath, 2, 1)
+        vasprun_lazy = Vasprun(filepath, 2, 1, lazy=True)
+        self.assertEqual(vasprun_lazy.nionic_steps, vasprun_skip.nionic_steps)
+        self.assertEqual(vasprun_lazy.structures, vasprun_skip.structures)
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            gz_path = os.path.join(tmp_dir, "vasprun.xml.gz")
+            with open(filepath, "rb") as f:
+                with gzip.open(gz_path, "wb") as gz:
+                    gz.write(f.read())
+            self.assertEqual(Vasprun(gz_path, lazy=True).structures,
+                             vasprun.structures)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+        filepath = os.path.join(test_dir, 'vasprun.xml.dielectric')
+        vasprun = Vasprun(filepath)
+        vasprun_lazy = Vasprun(filepath, lazy=True)
+        self.assertEqual(vasprun_lazy.dielectric, vasprun.dielectric)
+        self.assertEqual(vasprun_lazy.final_structure, vasprun.final_structure)
+        self.assertEqual(vasprun_lazy.complete_dos.get_gap(),
+                         vasprun.complete_dos.get_gap())
+
     def test_sc_step_overflow(self):
         filepath = os.path.join(test_dir, 'vasprun.xml.sc_overflow')
         with warnings.catch_warnings(record=True) as w:
@@ -333,6 +384,20 @@ class LocpotTest(unittest.TestCase):
 
 class ChgcarTest(unittest.TestCase):
 
+    def test_read_dataset(self):
+        from six.moves import StringIO
+        from pymatgen.io.vaspio.vasp_output import VolumetricData
+        f = StringIO("1 2 3 4 5\n6 7 8\naugmentation occupancies 1 8\n")
+        data = VolumetricData._read_dataset(f, [2, 2, 2])
+        self.assertEqual(data[1, 1, 1], 8)
+        self.assertEqual(data[1, 0, 0], 2)
+        #the lines after the block are not read
+        self.assertEqual(next(f), "augmentation occupancies 1 8\n")
+        for s in ["1 2 3 4 5\n6 ******* 8\n1 2\n",
+                  "1 2 3 4 5\n6 7\n", "\n"]:
+            self.assertRaises(ValueError, VolumetricData._read_dataset,
+                              StringIO(s), [2, 2, 2])
+
     def test_init(self):
         filepath = os.path.join(test_dir, 'CHGCAR.nospin')
         chg = Chgcar.from_file(filepath)
@@ -353,6 +418,26 @@ class ChgcarTest(unittest.TestCase):
         myans = chg.get_integrated_diff(0, 3, 6)
         self.assertTrue(np.allclose(myans[:, 1], ans))
 
+    def test_write_file_and_cache(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            filepath = os.path.join(tmp_dir, "CHGCAR")
+            shutil.copy(os.path.join(test_dir, 'CHGCAR.spin'), filepath)
+            chg = Chgcar.from_file(filepath, cache=True)
+            self.assertEqual(chg.dim, (48, 48, 48))
+            self.assertTrue(os.path.exists(filepath + ".npy"))
+            cached = Chgcar.from_file(filepath, cache=True)
+            for k in ["total", "diff"]:
+                self.assertTrue(np.array_equal(cached.data[k], chg.data[k]))
+            self.assertEqual(cached.structure, chg.structure)
+
+            chg.write_file(os.path.join(tmp_dir, "CHGCAR.out"))
+            chg2 = Chgcar.from_file(os.path.join(tmp_dir, "CHGCAR.out"))
+            for k in ["total", "diff"]:
+                self.assertTrue(np.allclose(chg2.data[k], chg.data[k]))
+        finally:
+            shutil.rmtree(tmp_dir)
+
 
 class ProcarTest(unittest.TestCase):
 
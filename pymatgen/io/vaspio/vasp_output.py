@@ -23,10 +23,10 @@ import re
 import math
 import itertools
 import warnings
-from io import StringIO
+from io import StringIO, BytesIO
 import logging
 from collections import defaultdict
-from xml.etree.cElementTree import iterparse
+from xml.etree.cElementTree import iterparse, fromstring
 
 from six.moves import map, zip
 
@@ -118,6 +118,35 @@ def _parse_varray(elem):
     return [[float(i) for i in v.text.split()] for v in elem]
 
 
+def _parse_rows(rows):
+    """
+    Parses a sequence of <v> or <r> elements into a 2D numpy array. The text
+    of all rows is converted in a single call, which is much faster than
+    converting row by row for the large blocks in the dos, eigenvalues and
+    projected eigenvalues.
+
+    Args:
+        rows: Iterable of elements with whitespace-separated floats as text,
+            e.g., a <varray> or <set> element, or set.iter("r") for the rows
+            of nested sets.
+
+    Returns:
+        numpy array of shape (number of rows, number of columns).
+    """
+    texts = [r.text for r in rows]
+    if not texts:
+        return np.zeros((0, 0))
+    ncols = len(texts[0].split())
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        data = np.fromstring(" ".join(texts), sep=" ")
+    if data.size != ncols * len(texts):
+        # Ragged or malformed rows. Fall back to parsing row by row, which
+        # raises the appropriate error for malformed values.
+        return np.array([[float(i) for i in t.split()] for t in texts])
+    return data.reshape((len(texts), ncols))
+
+
 def _parse_from_incar(filename, key):
     """
     Helper function to parse a parameter from the INCAR.
@@ -149,6 +178,68 @@ def _vasprun_float(f):
         raise e
 
 
+_VASPRUN_SECTION_TAG = re.compile(
+    br"<(/?)(calculation|dos|eigenvalues|projected|dielectricfunction|"
+    br"structure)(?=[\s/>])([^>]*)>")
+
+
+def _index_vasprun(filename, chunk_size=2 ** 24):
+    """
+    Scans a vasprun.xml file once and records the byte offsets of the
+    sections that are expensive to parse, without building any xml tree.
+
+    Args:
+        filename (str): Filename of the vasprun.xml. Compressed files are
+            supported, in which case offsets refer to the uncompressed
+            stream.
+        chunk_size (int): Number of bytes read at a time.
+
+    Returns:
+        {tag: [(start, end), ...]} for the calculation, dos, eigenvalues,
+        projected, dielectricfunction tags and the final structure (stored
+        under "finalpos"), in file order. Unterminated sections, e.g., from
+        a run that is still in progress, are left out.
+    """
+    index = defaultdict(list)
+    opened = {}
+    # Tags are short, so an overlap of a few hundred bytes between
+    # consecutive chunks ensures that no tag is cut in two.
+    overlap = 512
+    offset = 0
+    buf = b""
+    with zopen(filename, "rb") as f:
+        while True:
+            data = f.read(chunk_size)
+            buf += data
+            cutoff = max(len(buf) - overlap, 0) if data else len(buf)
+            for m in _VASPRUN_SECTION_TAG.finditer(buf):
+                if m.start() >= cutoff:
+                    break
+                closing, tag, attrs = m.groups()
+                tag = tag.decode("ascii")
+                if tag == "structure":
+                    if closing:
+                        if tag in opened:
+                            start = opened.pop(tag)
+                            if start is not None:
+                                index["finalpos"].append(
+                                    (start, offset + m.end()))
+                    else:
+                        opened[tag] = offset + m.start() \
+                            if b"finalpos" in attrs else None
+                elif closing:
+                    if tag in opened:
+                        index[tag].append((opened.pop(tag),
+                                           offset + m.end()))
+                elif not attrs.rstrip().endswith(b"/"):
+                    opened[tag] = offset + m.start()
+            if not data:
+                break
+            offset += cutoff
+            buf = buf[cutoff:]
+    return dict(index)
+
+
 class Vasprun(PMGSONable):
     """
     Vastly improved cElementTree-based parser for vasprun.xml files. Uses
@@ -182,6 +273,20 @@ class Vasprun(PMGSONable):
             eigenvalues. Defaults to False. Set to True to obtain projected
             eigenvalues. **Note that this can take an extreme amount of time
             and memory.** So use this wisely.
+        lazy (bool): If True, the file is only scanned once for the byte
+            offsets of the ionic steps, dos, eigenvalues, projected
+            eigenvalues, dielectric function and final structure. Only the
+            header (incar, kpoints, parameters, atominfo, initial structure)
+            is parsed upfront. Each section is parsed the first time the
+            corresponding attribute is accessed, and the parse_* flags are
+            ignored. Also, ionic_step_skip and ionic_step_offset no longer
+            require reading the whole file into memory. Recommended for
+            very large vasprun.xml files, e.g., long MD runs or dense
+            k-point meshes, when only a few properties are needed. For
+            gzipped or bzipped files, the scan and each section parsed
+            (all ionic steps being read together in one pass) decompress
+            the file up to that section, so accessing most sections of a
+            compressed file is slower than a non-lazy parse.
 
     **Vasp results**
 
@@ -222,12 +327,14 @@ class Vasprun(PMGSONable):
 
     .. attribute:: projected_eigenvalues
 
-        Final projected eigenvalues as a dict of
-        {(atom index, band index, kpoint index, Orbital, Spin):float}
-        This representation is based on actual ordering in VASP and is meant as
-        an intermediate representation to be converted into proper objects. The
+        Final projected eigenvalues as a dict of {spin: numpy array} with
+        arrays of shape (number of kpoints, number of bands, number of atoms,
+        number of orbitals). The orbital index follows the VASP ordering,
+        i.e., Orbital.from_vasp_index gives the corresponding Orbital. The
         kpoint, band and atom indices are 0-based (unlike the 1-based indexing
-        in VASP).
+        in VASP). See projected_eigenvalues_dict for the previous
+        representation as a dict of {(spin, kpoint index, band index,
+        atom index, Orbital): float}.
 
     .. attribute:: dielectric
 
@@ -299,13 +406,27 @@ class Vasprun(PMGSONable):
     Author: Shyue Ping Ong
     """
 
+    # Attributes which are parsed on first access by a lazy Vasprun, mapped
+    # to the section of the file they are parsed from.
+    _LAZY_ATTRIBUTES = {"ionic_steps": "calculation", "tdos": "dos",
+                        "idos": "dos", "pdos": "dos", "efermi": "dos",
+                        "dos_has_errors": "dos",
+                        "eigenvalues": "eigenvalues",
+                        "projected_eigenvalues": "projected",
+                        "dielectric": "dielectricfunction",
+                        "final_structure": "finalpos"}
+
     def __init__(self, filename, ionic_step_skip=None,
                  ionic_step_offset=0, parse_dos=True,
-                 parse_eigen=True, parse_projected_eigen=False):
+                 parse_eigen=True, parse_projected_eigen=False, lazy=False):
         self.filename = filename
         self.ionic_step_skip = ionic_step_skip
         self.ionic_step_offset = ionic_step_offset
 
+        if lazy:
+            self._init_lazy()
+            return
+
         with zopen(filename, "rt") as f:
             if ionic_step_skip or ionic_step_offset:
                 # remove parts of the xml file and parse the string
@@ -331,6 +452,126 @@ class Vasprun(PMGSONable):
                             parse_projected_eigen=parse_projected_eigen)
                 self.nionic_steps = len(self.ionic_steps)
 
+    def _init_lazy(self):
+        """
+        Indexes the file and parses the header only. See the lazy argument.
+        """
+        self._section_index = _index_vasprun(self.filename)
+        calculations = self._section_index.get("calculation", [])
+        self.nionic_steps = len(calculations)
+        skip = int(self.ionic_step_skip or 1)
+        self._ionic_step_offsets = calculations[self.ionic_step_offset::skip]
+        with zopen(self.filename, "rb") as f:
+            if calculations:
+                # Close the root tag so that the header can be parsed on
+                # its own.
+                header = f.read(calculations[0][0]) + b"</modeling>"
+            else:
+                header = f.read()
+        for event, elem in iterparse(BytesIO(header)):
+            self._parse_header(elem)
+        self.vasp_version = self.generator["version"]
+
+    def __getattr__(self, name):
+        # Only called if regular attribute lookup fails, i.e., for sections
+        # of a lazy Vasprun which have not been parsed yet.
+        section = Vasprun._LAZY_ATTRIBUTES.get(name)
+        if section is not None and "_section_index" in self.__dict__:
+            self._parse_section(section)
+            if name in self.__dict__:
+                return self.__dict__[name]
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            self.__class__.__name__, name))
+
+    def _read_sections(self, offsets):
+        """
+        Reads and parses the xml between each pair of byte offsets (start,
+        end) of a lazy Vasprun's file. The offsets must be in file order.
+        They are read through a single handle which only moves forward,
+        since seeking backwards in a gzipped or bzipped file decompresses
+        it again from the start.
+        """
+        with zopen(self.filename, "rb") as f:
+            for start, end in offsets:
+                f.seek(start)
+                yield fromstring(f.read(end - start))
+
+    def _read_section(self, start, end):
+        """
+        Reads and parses the xml between byte offsets start and end of a
+        lazy Vasprun's file.
+        """
+        return list(self._read_sections([(start, end)]))[0]
+
+    def _parse_section(self, section):
+        """
+        Parses a section of a lazy Vasprun and sets the corresponding
+        attributes. Sections which are not present in the file leave the
+        attributes at the same values as a non-lazy parse would.
+        """
+        if section == "calculation":
+            self.ionic_steps = [
+                self._parse_calculation(elem)
+                for elem in self._read_sections(self._ionic_step_offsets)]
+            return
+        offsets = self._section_index.get(section)
+        if section == "dos":
+            self.efermi = None
+            if offsets:
+                try:
+                    self.tdos, self.idos, self.pdos = self._parse_dos(
+                        self._read_section(*offsets[-1]))
+                    self.efermi = self.tdos.efermi
+                    self.dos_has_errors = False
+                except Exception as ex:
+                    self.dos_has_errors = True
+        elif section == "eigenvalues":
+            self.eigenvalues = self._parse_eigen(
+                self._read_section(*offsets[-1])) if offsets else None
+        elif section == "projected":
+            self.projected_eigenvalues = self._parse_projected_eigen(
+                self._read_section(*offsets[-1])) if offsets else None
+        elif offsets and section == "dielectricfunction":
+            self.dielectric = self._parse_diel(
+                self._read_section(*offsets[-1]))
+        elif offsets and section == "finalpos":
+            self.final_structure = self._parse_structure(
+                self._read_section(*offsets[-1]))
+
+    @property
+    def _final_ionic_step(self):
+        """
+        Last ionic step read. A lazy Vasprun only parses that step if the
+        ionic steps have not been accessed yet.
+        """
+        if "ionic_steps" in self.__dict__ or \
+                "_section_index" not in self.__dict__:
+            return self.ionic_steps[-1]
+        if not self._ionic_step_offsets:
+            raise IndexError("No ionic steps in {}".format(self.filename))
+        if "_last_ionic_step" not in self.__dict__:
+            self._last_ionic_step = self._parse_calculation(
+                self._read_section(*self._ionic_step_offsets[-1]))
+        return self._last_ionic_step
+
+    def _parse_header(self, elem):
+        tag = elem.tag
+        if tag == "generator":
+            self.generator = self._parse_params(elem)
+        elif tag == "incar":
+            self.incar = self._parse_params(elem)
+        elif tag == "kpoints":
+            self.kpoints, self.actual_kpoints, \
+                self.actual_kpoints_weights = self._parse_kpoints(elem)
+        elif tag == "parameters":
+            self.parameters = self._parse_params(elem)
+        elif tag == "structure" and elem.attrib.get("name") == \
+                "initialpos":
+            self.initial_structure = self._parse_structure(elem)
+        elif tag == "atominfo":
+            self.atomic_symbols, self.potcar_symbols = \
+                self._parse_atominfo(elem)
+
     def _parse(self, stream, parse_dos, parse_eigen, parse_projected_eigen):
         self.efermi = None
         self.eigenvalues = None
@@ -340,21 +581,7 @@ class Vasprun(PMGSONable):
         for event, elem in iterparse(stream):
             tag = elem.tag
             if not parsed_header:
-                if tag == "generator":
-                    self.generator = self._parse_params(elem)
-                elif tag == "incar":
-                    self.incar = self._parse_params(elem)
-                elif tag == "kpoints":
-                    self.kpoints, self.actual_kpoints, \
-                        self.actual_kpoints_weights = self._parse_kpoints(elem)
-                elif tag == "parameters":
-                    self.parameters = self._parse_params(elem)
-                elif tag == "structure" and elem.attrib.get("name") == \
-                        "initialpos":
-                    self.initial_structure = self._parse_structure(elem)
-                elif tag == "atominfo":
-                    self.atomic_symbols, self.potcar_symbols = \
-                        self._parse_atominfo(elem)
+                self._parse_header(elem)
             if tag == "calculation":
                 parsed_header = True
                 ionic_steps.append(self._parse_calculation(elem))
@@ -386,21 +613,21 @@ class Vasprun(PMGSONable):
         """
         Property only available for DFPT calculations.
         """
-        return self.ionic_steps[-1].get("epsilon", [])
+        return self._final_ionic_step.get("epsilon", [])
 
     @property
     def epsilon_static_wolfe(self):
         """
         Property only available for DFPT calculations.
         """
-        return self.ionic_steps[-1].get("epsilon_rpa", [])
+        return self._final_ionic_step.get("epsilon_rpa", [])
 
     @property
     def epsilon_ionic(self):
         """
         Property only available for DFPT calculations and when IBRION=5, 6, 7 or 8.
         """
-        return self.ionic_steps[-1].get("epsilon_ion", [])
+        return self._final_ionic_step.get("epsilon_ion", [])
 
     @property
     def lattice(self):
@@ -416,7 +643,7 @@ class Vasprun(PMGSONable):
         Checks that electronic step convergence has been reached in the final
         ionic step
         """
-        final_esteps = self.ionic_steps[-1]["electronic_steps"]
+        final_esteps = self._final_ionic_step["electronic_steps"]
         if 'LEPSILON' in self.incar and self.incar['LEPSILON']:
             i = 1
             to_check = set(['e_wo_entrp', 'e_fr_energy', 'e_0_energy'])
@@ -432,7 +659,11 @@ class Vasprun(PMGSONable):
         exited before reaching the max ionic steps for a relaxation run
         """
         nsw = self.parameters.get("NSW", 0)
-        return nsw <= 1 or len(self.ionic_steps) < nsw
+        if "_section_index" in self.__dict__:
+            nsteps = len(self._ionic_step_offsets)
+        else:
+            nsteps = len(self.ionic_steps)
+        return nsw <= 1 or nsteps < nsw
 
     @property
     def converged(self):
@@ -448,7 +679,8 @@ class Vasprun(PMGSONable):
         Final energy from the vasp run.
         """
         try:
-            return self.ionic_steps[-1]["electronic_steps"][-1]["e_0_energy"]
+            return self._final_ionic_step["electronic_steps"][-1][
+                "e_0_energy"]
         except (IndexError, KeyError):
             # not all calculations have a total energy, i.e. GW
             return np.inf
@@ -463,6 +695,24 @@ class Vasprun(PMGSONable):
         pdoss = {final_struct[i]: pdos for i, pdos in enumerate(self.pdos)}
         return CompleteDos(self.final_structure, self.tdos, pdoss)
 
+    @property
+    def projected_eigenvalues_dict(self):
+        """
+        Projected eigenvalues as a dict of
+        {(spin, kpoint index, band index, atom index, Orbital): float}. This
+        creates a Python object for every value and is provided for
+        backwards compatibility only. Use projected_eigenvalues for anything
+        but small runs.
+        """
+        if self.projected_eigenvalues is None:
+            return None
+        proj_eigen = {}
+        for spin, data in self.projected_eigenvalues.items():
+            orbs = [Orbital.from_vasp_index(i) for i in range(data.shape[3])]
+            for (kpt, band, atom, i), v in np.ndenumerate(data):
+                proj_eigen[(spin, kpt, band, atom, orbs[i])] = v
+        return proj_eigen
+
     @property
     def hubbards(self):
         """
@@ -785,12 +1035,15 @@ class Vasprun(PMGSONable):
                         peigen[i][spin] = []
                         for j in range(len(eigen[i][spin])):
                             peigen[i][spin].append({})
-                for (spin, kpoint_index, band_index, ion_index, orbital), \
-                        value in self.projected_eigenvalues.items():
-                    beigen = peigen[kpoint_index][str(spin)][band_index]
-                    if orbital not in beigen:
-                        beigen[orbital] = [0.0] * nsites
-                    beigen[orbital][ion_index] = value
+                for spin, data in self.projected_eigenvalues.items():
+                    orbs = [Orbital.from_vasp_index(i)
+                            for i in range(data.shape[3])]
+                    for kpoint_index, band_index in itertools.product(
+                            range(data.shape[0]), range(data.shape[1])):
+                        beigen = peigen[kpoint_index][str(spin)][band_index]
+                        for i, orbital in enumerate(orbs):
+                            beigen[orbital] = data[kpoint_index, band_index,
+                                                   :, i].tolist()
                 vout['projected_eigenvalues'] = peigen
 
         vout['epsilon_static'] = self.epsilon_static
@@ -899,7 +1152,7 @@ class Vasprun(PMGSONable):
         idensities = {}
 
         for s in elem.find("total").find("array").find("set").findall("set"):
-            data = np.array(_parse_varray(s))
+            data = _parse_rows(s)
             energies = data[:, 0]
             spin = Spin.up if s.attrib["comment"] == "spin 1" else Spin.down
             tdensities[spin] = data[:, 1]
@@ -913,7 +1166,7 @@ class Vasprun(PMGSONable):
                 for ss in s.findall("set"):
                     spin = Spin.up if ss.attrib["comment"] == "spin 1" else \
                         Spin.down
-                    data = np.array(_parse_varray(ss))
+                    data = _parse_rows(ss)
                     nrow, ncol = data.shape
                     for j in range(1, ncol):
                         pdos[Orbital.from_vasp_index(j - 1)][spin] = data[:, j]
@@ -927,8 +1180,11 @@ class Vasprun(PMGSONable):
         for s in elem.find("array").find("set").findall("set"):
             spin = Spin.up if s.attrib["comment"] == "spin 1" else \
                 Spin.down
-            for i, ss in enumerate(s.findall("set")):
-                eigenvalues[(spin, i)] = _parse_varray(ss)
+            nkpts = len(s.findall("set"))
+            data = _parse_rows(s.iter("r"))
+            data = data.reshape((nkpts, -1, data.shape[1]))
+            for i, d in enumerate(data):
+                eigenvalues[(spin, i)] = d.tolist()
         elem.clear()
         return eigenvalues
 
@@ -938,12 +1194,11 @@ class Vasprun(PMGSONable):
         for s in root.findall("set"):
             spin = Spin.up if s.attrib["comment"] == "spin1" else \
                 Spin.down
-            for kpt, ss in enumerate(s.findall("set")):
-                for band, sss in enumerate(ss.findall("set")):
-                    for atom, data in enumerate(_parse_varray(sss)):
-                        for i, v in enumerate(data):
-                            orb = Orbital.from_vasp_index(i)
-                            proj_eigen[(spin, kpt, band, atom, orb)] = v
+            kpts = s.findall("set")
+            nbands = len(kpts[0].findall("set"))
+            data = _parse_rows(s.iter("r"))
+            proj_eigen[spin] = data.reshape((len(kpts), nbands, -1,
+                                             data.shape[1]))
         elem.clear()
         return proj_eigen
 
@@ -1596,66 +1851,98 @@ class VolumetricData(object):
         return VolumetricData(self.structure, data, self._distance_matrix)
 
     @staticmethod
-    def parse_file(filename):
+    def parse_file(filename, cache=False):
         """
         Convenience method to parse a generic volumetric data file in the vasp
         like format. Used by subclasses for parsing file.
 
         Args:
             filename (str): Path of file to parse
+            cache (bool): If True, the parsed data is saved to a binary
+                sidecar file, filename + ".npy", the first time the file is
+                parsed. Subsequent calls only parse the structure and memory
+                map the data from the sidecar file (copy-on-write, i.e.,
+                modifications are not written back), as long as the
+                sidecar file is newer than filename. Defaults to False.
 
         Returns:
             (poscar, data)
         """
-        poscar_read = False
         poscar_string = []
-        dataset = []
-        all_dataset = []
-        dim = None
-        dimline = None
-        read_dataset = False
-        ngrid_pts = 0
-        data_count = 0
-        poscar = None
-        with zopen(filename) as f:
+        cache_file = filename + ".npy"
+        with zopen(filename, "rt") as f:
             for line in f:
                 line = line.strip()
-                if read_dataset:
-                    toks = line.split()
-                    for tok in toks:
-                        if data_count < ngrid_pts:
-                            #This complicated procedure is necessary because
-                            #vasp outputs x as the fastest index, followed by y
-                            #then z.
-                            x = data_count % dim[0]
-                            y = int(math.floor(data_count / dim[0])) % dim[1]
-                            z = int(math.floor(data_count / dim[0] / dim[1]))
-                            dataset[x, y, z] = float(tok)
-                            data_count += 1
-                    if data_count >= ngrid_pts:
-                        read_dataset = False
-                        data_count = 0
-                        all_dataset.append(dataset)
-                elif not poscar_read:
-                    if line != "" or len(poscar_string) == 0:
-                        poscar_string.append(line)
-                    elif line == "":
-                        poscar = Poscar.from_string("\n".join(poscar_string))
-                        poscar_read = True
-                elif not dim:
-                    dim = [int(i) for i in line.split()]
-                    ngrid_pts = dim[0] * dim[1] * dim[2]
-                    dimline = line
-                    read_dataset = True
-                    dataset = np.zeros(dim)
-                elif line == dimline:
-                    read_dataset = True
-                    dataset = np.zeros(dim)
-            if len(all_dataset) == 2:
-                data = {"total": all_dataset[0], "diff": all_dataset[1]}
+                if line != "" or len(poscar_string) == 0:
+                    poscar_string.append(line)
+                else:
+                    break
+            poscar = Poscar.from_string("\n".join(poscar_string))
+            dimline = next(f).strip()
+            dim = [int(i) for i in dimline.split()]
+
+            if cache and os.path.exists(cache_file) and \
+                    os.path.getmtime(cache_file) >= os.path.getmtime(filename):
+                all_dataset = np.load(cache_file, mmap_mode="c")
             else:
-                data = {"total": all_dataset[0]}
-            return poscar, data
+                all_dataset = [VolumetricData._read_dataset(f, dim)]
+                for line in f:
+                    if line.strip() == dimline:
+                        all_dataset.append(
+                            VolumetricData._read_dataset(f, dim))
+                if cache:
+                    try:
+                        np.save(cache_file, np.array(all_dataset))
+                    except (IOError, OSError) as ex:
+                        warnings.warn("Unable to write cache file {}: {}"
+                                      .format(cache_file, ex))
+        if len(all_dataset) == 2:
+            data = {"total": all_dataset[0], "diff": all_dataset[1]}
+        else:
+            data = {"total": all_dataset[0]}
+        return poscar, data
+
+    @staticmethod
+    def _read_dataset(f, dim):
+        """
+        Reads a block of volumetric data from an open file positioned right
+        after the line with the grid dimensions. All values are converted
+        at once, assuming a constant number of values per line, which is
+        how vasp writes them. Vasp outputs x as the fastest index, followed
+        by y then z, i.e., Fortran order.
+
+        Args:
+            f: Open file.
+            dim: Grid dimensions (nx, ny, nz).
+
+        Returns:
+            numpy array of shape dim.
+
+        Raises:
+            ValueError if the block has malformed or missing values.
+        """
+        ngrid_pts = dim[0] * dim[1] * dim[2]
+        first = next(f, "")
+        per_line = len(first.split())
+        if per_line == 0:
+            raise ValueError("No volumetric data found after the grid "
+                             "dimensions {}".format(dim))
+        nlines = int(math.ceil(ngrid_pts / per_line))
+        lines = [first]
+        lines.extend(itertools.islice(f, nlines - 1))
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            data = np.fromstring(" ".join(lines), sep=" ")
+        if data.size != ngrid_pts:
+            # A malformed value (e.g., ****** for a Fortran overflow) stops
+            # the conversion early. Parse the block value by value, which
+            # raises the appropriate error for malformed values.
+            data = np.array([float(t) for l in lines for t in l.split()])
+        if data.size != ngrid_pts:
+            raise ValueError("Expected {} values of volumetric data on {} "
+                             "lines, found {}".format(ngrid_pts, nlines,
+                                                      data.size))
+        return data.reshape(dim, order="F")
 
     def write_file(self, file_name, vasp4_compatible=False):
         """
@@ -1686,19 +1973,18 @@ class VolumetricData(object):
             a = self.dim
 
             def write_spin(data_type):
-                lines = []
-                count = 0
                 f.write("{} {} {}\n".format(a[0], a[1], a[2]))
-                for (k, j, i) in itertools.product(list(range(a[2])), list(range(a[1])),
-                                                   list(range(a[0]))):
-                    lines.append("%0.11e" % self.data[data_type][i, j, k])
-                    count += 1
-                    if count % 5 == 0:
-                        f.write("".join(lines) + "\n")
-                        lines = []
-                    else:
-                        lines.append(" ")
-                f.write("".join(lines) + "\n")
+                #x is the fastest index, i.e., Fortran order.
+                vals = self.data[data_type].ravel(order="F").tolist()
+                nfull = len(vals) // 5 * 5
+                #Format and write a bounded number of lines at a time.
+                block = 5 * 10000
+                for i in range(0, nfull, block):
+                    chunk = vals[i:min(i + block, nfull)]
+                    f.write(("%0.11e %0.11e %0.11e %0.11e %0.11e\n" *
+                             (len(chunk) // 5)) % tuple(chunk))
+                rest = vals[nfull:]
+                f.write("".join(["%0.11e " % v for v in rest]) + "\n")
 
             write_spin("total")
             if self.is_spin_polarized:
@@ -1735,22 +2021,29 @@ class VolumetricData(object):
         a = self.dim
         if ind not in self._distance_matrix or\
                 self._distance_matrix[ind]["max_radius"] < radius:
-            coords = []
-            for (x, y, z) in itertools.product(*[list(range(i)) for i in a]):
-                coords.append([x / a[0], y / a[1], z / a[2]])
-            sites_dist = struct.lattice.get_points_in_sphere(
-                coords, struct[ind].coords, radius)
-            self._distance_matrix[ind] = {"max_radius": radius,
-                                          "data": np.array(sites_dist)}
-
-        data = self._distance_matrix[ind]["data"]
+            coords = np.indices(a).reshape((3, -1)).T / np.array(a)
+            # Stream over the grid points in blocks so that memory does not
+            # scale with number of grid points times number of images.
+            all_dists = []
+            all_inds = []
+            for fcoords, dists, inds, images in \
+                    struct.lattice.iter_points_in_sphere(
+                        coords, struct[ind].coords, radius):
+                all_dists.append(dists)
+                all_inds.append(inds)
+            self._distance_matrix[ind] = {
+                "max_radius": radius,
+                "dists": np.concatenate(all_dists) if all_dists
+                else np.zeros(0),
+                "inds": np.concatenate(all_inds) if all_inds
+                else np.zeros(0, dtype=int)}
+
+        data = self._distance_matrix[ind]
 
         #Use boolean indexing to find all charges within the desired distance.
-        inds = data[:, 1] <= radius
-        dists = data[inds, 1]
-        data_inds = np.rint(np.mod(list(data[inds, 0]), 1) *
-                            np.tile(a, (len(dists), 1))).astype(int)
-        vals = [self.data["diff"][x, y, z] for x, y, z in data_inds]
+        within = data["dists"] <= radius
+        dists = data["dists"][within]
+        vals = self.data["diff"].ravel()[data["inds"][within]]
 
         hist, edges = np.histogram(dists, bins=nbins,
                                    range=[0, radius],
@@ -1798,8 +2091,16 @@ class Locpot(VolumetricData):
         self.name = poscar.comment
 
     @staticmethod
-    def from_file(filename):
-        (poscar, data) = VolumetricData.parse_file(filename)
+    def from_file(filename, cache=False):
+        """
+        Reads a LOCPOT file.
+
+        Args:
+            filename (str): Filename.
+            cache (bool): Whether to cache the data in a binary sidecar
+                file. See VolumetricData.parse_file.
+        """
+        (poscar, data) = VolumetricData.parse_file(filename, cache=cache)
         return Locpot(poscar, data)
 
 
@@ -1819,8 +2120,16 @@ class Chgcar(VolumetricData):
         self._distance_matrix = {}
 
     @staticmethod
-    def from_file(filename):
-        (poscar, data) = VolumetricData.parse_file(filename)
+    def from_file(filename, cache=False):
+        """
+        Reads a CHGCAR file.
+
+        Args:
+            filename (str): Filename.
+            cache (bool): Whether to cache the data in a binary sidecar
+                file. See VolumetricData.parse_file.
+        """
+        (poscar, data) = VolumetricData.parse_file(filename, cache=cache)
         return Chgcar(poscar, data)
 
 
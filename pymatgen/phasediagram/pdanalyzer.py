@@ -20,11 +20,9 @@ import numpy as np
 import itertools
 import collections
 
-from monty.functools import lru_cache
-
 from pyhull.simplex import Simplex
 
-from pymatgen.core.composition import Composition
+from pymatgen.core.composition import Composition, CompositionMatrix
 from pymatgen.phasediagram.pdmaker import PhaseDiagram, \
     GrandPotentialPhaseDiagram, get_facets
 from pymatgen.analysis.reaction_calculator import Reaction
@@ -48,6 +46,10 @@ class PDAnalyzer(object):
 
     numerical_tol = 1e-8
 
+    #Maximum number of barycentric coordinates computed at once when
+    #locating the facets of many compositions.
+    facet_chunk_size = 2 ** 22
+
     def __init__(self, pd):
         """
         Initializes analyzer with a PhaseDiagram.
@@ -56,6 +58,9 @@ class PDAnalyzer(object):
             pd: Phase Diagram to analyze.
         """
         self._pd = pd
+        self._facets = None
+        self._facet_transforms = None
+        self._last_facet = None
 
     def _make_comp_matrix(self, complist):
         """
@@ -65,20 +70,77 @@ class PDAnalyzer(object):
         return np.array([[comp.get_atomic_fraction(el)
                           for el in self._pd.elements] for comp in complist])
 
-    @lru_cache(1)
+    def _check_facets(self):
+        """
+        Clears the cached facet data if the hull of the phase diagram has
+        changed since it was computed, e.g., through
+        IncrementalPhaseDiagram.add_entries.
+        """
+        if self._facets is not self._pd.facets:
+            self._facets = self._pd.facets
+            self._facet_transforms = None
+            self._last_facet = None
+
+    def _get_facet_transforms(self):
+        """
+        Inverses of the vertex matrices of all facets (atomic fractions of
+        elements[1:] augmented with a column of ones), stacked into a
+        (nfacets, dim, dim) array. Multiplying [x, 1] by one of them gives the
+        barycentric coordinates of the atomic fractions x in that facet.
+        Computed once per hull.
+        """
+        self._check_facets()
+        if self._facet_transforms is None:
+            pd = self._pd
+            facets = np.array(pd.facets).reshape((len(pd.facets), pd.dim))
+            m = pd.qhull_data[facets]
+            m[:, :, -1] = 1
+            self._facet_transforms = np.linalg.inv(m)
+        return self._facet_transforms
+
+    def _get_facet_indices(self, fracs):
+        """
+        Locates the facets that many compositions fall into, by testing the
+        barycentric coordinates of all compositions in all facets at once.
+
+        Args:
+            fracs (np.ndarray): Nxdim array of atomic fractions of the
+                phase diagram elements.
+
+        Returns:
+            Array of the indices of the first facet containing each
+            composition, or -1 where no facet was found.
+        """
+        transforms = self._get_facet_transforms()
+        tol = PDAnalyzer.numerical_tol / 10
+        points = np.concatenate([fracs[:, 1:], np.ones((len(fracs), 1))],
+                                axis=1)
+        chunk = max(1, PDAnalyzer.facet_chunk_size // transforms.size)
+        indices = np.empty(len(points), dtype=int)
+        for i in range(0, len(points), chunk):
+            bary = np.einsum("ij,fjk->ifk", points[i:i + chunk], transforms)
+            inside = np.all(bary >= -tol, axis=2)
+            indices[i:i + chunk] = np.where(inside.any(axis=1),
+                                            inside.argmax(axis=1), -1)
+        return indices
+
     def _get_facet(self, comp):
         """
         Get any facet that a composition falls into. Cached so successive
         calls at same composition are fast.
         """
+        self._check_facets()
+        if self._last_facet is not None and self._last_facet[0] == comp:
+            return self._last_facet[1]
         if set(comp.elements).difference(self._pd.elements):
             raise ValueError('{} has elements not in the phase diagram {}'
                              ''.format(comp, self._pd.elements))
-        c = [comp.get_atomic_fraction(e) for e in self._pd.elements[1:]]
-        for f, s in zip(self._pd.facets, self._pd.simplices):
-            if s.in_simplex(c, PDAnalyzer.numerical_tol / 10):
-                return f
-        raise RuntimeError("No facet found for comp = {}".format(comp))
+        c = [comp.get_atomic_fraction(e) for e in self._pd.elements]
+        ind = self._get_facet_indices(np.array([c]))[0]
+        if ind < 0:
+            raise RuntimeError("No facet found for comp = {}".format(comp))
+        self._last_facet = (comp, self._pd.facets[ind])
+        return self._last_facet[1]
 
     def get_decomposition(self, comp):
         """
@@ -159,6 +221,59 @@ class PDAnalyzer(object):
         """
         return self.get_decomp_and_e_above_hull(entry)[1]
 
+    def get_e_above_hull_many(self, entries, allow_negative=False):
+        """
+        Provides the energies above convex hull for many entries at once.
+        Gives the same results as calling get_e_above_hull on each entry,
+        but the composition matrix is built once, the facets of all entries
+        are located in a single vectorized pass and the decompositions of
+        all entries falling into the same facet are solved together. Use
+        this for screening large numbers of entries.
+
+        Args:
+            entries ([PDEntry]): PDEntry-like objects.
+            allow_negative: Whether to allow negative e_above_hulls. Defaults
+                to False.
+
+        Returns:
+            Array of energies above convex hull, in the order of entries.
+        """
+        entries = list(entries)
+        pd = self._pd
+        ehulls = np.zeros(len(entries))
+        stable_entries = pd.stable_entries
+        inds = [i for i, e in enumerate(entries) if e not in stable_entries]
+        if not inds:
+            return ehulls
+
+        comps = [entries[i].composition for i in inds]
+        fracs = CompositionMatrix(comps, pd.elements).atomic_fractions
+        bad = np.where(fracs.sum(axis=1) < 1 - PDAnalyzer.numerical_tol)[0]
+        if len(bad) > 0:
+            raise ValueError('{} has elements not in the phase diagram {}'
+                             ''.format(comps[bad[0]], pd.elements))
+        facet_inds = self._get_facet_indices(fracs)
+        bad = np.where(facet_inds < 0)[0]
+        if len(bad) > 0:
+            raise RuntimeError("No facet found for comp = {}"
+                               "".format(comps[bad[0]]))
+
+        hull_energies = np.empty(len(inds))
+        for f in np.unique(facet_inds):
+            facet = pd.facets[f]
+            mask = facet_inds == f
+            m = self._make_comp_matrix([pd.qhull_entries[i].composition
+                                        for i in facet])
+            decomp_amts = np.linalg.solve(m.T, fracs[mask].T)
+            energies = [pd.qhull_entries[i].energy_per_atom for i in facet]
+            hull_energies[mask] = np.dot(energies, decomp_amts)
+        ehull = np.array([entries[i].energy_per_atom for i in inds]) \
+            - hull_energies
+        if not allow_negative and np.any(ehull < -PDAnalyzer.numerical_tol):
+            raise ValueError("No valid decomp found!")
+        ehulls[inds] = ehull
+        return ehulls
+
     def get_equilibrium_reaction_energy(self, entry):
         """
         Provides the reaction energy of a stable entry from the neighboring
@@ -32,7 +32,7 @@ except ImportError:
     HULL_METHOD = "pyhull"
 
 from pymatgen.core.periodic_table import get_el_sp
-from pymatgen.core.composition import Composition
+from pymatgen.core.composition import Composition, CompositionMatrix
 from pymatgen.phasediagram.entries import GrandPotPDEntry, TransformedPDEntry
 from pymatgen.entries.computed_entries import ComputedEntry
 
@@ -104,12 +104,41 @@ class PhaseDiagram (PMGSONable):
                 diagram. If set to None, the elements are determined from
                 the the entries themselves.
         """
+        entries = list(entries)
         if elements is None:
             elements = set()
             for entry in entries:
                 elements.update(entry.composition.elements)
-        elements = list(elements)
-        dim = len(elements)
+        self.elements = list(elements)
+        self.dim = len(self.elements)
+        self.all_entries = entries
+        data = self._get_hull_data(entries)
+        self.all_entries_hulldata = data[:, 1:]
+        self._make_hull(entries, data)
+
+    def _get_hull_data(self, entries):
+        """
+        Returns the atomic fractions of the elements and the energy per atom
+        of entries as an Nx(dim+1) array.
+        """
+        comp_matrix = CompositionMatrix([e.composition for e in entries],
+                                        self.elements)
+        return np.concatenate([comp_matrix.atomic_fractions,
+                               [[e.energy_per_atom] for e in entries]],
+                              axis=1)
+
+    def _make_hull(self, entries, data):
+        """
+        Computes the element references, the qhull entries and the facets
+        of the convex hull of a list of entries.
+
+        Args:
+            entries ([PDEntry]): Entries to build the hull from.
+            data (np.ndarray): Hull data of the entries, as given by
+                _get_hull_data.
+        """
+        elements = self.elements
+        dim = self.dim
         el_refs = {}
         for el in elements:
             el_entries = list(filter(lambda e: e.composition.is_element and
@@ -121,14 +150,7 @@ class PhaseDiagram (PMGSONable):
                     .format(el))
             el_refs[el] = min(el_entries, key=lambda e: e.energy_per_atom)
 
-        data = []
-        for entry in entries:
-            comp = entry.composition
-            row = [comp.get_atomic_fraction(el) for el in elements]
-            row.append(entry.energy_per_atom)
-            data.append(row)
-        data = np.array(data)
-        self.all_entries_hulldata = data[:, 1:]
+        frac_comps = data[:, :-1]
 
         #use only entries with negative formation energy
         vec = [el_refs[el].energy_per_atom for el in elements] + [-1]
@@ -140,9 +162,12 @@ class PhaseDiagram (PMGSONable):
         #This is significantly faster than grouping by composition and then
         #taking the lowest energy of each group
         ind = []
-        prev_c = []  # compositions within 1e-4 of current entry
-        prev_e = []  # energies of those compositions
-        for i in np.argsort([e.energy_per_atom for e in entries]):
+        prev_c = []  # indices of entries within 1e-4 of current entry
+        prev_e = []  # energies of those entries
+        #a stable sort keeps the first of several identical entries, so
+        #that the same one is used when hulling a subset of the entries
+        for i in np.argsort([e.energy_per_atom for e in entries],
+                            kind="mergesort"):
             if form_e[i] > -self.formation_energy_tol:
                 continue
             epa = entries[i].energy_per_atom
@@ -150,11 +175,13 @@ class PhaseDiagram (PMGSONable):
             while prev_e and epa > 1e-4 + prev_e[0]:
                 prev_c.pop(0)
                 prev_e.pop(0)
-            frac_comp = entries[i].composition.fractional_composition
-            if frac_comp not in prev_c:
+            #same criterion as equality of the fractional compositions
+            if not prev_c or not np.any(np.all(
+                    np.abs(frac_comps[prev_c] - frac_comps[i]) <=
+                    Composition.amount_tolerance, axis=1)):
                 ind.append(i)
             prev_e.append(epa)
-            prev_c.append(frac_comp)
+            prev_c.append(i)
 
         #add the elemental references
         ind.extend([entries.index(el) for el in el_refs.values()])
@@ -169,26 +196,22 @@ class PhaseDiagram (PMGSONable):
         qhull_data = np.concatenate([qhull_data, [extra_point]], axis=0)
 
         if dim == 1:
-            self.facets = [qhull_data.argmin(axis=0)]
+            facets = [qhull_data.argmin(axis=0)]
         else:
-            facets = get_facets(qhull_data)
-            finalfacets = []
-            for facet in facets:
+            facets = []
+            for facet in get_facets(qhull_data):
                 #skip facets that include the extra point
                 if max(facet) == len(qhull_data)-1:
                     continue
                 m = qhull_data[facet]
                 m[:, -1] = 1
                 if abs(np.linalg.det(m)) > 1e-14:
-                    finalfacets.append(facet)
-            self.facets = finalfacets
+                    facets.append(facet)
 
-        self.simplices = [Simplex(qhull_data[f, :-1]) for f in self.facets]
-        self.all_entries = entries
+        self.facets = facets
+        self.simplices = [Simplex(qhull_data[f, :-1]) for f in facets]
         self.qhull_data = qhull_data
-        self.dim = dim
         self.el_refs = el_refs
-        self.elements = elements
         self.qhull_entries = qhull_entries
 
     @property
@@ -265,6 +288,74 @@ class PhaseDiagram (PMGSONable):
         return cls(entries, elements)
 
 
+class IncrementalPhaseDiagram(PhaseDiagram):
+    """
+    A phase diagram which can be updated with new entries, or have entries
+    removed, without being rebuilt from scratch. This is useful for
+    high-throughput screening, where a few new entries at a time are
+    compared against a large existing phase diagram.
+
+    Entries that are unstable cannot become stable when entries are added,
+    so added entries are hulled together with the current stable entries
+    only. Removing unstable entries does not change the hull, while removing
+    stable entries rebuilds the hull from all remaining entries. PDAnalyzers
+    of the phase diagram pick up the updates automatically.
+    """
+
+    def _get_stable_list(self):
+        """
+        Stable entries in a deterministic order.
+        """
+        stable_entries = self.stable_entries
+        return [e for e in self.qhull_entries if e in stable_entries]
+
+    def add_entries(self, entries):
+        """
+        Adds entries to the phase diagram.
+
+        Args:
+            entries ([PDEntry]): PDEntry-like objects to add. Their elements
+                must be in the phase diagram.
+        """
+        entries = list(entries)
+        if not entries:
+            return
+        for entry in entries:
+            if set(entry.composition.elements).difference(self.elements):
+                raise PhaseDiagramError(
+                    "{} has elements not in the phase diagram."
+                    .format(entry.name))
+        data = self._get_hull_data(entries)
+        candidates = self._get_stable_list()
+        self._make_hull(candidates + entries, np.concatenate(
+            [self._get_hull_data(candidates), data]))
+        self.all_entries = self.all_entries + entries
+        self.all_entries_hulldata = np.concatenate(
+            [self.all_entries_hulldata, data[:, 1:]])
+
+    def remove_entries(self, entries):
+        """
+        Removes entries from the phase diagram.
+
+        Args:
+            entries ([PDEntry]): PDEntry-like objects to remove. Entries which
+                are not in the phase diagram are ignored.
+        """
+        entries = set(entries)
+        mask = np.array([e not in entries for e in self.all_entries],
+                        dtype=bool)
+        if mask.all():
+            return
+        remaining = [e for e, keep in zip(self.all_entries, mask) if keep]
+        if entries.intersection(self.stable_entries):
+            self._make_hull(remaining, self._get_hull_data(remaining))
+        else:
+            candidates = self._get_stable_list()
+            self._make_hull(candidates, self._get_hull_data(candidates))
+        self.all_entries = remaining
+        self.all_entries_hulldata = self.all_entries_hulldata[mask]
+
+
 class GrandPotentialPhaseDiagram(PhaseDiagram):
     """
     A class representing a Grand potential phase diagram. Grand potential phase
@@ -440,6 +531,248 @@ class CompoundPhaseDiagram(PhaseDiagram):
                    d["normalize_terminal_compositions"])
 
 
+class PatchedPhaseDiagram(PMGSONable):
+    """
+    A phase diagram of a large multicomponent chemical space, made of
+    separate phase diagrams for the chemical subsystems actually spanned by
+    the entries. For example, entries in the Li-Fe-O and Li-Co-O systems give
+    two ternary phase diagrams, instead of one quaternary phase diagram. Since
+    the convex hull of a subsystem only depends on entries within that
+    subsystem, the results are the same as for a single PhaseDiagram, but the
+    hulls stay low-dimensional, which makes chemical spaces with 10 or more
+    elements tractable.
+
+    Energies above hull and decompositions are obtained by routing each
+    composition to the smallest subsystem containing it.
+
+    .. attribute: all_entries
+
+        All entries provided for phase diagram construction.
+
+    .. attribute: elements
+
+        Elements in the phase diagram.
+
+    .. attribute: pds
+
+        Dict of {frozenset of elements: PhaseDiagram} for the subsystems. The
+        phase diagrams are built from the stable entries of each subsystem.
+    """
+
+    def __init__(self, entries, ncpus=None):
+        """
+        Args:
+            entries ([PDEntry]): A list of PDEntry-like objects having an
+                energy, energy_per_atom and composition.
+            ncpus (int): Number of processes to use for building the hulls of
+                the subsystems. Defaults to None, which means serial
+                processing.
+        """
+        entries = list(entries)
+        chemsys_inds = collections.defaultdict(list)
+        for i, entry in enumerate(entries):
+            chemsys_inds[frozenset(entry.composition.elements)].append(i)
+
+        #The subsystems are the chemical systems which are not contained in
+        #the chemical system of another entry.
+        spaces = []
+        for chemsys in sorted(chemsys_inds, key=len, reverse=True):
+            if not any(chemsys.issubset(space) for space in spaces):
+                spaces.append(chemsys)
+        args = []
+        for space in spaces:
+            inds = [i for chemsys, c_inds in chemsys_inds.items()
+                    if chemsys.issubset(space) for i in c_inds]
+            args.append((sorted(inds), sorted(space)))
+
+        if ncpus:
+            import multiprocessing as mp
+            pool = mp.Pool(ncpus, initializer=_init_patch_worker,
+                           initargs=(entries,))
+            try:
+                all_stable_inds = pool.map(_patch_worker_stable_indices, args)
+            except:
+                pool.terminate()
+                raise
+            else:
+                pool.close()
+            finally:
+                pool.join()
+        else:
+            all_stable_inds = [_get_stable_indices(entries, inds, elements)
+                               for inds, elements in args]
+
+        self.pds = {}
+        for (inds, elements), stable_inds in zip(args, all_stable_inds):
+            self.pds[frozenset(elements)] = PhaseDiagram(
+                [entries[i] for i in stable_inds], elements)
+        self.all_entries = entries
+        self.elements = sorted(set().union(*chemsys_inds.keys()))
+        self._spaces = {}
+        self._extra_pds = {}
+        self._analyzers = {}
+
+    @property
+    def stable_entries(self):
+        """
+        Returns the stable entries in the phase diagram.
+        """
+        stable_entries = set()
+        for pd in self.pds.values():
+            stable_entries.update(pd.stable_entries)
+        return stable_entries
+
+    @property
+    def unstable_entries(self):
+        """
+        Entries that are unstable in the phase diagram. Includes positive
+        formation energy entries.
+        """
+        stable_entries = self.stable_entries
+        return [e for e in self.all_entries if e not in stable_entries]
+
+    def _get_space(self, elements):
+        """
+        Returns the smallest subsystem containing a set of elements. If no
+        subsystem contains them (e.g., Co-Fe-Li when only Li-Co-O and
+        Li-Fe-O compounds exist), a phase diagram is built for these elements
+        from the stable entries of the subsystems within them. It is kept
+        apart from the subsystems in pds.
+        """
+        elements = frozenset(elements)
+        if elements not in self._spaces:
+            if elements.difference(self.elements):
+                raise ValueError("{} are not in the phase diagram {}".format(
+                    "-".join(sorted(el.symbol for el in elements)),
+                    self.elements))
+            spaces = [space for space in self.pds if elements.issubset(space)]
+            if spaces:
+                self._spaces[elements] = min(spaces, key=len)
+            else:
+                #An entry unstable in its subsystem decomposes into entries
+                #of its own chemical system, so it is unstable here too.
+                stable_entries = self.stable_entries
+                entries = [e for e in self.all_entries
+                           if e in stable_entries and
+                           elements.issuperset(e.composition.elements)]
+                self._extra_pds[elements] = PhaseDiagram(entries,
+                                                         sorted(elements))
+                self._spaces[elements] = elements
+        return self._spaces[elements]
+
+    def _get_pd(self, space):
+        if space in self.pds:
+            return self.pds[space]
+        return self._extra_pds[space]
+
+    def get_pd(self, elements):
+        """
+        Returns the phase diagram of the smallest subsystem containing a set
+        of elements. If no subsystem contains them, a phase diagram of these
+        elements is built from the stable entries.
+
+        Args:
+            elements ([Element]): Elements of a chemical system.
+
+        Returns:
+            PhaseDiagram
+        """
+        return self._get_pd(self._get_space(elements))
+
+    def _get_analyzer(self, elements):
+        from pymatgen.phasediagram.pdanalyzer import PDAnalyzer
+        space = self._get_space(elements)
+        if space not in self._analyzers:
+            self._analyzers[space] = PDAnalyzer(self._get_pd(space))
+        return self._analyzers[space]
+
+    def get_decomposition(self, comp):
+        """
+        Provides the decomposition at a particular composition.
+
+        Args:
+            comp: A composition
+
+        Returns:
+            Decomposition as a dict of {Entry: amount}
+        """
+        return self._get_analyzer(comp.elements).get_decomposition(comp)
+
+    def get_decomp_and_e_above_hull(self, entry, allow_negative=False):
+        """
+        Provides the decomposition and energy above convex hull for an entry.
+
+        Args:
+            entry: A PDEntry like object
+            allow_negative: Whether to allow negative e_above_hulls. Defaults
+                to False.
+
+        Returns:
+            (decomp, energy above convex hull)  Stable entries should have
+            energy above hull of 0. The decomposition is provided as a dict of
+            {Entry: amount}.
+        """
+        analyzer = self._get_analyzer(entry.composition.elements)
+        return analyzer.get_decomp_and_e_above_hull(
+            entry, allow_negative=allow_negative)
+
+    def get_e_above_hull(self, entry):
+        """
+        Provides the energy above convex hull for an entry
+
+        Args:
+            entry: A PDEntry like object
+
+        Returns:
+            Energy above convex hull of entry. Stable entries should have
+            energy above hull of 0.
+        """
+        return self.get_decomp_and_e_above_hull(entry)[1]
+
+    def get_e_above_hull_many(self, entries, allow_negative=False):
+        """
+        Provides the energies above convex hull for many entries at once,
+        using PDAnalyzer.get_e_above_hull_many on the entries of each
+        subsystem.
+
+        Args:
+            entries ([PDEntry]): PDEntry-like objects.
+            allow_negative: Whether to allow negative e_above_hulls. Defaults
+                to False.
+
+        Returns:
+            Array of energies above convex hull, in the order of entries.
+        """
+        entries = list(entries)
+        space_inds = collections.defaultdict(list)
+        for i, entry in enumerate(entries):
+            space_inds[self._get_space(entry.composition.elements)].append(i)
+        ehulls = np.zeros(len(entries))
+        for space, inds in space_inds.items():
+            analyzer = self._get_analyzer(space)
+            ehulls[inds] = analyzer.get_e_above_hull_many(
+                [entries[i] for i in inds], allow_negative=allow_negative)
+        return ehulls
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        symbols = [el.symbol for el in self.elements]
+        return "{} patched phase diagram with {} subsystems".format(
+            "-".join(symbols), len(self.pds))
+
+    def as_dict(self):
+        return {"@module": self.__class__.__module__,
+                "@class": self.__class__.__name__,
+                "all_entries": [e.as_dict() for e in self.all_entries]}
+
+    @classmethod
+    def from_dict(cls, d):
+        entries = MontyDecoder().process_decoded(d["all_entries"])
+        return cls(entries)
+
+
 class PhaseDiagramError(Exception):
     """
     An exception class for Phase Diagram generation.
@@ -470,3 +803,30 @@ def get_facets(qhull_data, joggle=False, force_use_pyhull=False):
             return ConvexHull(qhull_data, qhull_options="Qt i").simplices
     else:
         return ConvexHull(qhull_data, joggle=joggle).vertices
+
+
+#Module level state and functions for PatchedPhaseDiagram, so that the
+#subsystems can be built with multiprocessing. Each worker process holds its
+#own copy of the entries, and returns indices of the stable entries so that
+#the parent process keeps its own entry objects. The entries are set by the
+#Pool initializer, and are never set in the parent process.
+_patch_worker = {"entries": None}
+
+
+def _init_patch_worker(entries):
+    _patch_worker["entries"] = entries
+
+
+def _patch_worker_stable_indices(args):
+    inds, elements = args
+    return _get_stable_indices(_patch_worker["entries"], inds, elements)
+
+
+def _get_stable_indices(entries, inds, elements):
+    """
+    Returns the indices of the entries in inds which are stable in the phase
+    diagram of elements.
+    """
+    entries = [entries[i] for i in inds]
+    stable_entries = PhaseDiagram(entries, elements).stable_entries
+    return [i for i, e in zip(inds, entries) if e in stable_entries]
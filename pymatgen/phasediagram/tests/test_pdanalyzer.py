@@ -33,6 +33,15 @@ class PDAnalyzerTest(unittest.TestCase):
                 self.assertGreaterEqual(e_ah, 0)
                 self.assertTrue(isinstance(e_ah, Number))
 
+    def test_get_e_above_hull_many(self):
+        e_ahs = self.analyzer.get_e_above_hull_many(self.pd.all_entries)
+        self.assertEqual(len(e_ahs), len(self.pd.all_entries))
+        for entry, e_ah in zip(self.pd.all_entries, e_ahs):
+            self.assertAlmostEqual(e_ah,
+                                   self.analyzer.get_e_above_hull(entry))
+        self.assertRaises(ValueError, self.analyzer.get_e_above_hull_many,
+                          [PDEntry(Composition("LiCoO2"), -10)])
+
     def test_get_equilibrium_reaction_energy(self):
         for entry in self.pd.stable_entries:
             self.assertLessEqual(
@@ -8,7 +8,8 @@ import os
 from pymatgen import Element, Composition
 from pymatgen.phasediagram.entries import PDEntryIO, PDEntry
 from pymatgen.phasediagram.pdmaker import PhaseDiagram, \
-    GrandPotentialPhaseDiagram, CompoundPhaseDiagram, PhaseDiagramError
+    GrandPotentialPhaseDiagram, CompoundPhaseDiagram, PhaseDiagramError, \
+    IncrementalPhaseDiagram, PatchedPhaseDiagram, _patch_worker
 from pymatgen.phasediagram.pdanalyzer import PDAnalyzer
 from pymatgen.phasediagram.plotter import PDPlotter
 
@@ -92,6 +93,113 @@ class PhaseDiagramTest(unittest.TestCase):
         self.assertIsNotNone(str(self.pd))
 
 
+class IncrementalPhaseDiagramTest(unittest.TestCase):
+
+    def setUp(self):
+        module_dir = os.path.dirname(os.path.abspath(__file__))
+        (self.elements, self.entries) = \
+            PDEntryIO.from_csv(os.path.join(module_dir, "pdentries_test.csv"))
+        self.pd = PhaseDiagram(self.entries)
+
+    def test_add_entries(self):
+        initial = [e for e in self.entries
+                   if e.composition.is_element or len(e.composition) == 2]
+        others = [e for e in self.entries if e not in initial]
+        pd = IncrementalPhaseDiagram(initial)
+        analyzer = PDAnalyzer(pd)
+        entry = [e for e in others if e in self.pd.stable_entries][0]
+        self.assertGreater(
+            len(analyzer.get_decomposition(entry.composition)), 1)
+        pd.add_entries(others)
+        self.assertEqual(set(pd.stable_entries), set(self.pd.stable_entries))
+        self.assertEqual(len(pd.all_entries), len(self.entries))
+        self.assertEqual(pd.all_entries_hulldata.shape,
+                         self.pd.all_entries_hulldata.shape)
+        #the analyzer must not use the facets of the old hull
+        self.assertEqual(
+            list(analyzer.get_decomposition(entry.composition).keys()),
+            [entry])
+        for e in others:
+            self.assertAlmostEqual(analyzer.get_e_above_hull(e),
+                                   PDAnalyzer(self.pd).get_e_above_hull(e))
+        self.assertRaises(PhaseDiagramError, pd.add_entries,
+                          [PDEntry(Composition("LiCoO2"), -10)])
+
+    def test_remove_entries(self):
+        pd = IncrementalPhaseDiagram(self.entries)
+        analyzer = PDAnalyzer(pd)
+        unstable = [e for e in pd.all_entries
+                    if e not in pd.stable_entries][:10]
+        pd.remove_entries(unstable)
+        self.assertEqual(set(pd.stable_entries), set(self.pd.stable_entries))
+        self.assertEqual(len(pd.all_entries), len(self.entries) - 10)
+
+        stable = [e for e in pd.stable_entries if not e.is_element][:2]
+        pd.remove_entries(stable)
+        entries = [e for e in self.entries
+                   if e not in unstable and e not in stable]
+        self.assertEqual(set(pd.stable_entries),
+                         set(PhaseDiagram(entries).stable_entries))
+        self.assertEqual(len(pd.all_entries_hulldata), len(entries))
+        for e in stable:
+            decomp = analyzer.get_decomposition(e.composition)
+            self.assertTrue(all(d in pd.stable_entries for d in decomp))
+            self.assertNotIn(e, decomp)
+
+
+class PatchedPhaseDiagramTest(unittest.TestCase):
+
+    def setUp(self):
+        module_dir = os.path.dirname(os.path.abspath(__file__))
+        (self.elements, self.entries) = \
+            PDEntryIO.from_csv(os.path.join(module_dir, "pdentries_test.csv"))
+        self.entries.extend([PDEntry(Composition("Co"), -7),
+                             PDEntry(Composition("CoO"), -15),
+                             PDEntry(Composition("Co3O4"), -50),
+                             PDEntry(Composition("LiCoO2"), -26),
+                             PDEntry(Composition("Li2CoO2"), -30),
+                             PDEntry(Composition("CoFe"), -13)])
+        self.pd = PhaseDiagram(self.entries)
+        self.analyzer = PDAnalyzer(self.pd)
+        self.ppd = PatchedPhaseDiagram(self.entries)
+
+    def test_init(self):
+        self.assertEqual(set(self.ppd.pds.keys()),
+                         set([frozenset(Composition(s).elements)
+                              for s in ["LiFeO2", "LiCoO2", "CoFe"]]))
+        self.assertEqual(self.ppd.stable_entries, self.pd.stable_entries)
+        ppd = PatchedPhaseDiagram(self.entries, ncpus=2)
+        self.assertEqual(ppd.stable_entries, self.pd.stable_entries)
+        #the worker state is only set in the worker processes
+        self.assertIsNone(_patch_worker["entries"])
+
+    def test_get_e_above_hull(self):
+        for entry in self.entries:
+            self.assertAlmostEqual(self.ppd.get_e_above_hull(entry),
+                                   self.analyzer.get_e_above_hull(entry))
+        e_ahs = self.ppd.get_e_above_hull_many(self.entries)
+        for entry, e_ah in zip(self.entries, e_ahs):
+            self.assertAlmostEqual(e_ah,
+                                   self.analyzer.get_e_above_hull(entry))
+
+    def test_get_decomposition(self):
+        string = str(self.ppd)
+        #Li-Co-Fe is not spanned by any entry
+        for formula in ["Li3Fe7O11", "LiCo2O3", "LiCoFe"]:
+            comp = Composition(formula)
+            decomp = self.ppd.get_decomposition(comp)
+            expected = self.analyzer.get_decomposition(comp)
+            self.assertEqual(set(decomp.keys()), set(expected.keys()))
+            for entry, amt in decomp.items():
+                self.assertAlmostEqual(amt, expected[entry])
+        self.assertRaises(ValueError, self.ppd.get_decomposition,
+                          Composition("NaCl"))
+        #queries do not change the subsystems
+        self.assertEqual(len(self.ppd.pds), 3)
+        self.assertEqual(str(self.ppd), string)
+        self.assertEqual(self.ppd.stable_entries, self.pd.stable_entries)
+
+
 class GrandPotentialPhaseDiagramTest(unittest.TestCase):
 
     def setUp(self):
@@ -17,6 +17,7 @@ __date__ = "Jul 24, 2012"
 import numpy as np
 from fractions import gcd, Fraction
 from itertools import groupby
+from collections import defaultdict
 
 import six
 
@@ -345,26 +346,27 @@ class EnumerateStructureTransformation(AbstractTransformation):
         structures = adaptor.structures
         original_latt = structure.lattice
         inv_latt = np.linalg.inv(original_latt.matrix)
-        ewald_matrices = {}
-        all_structures = []
-        for s in structures:
-            new_latt = s.lattice
-            transformation = np.dot(new_latt.matrix, inv_latt)
-            transformation = tuple([tuple([int(round(cell)) for cell in row])
-                                    for row in transformation])
-            if contains_oxidation_state:
-                if transformation not in ewald_matrices:
-                    s_supercell = Structure.from_sites(structure.sites)
-                    s_supercell.make_supercell(transformation)
-                    ewald = EwaldSummation(s_supercell)
-                    ewald_matrices[transformation] = ewald
-                else:
-                    ewald = ewald_matrices[transformation]
-                energy = ewald.compute_sub_structure(s)
-                all_structures.append({"num_sites": len(s), "energy": energy,
-                                       "structure": s})
-            else:
-                all_structures.append({"num_sites": len(s), "structure": s})
+        all_structures = [{"num_sites": len(s), "structure": s}
+                          for s in structures]
+        if contains_oxidation_state:
+            #Group the structures by supercell so that a single
+            #EwaldSummation ranks all structures sharing a supercell at once.
+            supercells = defaultdict(list)
+            for i, s in enumerate(structures):
+                new_latt = s.lattice
+                transformation = np.dot(new_latt.matrix, inv_latt)
+                transformation = tuple([tuple([int(round(cell))
+                                               for cell in row])
+                                        for row in transformation])
+                supercells[transformation].append(i)
+            for transformation, inds in supercells.items():
+                s_supercell = Structure.from_sites(structure.sites)
+                s_supercell.make_supercell(transformation)
+                ewald = EwaldSummation(s_supercell)
+                energies = ewald.compute_sub_structures(
+                    [structures[i] for i in inds])
+                for i, energy in zip(inds, energies):
+                    all_structures[i]["energy"] = energy
 
         def sort_func(s):
             return s["energy"] / s["num_sites"] if contains_oxidation_state \
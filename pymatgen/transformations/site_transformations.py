@@ -286,7 +286,7 @@ class PartialRemoveSitesTransformation(AbstractTransformation):
                           .format(time.time() - starttime))
         starttime = time.time()
 
-        ematrix = ewaldsum.total_energy_matrix
+        state = ewaldsum.get_incremental_state()
         to_delete = []
 
         totalremovals = sum(num_remove_dict.values())
@@ -299,21 +299,19 @@ class PartialRemoveSitesTransformation(AbstractTransformation):
                 if removed[indices] < num_remove_dict[indices]:
                     for ind in indices:
                         if ind not in to_delete:
-                            energy = sum(ematrix[:, ind]) + \
-                                sum(ematrix[:, ind]) - ematrix[ind, ind]
+                            energy = -state.get_remove_delta([ind])
                             if energy > maxe:
                                 maxindex = ind
                                 maxe = energy
                                 maxindices = indices
             removed[maxindices] += 1
             to_delete.append(maxindex)
-            ematrix[:, maxindex] = 0
-            ematrix[maxindex, :] = 0
+            state.remove([maxindex])
         s = Structure.from_sites(structure.sites)
         s.remove_sites(to_delete)
         self.logger.debug("Minimizing Ewald took {} seconds."
                           .format(time.time() - starttime))
-        return [{"energy": sum(sum(ematrix)),
+        return [{"energy": state.energy,
                  "structure": s.get_sorted_structure()}]
 
     def complete_ordering(self, structure, num_remove_dict):
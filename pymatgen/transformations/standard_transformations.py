@@ -501,16 +501,20 @@ class OrderDisorderedStructureTransformation(AbstractTransformation):
         symmetrized_structures (bool): Whether the input structures are
             instances of SymmetrizedStructure, and that their symmetry
             should be used for the grouping of sites.
+        ncpus (int): Number of processes to use for the search of the
+            EwaldMinimizer. Defaults to None, which means a serial search.
     """
 
     ALGO_FAST = 0
     ALGO_COMPLETE = 1
     ALGO_BEST_FIRST = 2
 
-    def __init__(self, algo=ALGO_FAST, symmetrized_structures=False):
+    def __init__(self, algo=ALGO_FAST, symmetrized_structures=False,
+                 ncpus=None):
         self._algo = algo
         self._all_structures = []
         self._symmetrized = symmetrized_structures
+        self._ncpus = ncpus
 
     def apply_transformation(self, structure, return_ranked_list=False):
         """
@@ -602,7 +606,8 @@ class OrderDisorderedStructureTransformation(AbstractTransformation):
                 m_list.append([0, empty, list(g), None])
 
         matrix = EwaldSummation(s).total_energy_matrix
-        ewald_m = EwaldMinimizer(matrix, m_list, num_to_return, self._algo)
+        ewald_m = EwaldMinimizer(matrix, m_list, num_to_return, self._algo,
+                                 ncpus=self._ncpus)
 
         self._all_structures = []
 
@@ -647,7 +652,7 @@ class OrderDisorderedStructureTransformation(AbstractTransformation):
 
     def as_dict(self):
         return {"name": self.__class__.__name__, "version": __version__,
-                "init_args": {"algo": self._algo},
+                "init_args": {"algo": self._algo, "ncpus": self._ncpus},
                 "@module": self.__class__.__module__,
                 "@class": self.__class__.__name__}
 
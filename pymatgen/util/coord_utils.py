@@ -17,6 +17,7 @@ __maintainer__ = "Shyue Ping Ong"
 __email__ = "shyuep@gmail.com"
 __date__ = "Nov 27, 2011"
 
+import itertools
 import numpy as np
 import math
 
@@ -310,6 +311,64 @@ def is_coord_subset_pbc(subset, superset, atol=1e-8):
     return np.all(any_close)
 
 
+def pbc_coord_matches(fcoords, ref_fcoords, atol=1e-8):
+    """
+    Tests for each fractional coord whether it is within a tolerance of some
+    coord in a reference list, under periodic boundary conditions. Uses a
+    spatial hash of the reference coords, i.e. the cost is linear in the
+    number of coords instead of quadratic.
+
+    Args:
+        fcoords: Nx3 array of fractional coords to test.
+        ref_fcoords: Mx3 array of reference fractional coords.
+        atol: Absolute tolerance, either a number or one per axis. Defaults
+            to 1e-8.
+
+    Returns:
+        Boolean array of length N.
+    """
+    fcoords = np.mod(np.array(fcoords, dtype=float).reshape((-1, 3)), 1)
+    ref_fcoords = np.mod(np.array(ref_fcoords, dtype=float).reshape((-1, 3)),
+                         1)
+    atol = np.zeros(3) + atol
+    matches = np.zeros(len(fcoords), dtype=bool)
+    if len(fcoords) == 0 or len(ref_fcoords) == 0:
+        return matches
+
+    # Bins are at least atol wide, so a match can only be in the same or an
+    # adjacent bin (with periodic wrapping of the bins).
+    nbins = np.maximum(np.floor(1 / atol), 1).astype(np.int64)
+
+    def linear_index(b):
+        b = np.mod(b, nbins)
+        return b[:, 0] + nbins[0] * (b[:, 1] + nbins[1] * b[:, 2])
+
+    ref_bins = linear_index(np.floor(ref_fcoords * nbins).astype(np.int64))
+    sort_inds = np.argsort(ref_bins, kind="mergesort")
+    sorted_bins = ref_bins[sort_inds]
+    bins = np.floor(fcoords * nbins).astype(np.int64)
+
+    offsets = [(-1, 0, 1) if n > 2 else range(n) for n in nbins]
+    for offset in itertools.product(*offsets):
+        inds = np.nonzero(~matches)[0]
+        if len(inds) == 0:
+            break
+        lin = linear_index(bins[inds] + offset)
+        start = np.searchsorted(sorted_bins, lin, side="left")
+        counts = np.searchsorted(sorted_bins, lin, side="right") - start
+        total = np.sum(counts)
+        if total == 0:
+            continue
+        q_inds = np.repeat(inds, counts)
+        pos = np.arange(total) - np.repeat(np.cumsum(counts) - counts - start,
+                                           counts)
+        d = fcoords[q_inds] - ref_fcoords[sort_inds[pos]]
+        d -= np.round(d)
+        close = np.all(np.abs(d) < atol, axis=-1)
+        matches[q_inds[close]] = True
+    return matches
+
+
 def lattice_points_in_supercell(supercell_matrix):
     """
     Returns the list of points on the original lattice contained in the
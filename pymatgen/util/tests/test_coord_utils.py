@@ -21,7 +21,7 @@ from pymatgen.util.coord_utils import get_linear_interpolated_value,\
     find_in_coord_list, find_in_coord_list_pbc,\
     barycentric_coords, pbc_shortest_vectors,\
     lattice_points_in_supercell, coord_list_mapping, all_distances,\
-    is_coord_subset_pbc, coord_list_mapping_pbc
+    is_coord_subset_pbc, coord_list_mapping_pbc, pbc_coord_matches
 from pymatgen.util.testing import PymatgenTest
 
 
@@ -144,6 +144,25 @@ class CoordUtilsTest(PymatgenTest):
         self.assertFalse(is_coord_subset_pbc([c1, c2], [c2, c3]))
         self.assertFalse(is_coord_subset_pbc([c1, c2], [c2]))
 
+    def test_pbc_coord_matches(self):
+        ref = [[0, 0, 0], [0.5, 0.5, 0.5], [0.99, 0.2, 0.3]]
+        fcoords = [[1, 1, -1], [0.505, 1.5, 0.5], [-0.005, 0.2, 0.3],
+                   [0.25, 0.25, 0.25], [0.5, 0.5, 0.52]]
+        self.assertArrayEqual(pbc_coord_matches(fcoords, ref, 0.01),
+                              [True, True, True, False, False])
+        self.assertArrayEqual(pbc_coord_matches(fcoords, ref,
+                                                [0.01, 0.01, 0.03]),
+                              [True, True, True, False, True])
+        self.assertArrayEqual(pbc_coord_matches(fcoords, ref, 0.3),
+                              [True] * 5)
+        self.assertArrayEqual(pbc_coord_matches(fcoords, [], 0.3),
+                              [False] * 5)
+        #agrees with the brute force check
+        c1 = np.random.rand(50, 3)
+        c2 = np.random.rand(40, 3)
+        expected = [in_coord_list_pbc(c2, c, atol=0.1) for c in c1]
+        self.assertArrayEqual(pbc_coord_matches(c1, c2, 0.1), expected)
+
     def test_lattice_points_in_supercell(self):
         supercell = np.array([[1,3,5], [-3,2,3], [-5,3,1]])
         points = lattice_points_in_supercell(supercell)